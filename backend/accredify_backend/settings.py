@@ -125,6 +125,35 @@ else:
     }
 
 
+# Cache
+# The AI concurrency limiter and circuit breaker keep their state here, so
+# production needs a cache shared by all gunicorn workers.
+
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif DATABASE_URL.startswith('postgresql'):
+    # Requires `python manage.py createcachetable`
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'accredify_cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -201,6 +230,47 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# AI (Gemini) call guard
+AI_MAX_CONCURRENT_CALLS = int(os.environ.get('AI_MAX_CONCURRENT_CALLS', '4'))
+AI_SLOT_WAIT_SECONDS = float(os.environ.get('AI_SLOT_WAIT_SECONDS', '2'))
+AI_CALL_LEASE_SECONDS = int(os.environ.get('AI_CALL_LEASE_SECONDS', '120'))  # matches gunicorn --timeout
+AI_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('AI_CIRCUIT_FAILURE_THRESHOLD', '5'))
+AI_CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get('AI_CIRCUIT_SLOW_CALL_SECONDS', '30'))
+AI_CIRCUIT_RECOVERY_SECONDS = float(os.environ.get('AI_CIRCUIT_RECOVERY_SECONDS', '60'))
+
+# Keyword-rule confidence at or above which categorization/frequency grouping skips the model
+AI_HEURISTIC_CONFIDENCE = float(os.environ.get('AI_HEURISTIC_CONFIDENCE', '0.8'))
+
+# Default and maximum look-ahead (days) for the upcoming/overdue endpoints
+UPCOMING_WINDOW_DAYS = int(os.environ.get('UPCOMING_WINDOW_DAYS', '30'))
+UPCOMING_MAX_WINDOW_DAYS = int(os.environ.get('UPCOMING_MAX_WINDOW_DAYS', '366'))
+
+# Seconds a per-process assistant retrieval index is reused before rebuilding
+RETRIEVAL_INDEX_TTL = int(os.environ.get('RETRIEVAL_INDEX_TTL', '300'))
+
+# Audit log writer: buffer entries and insert them in batches from a background thread
+AUDIT_LOG_ASYNC = os.environ.get('AUDIT_LOG_ASYNC', 'True').lower() == 'true'
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', '200'))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', '1.0'))
+AUDIT_LOG_MAX_QUEUE = int(os.environ.get('AUDIT_LOG_MAX_QUEUE', '10000'))
+
+# Audit log retention: rows older than this are moved to compressed monthly archives
+AUDIT_LOG_RETENTION_DAYS = int(os.environ.get('AUDIT_LOG_RETENTION_DAYS', '365'))
+AUDIT_LOG_ARCHIVE_DIR = os.environ.get('AUDIT_LOG_ARCHIVE_DIR', str(BASE_DIR / 'audit_archive'))
+
+# CSV import jobs run on an in-process thread pool (inline when disabled)
+IMPORT_JOBS_ASYNC = os.environ.get('IMPORT_JOBS_ASYNC', 'True').lower() == 'true'
+IMPORT_JOB_WORKERS = int(os.environ.get('IMPORT_JOB_WORKERS', '2'))
+
+# PDF reports are generated on an in-process thread pool (inline when disabled)
+REPORTS_ASYNC = os.environ.get('REPORTS_ASYNC', 'True').lower() == 'true'
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', '1'))
+# A report still RUNNING after this long is treated as abandoned by its worker and may be requeued
+REPORT_STALE_SECONDS = int(os.environ.get('REPORT_STALE_SECONDS', '900'))
+
+# Project statistics are cached per project version; this bounds stale entries
+PROJECT_STATS_CACHE_TTL = int(os.environ.get('PROJECT_STATS_CACHE_TTL', '86400'))
+
 # API Documentation (drf-spectacular)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'AccrediFy API',
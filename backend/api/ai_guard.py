@@ -0,0 +1,249 @@
+"""
+Concurrency limiter and circuit breaker in front of Gemini.
+
+Both keep their state in the Django cache so that every gunicorn worker sharing
+that cache (Redis or the database cache in production) sees the same in-flight
+slots and the same breaker state. With the local-memory cache used in
+development the limits apply per process.
+"""
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ConcurrencyLimitError(Exception):
+    """Raised when no model call slot became free in time"""
+
+
+class _GuardStats:
+    """Per-process counters reported on the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.transitions: Dict[str, int] = {}
+        self.rejected_calls = 0
+        self.short_circuited = 0
+
+    def record_transition(self, old: str, new: str):
+        with self._lock:
+            key = f'{old}->{new}'
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected_calls += 1
+
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuited += 1
+
+    def reset(self):
+        with self._lock:
+            self.transitions.clear()
+            self.rejected_calls = 0
+            self.short_circuited = 0
+
+
+stats = _GuardStats()
+
+
+class ConcurrencyLimiter:
+    """Cross-worker cap on in-flight model calls using leased cache slots"""
+
+    def __init__(self, prefix: str = 'ai:slot'):
+        self.prefix = prefix
+
+    @property
+    def limit(self) -> int:
+        return max(1, settings.AI_MAX_CONCURRENT_CALLS)
+
+    def _keys(self):
+        return [f'{self.prefix}:{i}' for i in range(self.limit)]
+
+    def _try_acquire(self, token: str):
+        for key in self._keys():
+            # cache.add is atomic: it only succeeds if the slot is free
+            if cache.add(key, token, timeout=settings.AI_CALL_LEASE_SECONDS):
+                return key
+        return None
+
+    @contextmanager
+    def slot(self):
+        """Hold one model call slot for the duration of the block"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + settings.AI_SLOT_WAIT_SECONDS
+        key = self._try_acquire(token)
+        while key is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            key = self._try_acquire(token)
+        if key is None:
+            stats.record_rejection()
+            raise ConcurrencyLimitError(f'All {self.limit} AI call slots are busy')
+        try:
+            yield
+        finally:
+            if cache.get(key) == token:
+                cache.delete(key)
+
+    def in_flight(self) -> int:
+        return len(cache.get_many(self._keys()))
+
+    def reset(self):
+        cache.delete_many(self._keys())
+
+
+class CircuitBreaker:
+    """
+    Stops sending model calls after consecutive failures or slow calls.
+
+    CLOSED lets every call through. After ``AI_CIRCUIT_FAILURE_THRESHOLD``
+    consecutive failures (a call slower than ``AI_CIRCUIT_SLOW_CALL_SECONDS``
+    counts as a failure) the breaker OPENs and callers get their heuristic
+    fallback immediately. After ``AI_CIRCUIT_RECOVERY_SECONDS`` a single caller
+    is let through as a HALF_OPEN probe; its outcome closes or re-opens it.
+
+    The failure count is a ``cache.incr`` counter, the first caller to cross
+    the threshold opens the breaker with ``cache.add``, and the probe is a
+    ``cache.add`` lease holding a random token. The state is derived from
+    which keys exist. Only the caller holding the probe token (kept in a
+    thread-local, as ``allow_request`` and the ``record_*`` call run on the
+    same thread) closes or re-opens a tripped breaker, so calls that were
+    already in flight when it opened cannot close it.
+
+    ``add`` is atomic on every cache backend, so the breaker opens once and
+    there is only one probe at a time. ``incr`` is atomic on Redis and the
+    local-memory cache but a get and set on the database cache, where
+    concurrent failures can be lost and the breaker may take a few more
+    failures than ``AI_CIRCUIT_FAILURE_THRESHOLD`` to open.
+    """
+
+    def __init__(self, key: str = 'ai:circuit'):
+        self.key = key
+        self.failures_key = f'{key}:failures'
+        self.opened_key = f'{key}:opened_at'
+        self.probe_key = f'{key}:probe'
+        self._local = threading.local()
+
+    def _load(self) -> Dict[str, Any]:
+        values = cache.get_many([self.failures_key, self.opened_key, self.probe_key])
+        opened_at = values.get(self.opened_key)
+        if opened_at is None:
+            state = CLOSED
+        elif self.probe_key in values:
+            state = HALF_OPEN
+        else:
+            state = OPEN
+        return {'state': state, 'failures': values.get(self.failures_key, 0), 'opened_at': opened_at}
+
+    def _transition(self, old_state: str, new_state: str):
+        stats.record_transition(old_state, new_state)
+        logger.warning(f"AI circuit breaker {old_state} -> {new_state}")
+
+    @property
+    def state(self) -> str:
+        return self._load()['state']
+
+    def allow_request(self) -> bool:
+        """Return True if a model call may be attempted now"""
+        opened_at = cache.get(self.opened_key)
+        if opened_at is None:
+            return True
+        # Only one caller across all workers holds the probe lease; if the probe
+        # never reports back the lease expires and another caller may probe
+        token = uuid.uuid4().hex
+        if time.time() - opened_at >= settings.AI_CIRCUIT_RECOVERY_SECONDS and cache.add(
+            self.probe_key, token, timeout=settings.AI_CALL_LEASE_SECONDS
+        ):
+            self._local.probe = token
+            self._transition(OPEN, HALF_OPEN)
+            return True
+        stats.record_short_circuit()
+        return False
+
+    def _take_probe(self) -> bool:
+        """True if this thread holds the current probe lease (which it gives up)"""
+        token, self._local.probe = getattr(self._local, 'probe', None), None
+        return token is not None and cache.get(self.probe_key) == token
+
+    def record_success(self, latency: float):
+        if latency > settings.AI_CIRCUIT_SLOW_CALL_SECONDS:
+            self.record_failure()
+            return
+        if self._take_probe():
+            cache.delete_many([self.failures_key, self.opened_key, self.probe_key])
+            self._transition(HALF_OPEN, CLOSED)
+        elif cache.get(self.opened_key) is None:
+            cache.delete(self.failures_key)
+
+    def _increment_failures(self) -> int:
+        cache.add(self.failures_key, 0, timeout=None)
+        try:
+            return cache.incr(self.failures_key)
+        except ValueError:
+            # Evicted between add and incr
+            cache.set(self.failures_key, 1, timeout=None)
+            return 1
+
+    def record_failure(self):
+        failures = self._increment_failures()
+        if self._take_probe():
+            # The half-open probe failed: restart the recovery timer
+            cache.set(self.opened_key, time.time(), timeout=None)
+            cache.delete(self.probe_key)
+            self._transition(HALF_OPEN, OPEN)
+        elif failures >= settings.AI_CIRCUIT_FAILURE_THRESHOLD and cache.add(
+            self.opened_key, time.time(), timeout=None
+        ):
+            self._transition(CLOSED, OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = self._load()
+        return {
+            'state': data['state'],
+            'consecutive_failures': data['failures'],
+            'opened_at': data['opened_at'],
+        }
+
+    def reset(self):
+        cache.delete_many([self.failures_key, self.opened_key, self.probe_key])
+        self._local.probe = None
+
+
+concurrency_limiter = ConcurrencyLimiter()
+circuit_breaker = CircuitBreaker()
+
+
+def guarded_call(func, *args, **kwargs):
+    """Run a model call inside a concurrency slot, feeding the circuit breaker"""
+    with concurrency_limiter.slot():
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            circuit_breaker.record_failure()
+            raise
+        circuit_breaker.record_success(time.perf_counter() - start)
+        return result
+
+
+def snapshot() -> Dict[str, Any]:
+    return {
+        'circuit': circuit_breaker.snapshot(),
+        'transitions': dict(stats.transitions),
+        'short_circuited_calls': stats.short_circuited,
+        'in_flight': concurrency_limiter.in_flight(),
+        'concurrency_limit': concurrency_limiter.limit,
+        'rejected_calls': stats.rejected_calls,
+    }
@@ -0,0 +1,233 @@
+"""
+Instrumentation for AI (Gemini) calls.
+
+Every public function in ``ai_services`` is wrapped with ``instrumented``. Model
+calls, JSON parse failures, heuristic fallbacks and rule pre-filter hits are
+recorded per (function, model) pair in a per-process registry that the admin
+``/api/metrics/`` endpoint exposes, and each model call emits one structured log record carrying
+the request ID assigned by ``RequestTimingMiddleware``.
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .middleware import get_current_request_id
+
+logger = logging.getLogger(__name__)
+
+# Rough heuristic for Gemini tokenization of English text
+CHARS_PER_TOKEN = 4
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+_current_call = contextvars.ContextVar('ai_current_call', default=None)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a prompt or response"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds (Prometheus style)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.count
+        return {'count': self.count, 'sum': round(self.sum, 4), 'buckets': buckets}
+
+
+class _Series:
+    """Metrics for one (function, model) pair"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.json_parse_failures = 0
+        self.fallbacks: Dict[str, int] = {}
+        self.prefiltered = 0
+        self.latency_seconds = Histogram(LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self.response_tokens = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'json_parse_failures': self.json_parse_failures,
+            'fallbacks': dict(self.fallbacks),
+            'fallbacks_total': sum(self.fallbacks.values()),
+            'prefiltered_items': self.prefiltered,
+            'latency_seconds': self.latency_seconds.to_dict(),
+            'prompt_tokens_estimate': self.prompt_tokens.to_dict(),
+            'prompt_chars_total': self.prompt_chars,
+            'response_chars_total': self.response_chars,
+            'response_tokens_estimate_total': self.response_tokens,
+        }
+
+
+class AIMetricsRegistry:
+    """Thread-safe, per-process store of AI call metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+
+    def _get(self, function: str, model: str) -> _Series:
+        key = (function, model)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    def record_call(self, function: str, model: str, latency: float,
+                    prompt_chars: int, response_chars: int, success: bool):
+        with self._lock:
+            series = self._get(function, model)
+            series.calls += 1
+            if not success:
+                series.errors += 1
+            series.latency_seconds.observe(latency)
+            series.prompt_tokens.observe(prompt_chars / CHARS_PER_TOKEN)
+            series.prompt_chars += prompt_chars
+            series.response_chars += response_chars
+            series.response_tokens += (response_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    def record_json_failure(self, function: str, model: str):
+        with self._lock:
+            self._get(function, model).json_parse_failures += 1
+
+    def record_fallback(self, function: str, model: str, reason: str):
+        with self._lock:
+            fallbacks = self._get(function, model).fallbacks
+            fallbacks[reason] = fallbacks.get(reason, 0) + 1
+
+    def record_prefiltered(self, function: str, model: str, count: int):
+        with self._lock:
+            self._get(function, model).prefiltered += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            functions: Dict[str, Dict[str, Any]] = {}
+            for (function, model), series in sorted(self._series.items()):
+                functions.setdefault(function, {})[model] = series.to_dict()
+        return {'pid': os.getpid(), 'functions': functions}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+registry = AIMetricsRegistry()
+
+
+def instrumented(model_name: str):
+    """
+    Decorator for AI service functions.
+
+    Binds the function name and model so that ``track_generate``,
+    ``record_json_failure`` and ``record_fallback`` can attribute metrics
+    without threading extra arguments through every call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _current_call.set((func.__name__, model_name))
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_call.reset(token)
+        return wrapper
+    return decorator
+
+
+def _call_labels() -> Tuple[str, str]:
+    return _current_call.get() or ('unknown', 'unknown')
+
+
+def track_generate(model, prompt: str) -> str:
+    """Call ``model.generate_content`` and record latency and size metrics"""
+    function, model_name = _call_labels()
+    start = time.perf_counter()
+    response_text = ''
+    success = False
+    try:
+        response = model.generate_content(prompt)
+        response_text = response.text
+        success = True
+        return response_text
+    finally:
+        latency = time.perf_counter() - start
+        registry.record_call(function, model_name, latency, len(prompt), len(response_text or ''), success)
+        logger.info(
+            f"AI call {function} ({model_name}) {'ok' if success else 'failed'} in {latency:.2f}s",
+            extra={
+                'request_id': get_current_request_id(),
+                'ai_function': function,
+                'ai_model': model_name,
+                'latency_ms': round(latency * 1000, 1),
+                'prompt_chars': len(prompt),
+                'prompt_tokens_estimate': estimate_tokens(prompt),
+                'response_chars': len(response_text or ''),
+                'response_tokens_estimate': estimate_tokens(response_text),
+                'success': success,
+            }
+        )
+
+
+def record_json_failure():
+    function, model_name = _call_labels()
+    registry.record_json_failure(function, model_name)
+    logger.warning(
+        f"AI response for {function} was not valid JSON",
+        extra={'request_id': get_current_request_id(), 'ai_function': function, 'ai_model': model_name}
+    )
+
+
+def record_fallback(reason: str):
+    """Record that the current AI function returned its heuristic fallback"""
+    function, model_name = _call_labels()
+    registry.record_fallback(function, model_name, reason)
+    logger.info(
+        f"AI function {function} fell back to heuristics ({reason})",
+        extra={
+            'request_id': get_current_request_id(),
+            'ai_function': function,
+            'ai_model': model_name,
+            'fallback_reason': reason,
+        }
+    )
+
+
+def record_prefiltered(count: int):
+    """Record items the current AI function resolved with rules instead of the model"""
+    function, model_name = _call_labels()
+    registry.record_prefiltered(function, model_name, count)
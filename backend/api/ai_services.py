@@ -13,8 +13,16 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+from . import ai_metrics, ai_guard, heuristics, prompt_builder, retrieval
+
 logger = logging.getLogger(__name__)
 
+PRO_MODEL = 'gemini-1.5-pro'
+FLASH_MODEL = 'gemini-1.5-flash'
+
+# Number of indicators sent to the assistant as context for a question
+ASSISTANT_CONTEXT_INDICATORS = 10
+
 
 def get_gemini_client():
     """Initialize and return Gemini client"""
@@ -31,34 +39,82 @@ def get_gemini_client():
     return genai
 
 
-def get_pro_model():
-    """Get the pro model for complex tasks"""
+def _get_model(model_name: str):
+    """Return a model, or None if unconfigured or the circuit breaker is open"""
     client = get_gemini_client()
     if not client:
         return None
-    return client.GenerativeModel('gemini-1.5-pro')
+    if not ai_guard.circuit_breaker.allow_request():
+        return None
+    return client.GenerativeModel(model_name)
+
+
+def get_pro_model():
+    """Get the pro model for complex tasks"""
+    return _get_model(PRO_MODEL)
 
 
 def get_flash_model():
     """Get the flash model for faster, simpler tasks"""
-    client = get_gemini_client()
-    if not client:
-        return None
-    return client.GenerativeModel('gemini-1.5-flash')
+    return _get_model(FLASH_MODEL)
+
+
+def _unavailable_reason() -> str:
+    """Label for a fallback taken because no model was returned"""
+    if ai_guard.circuit_breaker.state != ai_guard.CLOSED:
+        return 'circuit_open'
+    return 'unavailable'
 
 
-def analyze_checklist(indicators: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _generate(model, prompt: str) -> str:
+    """Send a prompt to the model under the concurrency cap and circuit breaker"""
+    return ai_guard.guarded_call(ai_metrics.track_generate, model, prompt)
+
+
+def _strip_markdown(result_text: str) -> str:
+    """Remove a surrounding markdown code fence from a model response"""
+    result_text = result_text.strip()
+    if result_text.startswith('```'):
+        result_text = result_text.split('\n', 1)[1]
+        result_text = result_text.rsplit('```', 1)[0]
+    return result_text
+
+
+def _parse_json(result_text: str) -> Any:
+    """Parse a JSON model response, counting parse failures"""
+    try:
+        return json.loads(_strip_markdown(result_text))
+    except json.JSONDecodeError:
+        ai_metrics.record_json_failure()
+        raise
+
+
+def _merge_groups(groups: Dict[str, List[str]], extra: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Append grouped IDs from ``extra`` onto ``groups`` (keeps keys the model adds)"""
+    merged = {key: list(ids) for key, ids in groups.items()}
+    for key, ids in extra.items():
+        merged.setdefault(key, []).extend(ids)
+    return merged
+
+
+@ai_metrics.instrumented(PRO_MODEL)
+def analyze_checklist(indicators: List[Dict[str, Any]], allow_fallback: bool = True) -> Optional[List[Dict[str, Any]]]:
     """
     Analyze and enrich checklist indicators using AI.
     
     Args:
         indicators: List of indicator data to analyze
+        allow_fallback: If False, return None instead of default enrichment
+            when the model is unavailable or fails
         
     Returns:
         Enriched indicator data with AI suggestions
     """
     model = get_pro_model()
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
+        if not allow_fallback:
+            return None
         # Return indicators with default enrichment
         return [{
             **ind,
@@ -68,31 +124,39 @@ def analyze_checklist(indicators: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         } for ind in indicators]
     
     try:
-        prompt = f"""You are a compliance expert. Analyze these compliance indicators and enrich them with:
+        template = """You are a compliance expert. Analyze these compliance indicators and enrich them with:
 1. A detailed description if missing
 2. Suggested frequency (One-time, Daily, Weekly, Monthly, Quarterly, Annually)
 3. A compliance score (1-100) based on importance
 
 Indicators to analyze:
-{json.dumps(indicators, indent=2)}
+{indicators}
 
-Return a JSON array with the same structure but enriched with 'description', 'frequency', and 'score' fields.
+Return a JSON array with one object per indicator containing its 'id' and the enriched 'description', 'frequency', and 'score' fields.
 Only return valid JSON, no markdown formatting."""
 
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        # Clean up potential markdown formatting
-        if result_text.startswith('```'):
-            result_text = result_text.split('\n', 1)[1]
-            result_text = result_text.rsplit('```', 1)[0]
-        
-        return json.loads(result_text)
+        # Indicators without an ID (e.g. unsaved converter rows) are matched by position
+        refs = [{**ind, 'id': str(ind.get('id') or i)} for i, ind in enumerate(indicators)]
+        enriched = {}
+        for prompt in prompt_builder.build_prompts('analyze_checklist', refs, template):
+            for item in _parse_json(_generate(model, prompt)):
+                enriched[str(item.get('id', ''))] = item
+
+        result = []
+        for ref, ind in zip(refs, indicators):
+            item = enriched.get(ref['id'], {})
+            result.append({
+                **ind,
+                **{k: item[k] for k in ('description', 'frequency', 'score') if item.get(k) not in (None, '')},
+            })
+        return result
     except Exception as e:
         logger.error(f"Error in analyze_checklist: {e}")
-        return indicators
+        ai_metrics.record_fallback('error')
+        return indicators if allow_fallback else None
 
 
+@ai_metrics.instrumented(FLASH_MODEL)
 def analyze_categorization(indicators: List[Dict[str, Any]]) -> Dict[str, List[str]]:
     """
     Categorize indicators by AI manageability.
@@ -103,74 +167,72 @@ def analyze_categorization(indicators: List[Dict[str, Any]]) -> Dict[str, List[s
     Returns:
         Dictionary with three lists of indicator IDs
     """
-    model = get_flash_model()
-    
-    result = {
-        'ai_fully_manageable': [],
-        'ai_assisted': [],
-        'manual': []
-    }
+    labels = ['ai_fully_manageable', 'ai_assisted', 'manual']
+    result, pending = heuristics.prefilter(
+        heuristics.categorize, indicators, labels, heuristics.confidence_threshold()
+    )
+    ai_metrics.record_prefiltered(len(indicators) - len(pending))
+    if not pending:
+        return result
     
+    model = get_flash_model()
     if not model:
-        # Default categorization based on keywords
-        for ind in indicators:
-            indicator_text = (ind.get('indicator', '') + ' ' + ind.get('description', '')).lower()
-            ind_id = str(ind.get('id', ''))
-            
-            if any(kw in indicator_text for kw in ['document', 'sop', 'procedure', 'policy', 'record']):
-                result['ai_fully_manageable'].append(ind_id)
-            elif any(kw in indicator_text for kw in ['log', 'form', 'checklist', 'report']):
-                result['ai_assisted'].append(ind_id)
-            else:
-                result['manual'].append(ind_id)
-        return result
+        ai_metrics.record_fallback(_unavailable_reason())
+        # Default categorization based on keyword rules
+        return _merge_groups(result, heuristics.prefilter(heuristics.categorize, pending, labels, 0)[0])
     
     try:
-        prompt = f"""You are a compliance automation expert. Categorize these compliance indicators into three categories:
+        template = """You are a compliance automation expert. Categorize these compliance indicators into three categories:
 
 1. 'ai_fully_manageable': Tasks where AI can generate all required documentation (SOPs, policies, procedures)
 2. 'ai_assisted': Tasks where AI can help (forms, templates, reminders) but humans need to provide data
 3. 'manual': Tasks requiring physical action or human judgment
 
 Indicators:
-{json.dumps(indicators, indent=2)}
+{indicators}
 
 Return a JSON object with three arrays containing indicator IDs:
 {{"ai_fully_manageable": ["id1", ...], "ai_assisted": ["id2", ...], "manual": ["id3", ...]}}
 Only return valid JSON, no markdown."""
 
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        if result_text.startswith('```'):
-            result_text = result_text.split('\n', 1)[1]
-            result_text = result_text.rsplit('```', 1)[0]
-        
-        return json.loads(result_text)
+        categorized = {}
+        for prompt in prompt_builder.build_prompts('analyze_categorization', pending, template):
+            for category, ids in _parse_json(_generate(model, prompt)).items():
+                categorized.setdefault(category, []).extend(ids)
+        return _merge_groups(result, categorized)
     except Exception as e:
         logger.error(f"Error in analyze_categorization: {e}")
-        return result
+        ai_metrics.record_fallback('error')
+        return _merge_groups(result, heuristics.prefilter(heuristics.categorize, pending, labels, 0)[0])
 
 
+@ai_metrics.instrumented(FLASH_MODEL)
 def ask_assistant(query: str, indicators: Optional[List[Dict[str, Any]]] = None) -> str:
     """
     Get AI assistant response for compliance questions.
     
     Args:
         query: User's question
-        indicators: Optional context of current indicators
+        indicators: Optional context of current indicators; the most relevant
+            ones to the query are sent to the model
         
     Returns:
         AI assistant response
     """
     model = get_flash_model()
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         return "I'm sorry, but the AI assistant is not available at the moment. Please ensure the Gemini API key is configured correctly."
     
     try:
         context = ""
         if indicators:
-            context = f"\n\nCurrent project indicators for context:\n{json.dumps(indicators[:10], indent=2)}"
+            context = "\n\nCurrent project indicators for context:\n" + prompt_builder.build_prompts(
+                'ask_assistant',
+                retrieval.select_relevant(query, indicators, ASSISTANT_CONTEXT_INDICATORS),
+                '{indicators}',
+                max_prompts=1
+            )[0]
         
         prompt = f"""You are an expert compliance assistant for laboratory accreditation and MSDS compliance.
 You help lab directors, quality managers, and technicians understand and implement compliance requirements.
@@ -181,13 +243,14 @@ User question: {query}
 Provide a helpful, accurate, and practical response. If the question is about a specific compliance requirement,
 provide actionable steps. Format your response in a clear, readable manner."""
 
-        response = model.generate_content(prompt)
-        return response.text
+        return _generate(model, prompt)
     except Exception as e:
         logger.error(f"Error in ask_assistant: {e}")
+        ai_metrics.record_fallback('error')
         return "I encountered an error processing your request. Please try again later."
 
 
+@ai_metrics.instrumented(FLASH_MODEL)
 def generate_report_summary(indicators: List[Dict[str, Any]]) -> str:
     """
     Generate an AI-powered summary of compliance status.
@@ -215,16 +278,17 @@ def generate_report_summary(indicators: List[Dict[str, Any]]) -> str:
 - Not Started: {not_started} ({100*not_started//max(total,1)}%)"""
 
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         return basic_summary
     
     try:
-        prompt = f"""You are a compliance report analyst. Generate a professional executive summary for this compliance data:
+        template = """You are a compliance report analyst. Generate a professional executive summary for this compliance data:
 
 Indicators:
-{json.dumps(indicators, indent=2)}
+{indicators}
 
 Statistics:
-{basic_summary}
+{statistics}
 
 Provide:
 1. An executive summary paragraph
@@ -234,13 +298,17 @@ Provide:
 
 Format as a professional report summary."""
 
-        response = model.generate_content(prompt)
-        return response.text
+        prompt = prompt_builder.build_prompts(
+            'generate_report_summary', indicators, template, max_prompts=1, statistics=basic_summary
+        )[0]
+        return _generate(model, prompt)
     except Exception as e:
         logger.error(f"Error in generate_report_summary: {e}")
+        ai_metrics.record_fallback('error')
         return basic_summary
 
 
+@ai_metrics.instrumented(PRO_MODEL)
 def convert_document_to_csv(document_text: str) -> str:
     """
     Convert unstructured document text to CSV format.
@@ -253,6 +321,7 @@ def convert_document_to_csv(document_text: str) -> str:
     """
     model = get_pro_model()
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         # Return a basic template
         return "section,standard,indicator,description,score,frequency\nGeneral,GEN-001,Sample Indicator,Please configure AI to parse documents,10,One-time"
     
@@ -274,20 +343,14 @@ Rules:
 
 Return ONLY the CSV content with headers, no explanation."""
 
-        response = model.generate_content(prompt)
-        result = response.text.strip()
-        
-        # Clean up markdown if present
-        if result.startswith('```'):
-            result = result.split('\n', 1)[1]
-            result = result.rsplit('```', 1)[0]
-        
-        return result
+        return _strip_markdown(_generate(model, prompt))
     except Exception as e:
         logger.error(f"Error in convert_document_to_csv: {e}")
+        ai_metrics.record_fallback('error')
         return "section,standard,indicator,description,score,frequency\nError,ERR-001,Conversion Error,Failed to convert document. Please try again.,10,One-time"
 
 
+@ai_metrics.instrumented(PRO_MODEL)
 def generate_compliance_guide(indicator: Dict[str, Any]) -> str:
     """
     Generate a detailed compliance guide/SOP for an indicator.
@@ -331,13 +394,14 @@ def generate_compliance_guide(indicator: Dict[str, Any]) -> str:
 """
 
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         return basic_guide
     
     try:
         prompt = f"""You are a compliance documentation expert. Generate a comprehensive Standard Operating Procedure (SOP) for this compliance indicator:
 
 Indicator Details:
-{json.dumps(indicator, indent=2)}
+{prompt_builder.encode('generate_compliance_guide', [indicator])}
 
 Create a professional SOP document that includes:
 1. Title and Purpose
@@ -351,13 +415,14 @@ Create a professional SOP document that includes:
 
 Format as a professional document with clear sections."""
 
-        response = model.generate_content(prompt)
-        return response.text
+        return _generate(model, prompt)
     except Exception as e:
         logger.error(f"Error in generate_compliance_guide: {e}")
+        ai_metrics.record_fallback('error')
         return basic_guide
 
 
+@ai_metrics.instrumented(FLASH_MODEL)
 def analyze_tasks(indicators: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Analyze indicators and provide AI suggestions for actions.
@@ -394,13 +459,14 @@ def analyze_tasks(indicators: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         default_suggestions.append(suggestion)
     
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         return default_suggestions
     
     try:
-        prompt = f"""You are a compliance advisor. Analyze these indicators and provide specific actionable suggestions:
+        template = """You are a compliance advisor. Analyze these indicators and provide specific actionable suggestions:
 
 Indicators:
-{json.dumps(indicators, indent=2)}
+{indicators}
 
 For each indicator, provide:
 1. A specific, actionable suggestion
@@ -411,19 +477,17 @@ Return a JSON array with objects containing:
 
 Only return valid JSON."""
 
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        if result_text.startswith('```'):
-            result_text = result_text.split('\n', 1)[1]
-            result_text = result_text.rsplit('```', 1)[0]
-        
-        return json.loads(result_text)
+        suggestions = []
+        for prompt in prompt_builder.build_prompts('analyze_tasks', indicators, template):
+            suggestions.extend(_parse_json(_generate(model, prompt)))
+        return suggestions
     except Exception as e:
         logger.error(f"Error in analyze_tasks: {e}")
+        ai_metrics.record_fallback('error')
         return default_suggestions
 
 
+@ai_metrics.instrumented(PRO_MODEL)
 def analyze_indicator_explanations(indicators: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     """
     Analyze indicators and provide explanations along with required compliance evidence.
@@ -443,6 +507,7 @@ def analyze_indicator_explanations(indicators: List[Dict[str, Any]]) -> Dict[str
     
     # Default explanations if AI is not available
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         for ind in indicators:
             ind_id = str(ind.get('id', ''))
             result[ind_id] = {
@@ -453,7 +518,7 @@ def analyze_indicator_explanations(indicators: List[Dict[str, Any]]) -> Dict[str
         return result
     
     try:
-        prompt = f"""You are a compliance expert specializing in laboratory accreditation and MSDS compliance. 
+        template = """You are a compliance expert specializing in laboratory accreditation and MSDS compliance. 
 Analyze these compliance indicators and provide detailed explanations and evidence requirements.
 
 For each indicator, provide:
@@ -462,7 +527,7 @@ For each indicator, provide:
 3. A detailed description of what specific evidence is needed to demonstrate compliance
 
 Indicators to analyze:
-{json.dumps(indicators, indent=2)}
+{indicators}
 
 Return a JSON object where keys are indicator IDs (as strings) and values are objects with:
 {{
@@ -475,15 +540,9 @@ Evidence types available: document, image, certificate, note, link
 
 Only return valid JSON, no markdown formatting."""
 
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        # Clean up potential markdown formatting
-        if result_text.startswith('```'):
-            result_text = result_text.split('\n', 1)[1]
-            result_text = result_text.rsplit('```', 1)[0]
-        
-        parsed_result = json.loads(result_text)
+        parsed_result = {}
+        for prompt in prompt_builder.build_prompts('analyze_indicator_explanations', indicators, template):
+            parsed_result.update(_parse_json(_generate(model, prompt)))
         
         # Ensure all indicator IDs are included (handle cases where AI might miss some)
         for ind in indicators:
@@ -498,6 +557,7 @@ Only return valid JSON, no markdown formatting."""
         return parsed_result
     except Exception as e:
         logger.error(f"Error in analyze_indicator_explanations: {e}")
+        ai_metrics.record_fallback('error')
         # Return default explanations on error
         for ind in indicators:
             ind_id = str(ind.get('id', ''))
@@ -509,6 +569,7 @@ Only return valid JSON, no markdown formatting."""
         return result
 
 
+@ai_metrics.instrumented(FLASH_MODEL)
 def analyze_frequency_grouping(indicators: List[Dict[str, Any]]) -> Dict[str, List[str]]:
     """
     Analyze indicators and group them by compliance frequency.
@@ -525,43 +586,22 @@ def analyze_frequency_grouping(indicators: List[Dict[str, Any]]) -> Dict[str, Li
         - quarterly: Indicators requiring quarterly logs/checks
         - annually: Indicators requiring annual logs/checks
     """
-    model = get_flash_model()
-    
-    result = {
-        'one_time': [],
-        'daily': [],
-        'weekly': [],
-        'monthly': [],
-        'quarterly': [],
-        'annually': []
-    }
+    labels = ['one_time', 'daily', 'weekly', 'monthly', 'quarterly', 'annually']
+    result, pending = heuristics.prefilter(
+        heuristics.frequency_group, indicators, labels, heuristics.confidence_threshold()
+    )
+    ai_metrics.record_prefiltered(len(indicators) - len(pending))
+    if not pending:
+        return result
     
+    model = get_flash_model()
     if not model:
+        ai_metrics.record_fallback(_unavailable_reason())
         # Default grouping based on existing frequency field or keywords
-        for ind in indicators:
-            ind_id = str(ind.get('id', ''))
-            frequency = ind.get('frequency', '').lower() if ind.get('frequency') else ''
-            indicator_text = (ind.get('indicator', '') + ' ' + ind.get('description', '')).lower()
-            
-            if frequency == 'one-time' or 'one time' in frequency:
-                result['one_time'].append(ind_id)
-            elif frequency == 'daily' or 'daily' in indicator_text:
-                result['daily'].append(ind_id)
-            elif frequency == 'weekly' or 'weekly' in indicator_text:
-                result['weekly'].append(ind_id)
-            elif frequency == 'monthly' or 'monthly' in indicator_text:
-                result['monthly'].append(ind_id)
-            elif frequency == 'quarterly' or 'quarterly' in indicator_text:
-                result['quarterly'].append(ind_id)
-            elif frequency == 'annually' or 'annual' in frequency or 'annually' in indicator_text:
-                result['annually'].append(ind_id)
-            else:
-                # Default to one-time if unclear
-                result['one_time'].append(ind_id)
-        return result
+        return _merge_groups(result, heuristics.prefilter(heuristics.frequency_group, pending, labels, 0)[0])
     
     try:
-        prompt = f"""You are a compliance frequency analyst. Analyze these compliance indicators and categorize them by their compliance frequency.
+        template = """You are a compliance frequency analyst. Analyze these compliance indicators and categorize them by their compliance frequency.
 
 Compliance frequencies:
 - One-time: Requirements that need to be completed once (e.g., initial setup, one-time documentation)
@@ -572,7 +612,7 @@ Compliance frequencies:
 - Annually: Requirements that need annual logs or checks (e.g., annual certifications, yearly renewals)
 
 Indicators:
-{json.dumps(indicators, indent=2)}
+{indicators}
 
 For each indicator, determine its compliance frequency based on:
 1. The indicator text and description
@@ -591,17 +631,13 @@ Return a JSON object with six arrays containing indicator IDs:
 
 Only return valid JSON, no markdown formatting."""
 
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        if result_text.startswith('```'):
-            result_text = result_text.split('\n', 1)[1]
-            result_text = result_text.rsplit('```', 1)[0]
-        
-        parsed_result = json.loads(result_text)
+        parsed_result = {}
+        for prompt in prompt_builder.build_prompts('analyze_frequency_grouping', pending, template):
+            for group, ids in _parse_json(_generate(model, prompt)).items():
+                parsed_result.setdefault(group, []).extend(ids)
         
         # Ensure all indicator IDs are included
-        all_ids = {str(ind.get('id', '')) for ind in indicators}
+        all_ids = {str(ind.get('id', '')) for ind in pending}
         grouped_ids = set()
         for group in parsed_result.values():
             grouped_ids.update(group)
@@ -613,26 +649,9 @@ Only return valid JSON, no markdown formatting."""
                 parsed_result['one_time'] = []
             parsed_result['one_time'].extend(list(missing_ids))
         
-        return parsed_result
+        return _merge_groups(result, parsed_result)
     except Exception as e:
         logger.error(f"Error in analyze_frequency_grouping: {e}")
+        ai_metrics.record_fallback('error')
         # Return default grouping on error
-        for ind in indicators:
-            ind_id = str(ind.get('id', ''))
-            frequency = ind.get('frequency', '').lower() if ind.get('frequency') else ''
-            
-            if frequency == 'one-time' or 'one time' in frequency:
-                result['one_time'].append(ind_id)
-            elif frequency == 'daily':
-                result['daily'].append(ind_id)
-            elif frequency == 'weekly':
-                result['weekly'].append(ind_id)
-            elif frequency == 'monthly':
-                result['monthly'].append(ind_id)
-            elif frequency == 'quarterly':
-                result['quarterly'].append(ind_id)
-            elif frequency == 'annually' or 'annual' in frequency:
-                result['annually'].append(ind_id)
-            else:
-                result['one_time'].append(ind_id)
-        return result
+        return _merge_groups(result, heuristics.prefilter(heuristics.frequency_group, pending, labels, 0)[0])
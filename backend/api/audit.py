@@ -1,14 +1,32 @@
+"""
+Audit logging.
+
+``log_audit`` builds an ``AuditLog`` entry on the request thread and hands it
+to the process-wide ``AuditWriter`` once the surrounding transaction commits.
+With ``AUDIT_LOG_ASYNC`` enabled the writer buffers entries and a background
+thread sanitizes and ``bulk_create``s them in batches, so write requests no
+longer wait for the audit insert; the buffer is flushed on process exit.
+With it disabled (tests) entries are inserted inline, as before.
+"""
 from __future__ import annotations
 
+import atexit
 import datetime
 import decimal
+import logging
+import queue
+import threading
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
+from django.conf import settings
+from django.db import connections, transaction
 from django.utils import timezone
 
 from .models import AuditLog
 
+logger = logging.getLogger(__name__)
+
 SENSITIVE_KEYS = {
     "password",
     "token",
@@ -52,6 +70,126 @@ def extract_request_meta(request) -> Dict[str, Optional[str]]:
     return {"ip_address": ip, "user_agent": user_agent}
 
 
+def _sanitize_entry(entry: AuditLog) -> AuditLog:
+    entry.before = sanitize_payload(entry.before)
+    entry.after = sanitize_payload(entry.after)
+    entry.metadata = sanitize_payload(entry.metadata)
+    return entry
+
+
+class AuditWriter:
+    """
+    Buffers audit entries in process and writes them with ``bulk_create``.
+
+    ``submit`` only enqueues; a daemon thread started on first use flushes
+    every ``flush_interval`` seconds or as soon as ``batch_size`` entries are
+    waiting. When the buffer holds ``max_queue`` entries, ``submit`` writes
+    inline instead of dropping the entry.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 1.0, max_queue: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, entry: AuditLog) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Audit buffer full; writing entry inline")
+            self.write([entry])
+            return
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def write(self, entries: List[AuditLog]) -> None:
+        """Sanitize and insert ``entries`` on the calling thread"""
+        AuditLog.objects.bulk_create([_sanitize_entry(entry) for entry in entries], batch_size=self.batch_size)
+
+    def flush(self) -> int:
+        """Write every buffered entry; returns the number written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                try:
+                    self.write(batch)
+                    written += len(batch)
+                except Exception:
+                    logger.exception("Failed to write %d audit entries", len(batch))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and flush what is left"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                # stop() flushes the remainder on the calling thread
+                return
+            try:
+                self.flush()
+            finally:
+                # Connections are per thread; don't hold one open between batches
+                connections.close_all()
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> AuditWriter:
+    """The process-wide writer, created on first use and flushed at exit"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+                    max_queue=settings.AUDIT_LOG_MAX_QUEUE,
+                )
+                atexit.register(_writer.stop)
+    return _writer
+
+
+def flush_audit_log() -> int:
+    """Write buffered entries now (e.g. before reading the log back)"""
+    return get_writer().flush() if _writer is not None else 0
+
+
 def log_audit(
     *,
     actor,
@@ -63,18 +201,35 @@ def log_audit(
     after: Any = None,
     metadata: Optional[Dict[str, Any]] = None,
     request=None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
 ) -> AuditLog:
+    """
+    Record an audit entry; buffered entries are queued once the current
+    transaction commits, synchronous ones are inserted immediately.
+
+    Payloads are sanitized when the entry is written, so callers should pass
+    values they will not mutate afterwards. Work done outside the request
+    (e.g. background jobs) passes the request's ``ip_address`` and
+    ``user_agent`` saved earlier instead of ``request``.
+    """
     meta = extract_request_meta(request)
-    return AuditLog.objects.create(
+    entry = AuditLog(
         actor=actor,
         action=action,
         entity_type=entity_type,
         entity_id=str(entity_id),
         summary=summary,
-        ip_address=meta.get("ip_address"),
-        user_agent=meta.get("user_agent"),
-        before=sanitize_payload(before),
-        after=sanitize_payload(after),
-        metadata=sanitize_payload(metadata or {}),
+        ip_address=meta.get("ip_address") or ip_address,
+        user_agent=meta.get("user_agent") or user_agent,
+        before=before,
+        after=after,
+        metadata=metadata or {},
         timestamp=timezone.now(),
     )
+    if settings.AUDIT_LOG_ASYNC:
+        writer = get_writer()
+        transaction.on_commit(lambda: writer.submit(entry))
+    else:
+        _sanitize_entry(entry).save(force_insert=True)
+    return entry
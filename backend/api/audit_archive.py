@@ -0,0 +1,163 @@
+"""
+Audit log archival.
+
+Rows older than a cutoff are streamed, oldest first, into gzip-compressed
+JSONL files partitioned by month (``auditlog-YYYY-MM.<run>.jsonl.gz``) and
+deleted from the table in batches. Each batch is synced to disk before its
+rows are deleted, so an interrupted run loses nothing: the partial file is
+still readable and the remaining rows are picked up by the next run.
+
+``iter_archive`` reads archived rows back, skipping files whose month falls
+outside the requested time range.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+ARCHIVE_FIELDS = [
+    'id', 'timestamp', 'actor_id', 'action', 'entity_type', 'entity_id', 'summary',
+    'ip_address', 'user_agent', 'before', 'after', 'metadata',
+]
+
+_FILE_RE = re.compile(r'^auditlog-(\d{4})-(\d{2})\..+\.jsonl\.gz$')
+
+
+def _month(value: datetime) -> str:
+    return value.astimezone(dt_timezone.utc).strftime('%Y-%m')
+
+
+class ArchiveResult:
+    """Container for archival results."""
+    def __init__(self):
+        self.rows_archived = 0
+        self.files = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rows_archived': self.rows_archived,
+            'files': [str(path) for path in self.files],
+        }
+
+
+class _MonthWriter:
+    """Writes rows to one gzip file per month for a single archival run"""
+
+    def __init__(self, directory: Path, run_id: str, result: ArchiveResult):
+        self.directory = directory
+        self.run_id = run_id
+        self.result = result
+        self.month = None
+        self.handle = None
+        self.raw = None
+
+    def write(self, row: Dict[str, Any]):
+        month = _month(row['timestamp'])
+        if month != self.month:
+            self.close()
+            path = self.directory / f'auditlog-{month}.{self.run_id}.jsonl.gz'
+            self.raw = open(path, 'ab')
+            self.handle = gzip.GzipFile(fileobj=self.raw, mode='ab')
+            self.month = month
+            self.result.files.append(path)
+        self.handle.write(json.dumps(row, cls=DjangoJSONEncoder).encode('utf-8') + b'\n')
+
+    def sync(self):
+        """Make everything written so far durable"""
+        if self.handle is not None:
+            self.handle.flush(zlib.Z_SYNC_FLUSH)
+            self.raw.flush()
+            os.fsync(self.raw.fileno())
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.raw.close()
+            self.handle = self.raw = None
+
+
+def archive_before(cutoff: datetime, directory, batch_size: int = 1000, progress=None) -> ArchiveResult:
+    """
+    Move audit rows with ``timestamp < cutoff`` into compressed archives.
+
+    ``progress`` is called with the number of rows archived after each batch.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    result = ArchiveResult()
+    writer = _MonthWriter(directory, timezone.now().strftime('%Y%m%dT%H%M%S'), result)
+    queryset = AuditLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)
+
+    try:
+        while True:
+            rows = list(queryset[:batch_size])
+            if not rows:
+                break
+            for row in rows:
+                writer.write(row)
+            writer.sync()
+            with transaction.atomic():
+                AuditLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            result.rows_archived += len(rows)
+            if progress:
+                progress(result.rows_archived)
+    finally:
+        writer.close()
+    return result
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        try:
+            yield from handle
+        except EOFError:
+            # File of an interrupted run: everything before the last sync is intact
+            return
+
+
+def iter_archive(directory, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 entity_type: Optional[str] = None, entity_id: Optional[str] = None,
+                 actor_id: Optional[int] = None, action: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Archived rows matching the filters, oldest month first; ``timestamp`` is a datetime"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+    lo = _month(since) if since else None
+    hi = _month(until) if until else None
+
+    for path in sorted(directory.iterdir()):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            continue
+        month = f'{match.group(1)}-{match.group(2)}'
+        if (lo and month < lo) or (hi and month > hi):
+            continue
+        for line in _read_lines(path):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if entity_type is not None and row['entity_type'] != entity_type:
+                continue
+            if entity_id is not None and row['entity_id'] != str(entity_id):
+                continue
+            if actor_id is not None and row['actor_id'] != actor_id:
+                continue
+            if action is not None and row['action'] != action:
+                continue
+            row['timestamp'] = parse_datetime(row['timestamp'])
+            if (since and row['timestamp'] < since) or (until and row['timestamp'] >= until):
+                continue
+            yield row
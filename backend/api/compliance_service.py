@@ -0,0 +1,209 @@
+"""
+Compliance Service for per-period evaluation of frequency-based indicators.
+
+``is_period_met`` is the single rule for a period of a recurring indicator:
+its accepted evidence reaches the period's ``expected_evidence_count`` (one
+unless an EvidencePeriod says otherwise), or a user signed it off with a
+compliant FrequencyLog. ``period_service`` applies the same rule when it
+materializes EvidencePeriod rows, and ``current_period_met`` (used by
+``Indicator.get_evidence_state`` and, in aggregate form, ``stats_service``)
+checks the current period with it, so all of them always agree.
+
+Accepted evidence for many indicators is loaded with one query and binned
+into period indexes with each indicator's recurrence rule; expected counts
+and sign-offs take one query each, so a whole project is evaluated in four
+queries.
+"""
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.utils import timezone
+
+from . import scheduling_service
+from .models import Evidence, EvidencePeriod, EvidenceReviewState, FrequencyLog, Indicator, IndicatorEvidenceType
+
+COMPLIANT = 'compliant'
+DUE = 'due'
+OVERDUE = 'overdue'
+
+# Default evaluation window when no start date is given
+DEFAULT_LOOKBACK_DAYS = 365
+
+# Note recorded on FrequencyLog rows created from evidence rather than submitted by a user
+MATERIALIZED_NOTE = 'Materialized from accepted evidence'
+
+
+def is_sign_off(notes: str, is_compliant: bool) -> bool:
+    """True for a FrequencyLog a user submitted as compliant (not one materialized from evidence)"""
+    return is_compliant and notes != MATERIALIZED_NOTE
+
+
+def is_period_met(accepted: int, expected: int = 1, signed_off: bool = False) -> bool:
+    """Whether one period of a recurring indicator is compliant"""
+    return signed_off or accepted >= max(expected, 1)
+
+
+def current_period_met(indicator, today: Optional[date] = None) -> Optional[bool]:
+    """
+    ``is_period_met`` for the period of ``indicator`` containing ``today``.
+
+    None if the indicator has no recurring frequency. Three queries.
+    """
+    rule = scheduling_service.get_rule(indicator.frequency)
+    if rule is None:
+        return None
+    start, end = rule.period_for(today or timezone.localdate())
+    accepted = Evidence.objects.filter(
+        indicator=indicator, review_state=EvidenceReviewState.ACCEPTED, date_uploaded__date__range=(start, end)
+    ).count()
+    expected = EvidencePeriod.objects.filter(indicator=indicator, period_start=start).values_list(
+        'expected_evidence_count', flat=True
+    ).first()
+    signed_off = any(
+        is_sign_off(notes, compliant) for notes, compliant in FrequencyLog.objects.filter(
+            indicator=indicator, period_start=start, is_compliant=True
+        ).values_list('notes', 'is_compliant')
+    )
+    return is_period_met(accepted, expected or 1, signed_off)
+
+
+class PeriodCompliance:
+    """Per-period compliance of one indicator as of a given day."""
+    def __init__(self, indicator_id, frequency: str, current_period: tuple, current_met: bool,
+                 previous_met: Optional[bool], missed_periods: int, evaluated_periods: int, streak: int,
+                 last_evidence_date: Optional[date]):
+        self.indicator_id = indicator_id
+        self.frequency = frequency
+        self.current_period = current_period
+        self.current_met = current_met
+        self.missed_periods = missed_periods
+        self.evaluated_periods = evaluated_periods
+        self.streak = streak
+        self.last_evidence_date = last_evidence_date
+        if current_met:
+            self.status = COMPLIANT
+        elif previous_met is False:
+            self.status = OVERDUE
+        else:
+            self.status = DUE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'indicator_id': str(self.indicator_id),
+            'frequency': self.frequency,
+            'status': self.status,
+            'current_period_start': self.current_period[0],
+            'current_period_end': self.current_period[1],
+            'current_period_met': self.current_met,
+            'missed_periods': self.missed_periods,
+            'evaluated_periods': self.evaluated_periods,
+            'streak': self.streak,
+            'last_evidence_date': self.last_evidence_date,
+        }
+
+
+def accepted_evidence_dates(indicator_ids: Iterable, since: date) -> Dict[Any, List[date]]:
+    """Upload dates of accepted evidence per indicator since ``since``, in one query"""
+    dates: Dict[Any, List[date]] = defaultdict(list)
+    uploads = Evidence.objects.filter(
+        indicator_id__in=list(indicator_ids),
+        review_state=EvidenceReviewState.ACCEPTED,
+        date_uploaded__date__gte=since,
+    ).values_list('indicator_id', 'date_uploaded')
+    for indicator_id, uploaded in uploads:
+        dates[indicator_id].append(timezone.localtime(uploaded).date())
+    return dates
+
+
+def signed_off_periods(indicator_ids: Iterable, since: date) -> Dict[Any, Set[date]]:
+    """Start dates of the periods users signed off since ``since``, per indicator, in one query"""
+    starts: Dict[Any, Set[date]] = defaultdict(set)
+    logs = FrequencyLog.objects.filter(
+        indicator_id__in=list(indicator_ids), period_start__gte=since, is_compliant=True
+    ).values_list('indicator_id', 'period_start', 'notes', 'is_compliant')
+    for indicator_id, start, notes, compliant in logs:
+        if is_sign_off(notes, compliant):
+            starts[indicator_id].add(start)
+    return starts
+
+
+def expected_counts(indicator_ids: Iterable, since: date) -> Dict[Tuple[Any, date], int]:
+    """Materialized ``expected_evidence_count`` per ``(indicator_id, period_start)``, in one query"""
+    return {
+        (indicator_id, start): expected
+        for indicator_id, start, expected in EvidencePeriod.objects.filter(
+            indicator_id__in=list(indicator_ids), period_start__gte=since
+        ).exclude(expected_evidence_count=1).values_list('indicator_id', 'period_start', 'expected_evidence_count')
+    }
+
+
+def _evaluate_one(indicator_id, frequency: str, met: Set[int], first_index: int, current_index: int,
+                  rule, last_evidence_date: Optional[date]) -> PeriodCompliance:
+    completed = range(first_index, current_index)
+    missed = sum(1 for index in completed if index not in met)
+
+    streak = 1 if current_index in met else 0
+    index = current_index - 1
+    while index >= first_index and index in met:
+        streak += 1
+        index -= 1
+
+    previous_met = (current_index - 1 in met) if current_index > first_index else None
+    return PeriodCompliance(
+        indicator_id, frequency, rule.period_bounds(current_index), current_index in met,
+        previous_met, missed, len(completed) + 1, streak, last_evidence_date,
+    )
+
+
+def evaluate(indicators: Iterable[Dict[str, Any]], today: Optional[date] = None,
+             since: Optional[date] = None) -> Dict[Any, PeriodCompliance]:
+    """
+    Evaluate many indicators (dicts with ``id`` and ``frequency``) at once.
+
+    Periods from the one containing ``since`` up to the one containing
+    ``today`` are evaluated. Indicators without a recurring frequency are
+    skipped.
+    """
+    today = today or timezone.localdate()
+    since = since or today - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+
+    rules = {}
+    for ind in indicators:
+        rule = scheduling_service.get_rule(ind.get('frequency'))
+        if rule is not None:
+            rules[ind['id']] = (ind['frequency'], rule)
+    if not rules:
+        return {}
+
+    # Evidence older than the first evaluated period cannot count towards any period
+    earliest = min(rule.period_for(since)[0] for _, rule in rules.values())
+    dates = accepted_evidence_dates(rules, earliest)
+    signed_off = signed_off_periods(rules, earliest)
+    expected = expected_counts(rules, earliest)
+
+    results = {}
+    for indicator_id, (frequency, rule) in rules.items():
+        uploads = dates.get(indicator_id, [])
+        accepted = Counter(rule.period_indexes(uploads))
+        signed = {rule.period_index(start) for start in signed_off.get(indicator_id, ())}
+        met = {
+            index for index in set(accepted) | signed
+            if is_period_met(
+                accepted[index], expected.get((indicator_id, rule.period_bounds(index)[0]), 1), index in signed
+            )
+        }
+        results[indicator_id] = _evaluate_one(
+            indicator_id, frequency, met, rule.period_index(since), rule.period_index(today), rule,
+            max(uploads) if uploads else None,
+        )
+    return results
+
+
+def evaluate_project(project_id, today: Optional[date] = None,
+                     since: Optional[date] = None) -> Dict[Any, PeriodCompliance]:
+    """Evaluate every frequency-based indicator of a project"""
+    indicators = Indicator.objects.filter(
+        project_id=project_id, evidence_type=IndicatorEvidenceType.FREQUENCY
+    ).values('id', 'frequency')
+    return evaluate(indicators, today=today, since=since)
@@ -0,0 +1,71 @@
+"""
+CSV export of project indicators.
+
+Rows use the import column layout (``csv_parsing.COLUMNS``), so an exported
+file re-imports through ``CSVImportService`` without changes. Indicators are
+read with ``.iterator()`` (a server-side cursor where the database supports
+it) and each row is encoded as it is produced, so memory use does not grow
+with the size of the project.
+"""
+import csv
+from typing import Iterator, List, Optional, Tuple
+
+from .csv_parsing import COLUMNS
+from .models import Indicator, Project
+
+EVIDENCE_PREFIX = 'Evidence Required: '
+
+# PHC checklist layout first; Description last as the template has no such column
+HEADERS = [COLUMNS[key] for key in (
+    'section', 'standard', 'indicator', 'evidence_required', 'responsible_person',
+    'frequency', 'assigned_to', 'compliance_evidence', 'score', 'description',
+)]
+
+FIELDS = [
+    'section', 'standard', 'indicator', 'description', 'responsible_person',
+    'frequency', 'assignee', 'notes', 'score',
+]
+
+ITERATOR_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object for ``csv.writer`` that returns what is written"""
+    def write(self, value):
+        return value
+
+
+def split_description(description: Optional[str]) -> Tuple[str, str]:
+    """Inverse of the import's description: ``(Description, Evidence Required)``"""
+    description = description or ''
+    if description.startswith(EVIDENCE_PREFIX):
+        return '', description[len(EVIDENCE_PREFIX):]
+    head, separator, evidence = description.rpartition('\n\n' + EVIDENCE_PREFIX)
+    if separator:
+        return head, evidence
+    return description, ''
+
+
+def iter_rows(project: Project) -> Iterator[List]:
+    """Header row, then one row per indicator of ``project``"""
+    yield HEADERS
+    indicators = (
+        Indicator.objects.filter(project=project)
+        .order_by('section', 'standard', 'indicator')
+        .values_list(*FIELDS)
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    for section, standard, indicator, description, responsible, frequency, assignee, notes, score in indicators:
+        description, evidence_required = split_description(description)
+        yield [
+            section, standard, indicator, evidence_required, responsible or '',
+            frequency or '', assignee or '', notes or '', score, description,
+        ]
+
+
+def stream_csv(project: Project) -> Iterator[str]:
+    """CSV text of ``project``'s indicators, one line at a time, starting with a BOM for spreadsheets"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'
+    for row in iter_rows(project):
+        yield writer.writerow(row)
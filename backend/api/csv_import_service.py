@@ -1,14 +1,27 @@
 """
 CSV Import Service for bulk indicator imports (Ported).
+
+Uploads are streamed: file chunks are decoded incrementally, parsed row by
+row and written in fixed-size batches, so memory use does not grow with the
+size of the file.
+
+Rows are parsed by the shared pipeline in ``csv_parsing`` and compared with
+the stored indicators before writing; only new and changed rows are
+written, and a dry run reports the diff without writing.
 """
 import csv
-import io
-import hashlib
-from typing import Dict, List, Any
+from contextlib import nullcontext
+from itertools import islice
+from typing import Dict, Iterable, List, Any, Optional, Sequence
 from django.db import transaction
 from django.contrib.auth.models import User
+from .csv_parsing import (  # noqa: F401 - re-exported for existing callers
+    CHUNK_SIZE, DEFAULT_FIXUPS, REQUIRED_HEADERS, Fixup, Record, batched, iter_chunks, iter_lines,
+    parse_rows, validate_headers,
+)
 from .models import Project, Indicator
 
+
 class CSVImportResult:
     """Container for import results."""
     def __init__(self):
@@ -16,10 +29,12 @@ class CSVImportResult:
         self.standards_created = 0 # Tracked but virtually
         self.indicators_created = 0
         self.indicators_updated = 0
+        self.indicators_unchanged = 0
         self.rows_skipped = 0
         self.errors = []
         self.unmatched_users = []
-        self.indicators_processed = []
+        # Per-row changes, collected on dry runs only
+        self.diff = []
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -27,20 +42,45 @@ class CSVImportResult:
             'standards_created': self.standards_created,
             'indicators_created': self.indicators_created,
             'indicators_updated': self.indicators_updated,
+            'indicators_unchanged': self.indicators_unchanged,
             'rows_skipped': self.rows_skipped,
-            'total_rows_processed': self.indicators_created + self.indicators_updated + self.rows_skipped,
+            'total_rows_processed': (
+                self.indicators_created + self.indicators_updated + self.indicators_unchanged + self.rows_skipped
+            ),
             'errors': self.errors,
             'unmatched_users': list(set(self.unmatched_users)),
+            'diff': self.diff,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CSVImportResult':
+        """Restore counts saved with ``to_dict`` (e.g. to resume an import job)"""
+        result = cls()
+        for field in ('sections_created', 'standards_created', 'indicators_created',
+                      'indicators_updated', 'indicators_unchanged', 'rows_skipped'):
+            setattr(result, field, data.get(field, 0))
+        result.errors = list(data.get('errors', []))
+        result.unmatched_users = list(data.get('unmatched_users', []))
+        return result
+
+    @property
+    def failed(self) -> bool:
+        """True if the file as a whole could not be imported (row 0 errors)"""
+        return any(error['row'] == 0 for error in self.errors)
+
+    def to_audit_dict(self, max_items: int = 20) -> Dict[str, Any]:
+        """Counts plus the first ``max_items`` errors/users, for the audit log"""
+        summary = self.to_dict()
+        summary['error_count'] = len(self.errors)
+        summary['errors'] = self.errors[:max_items]
+        summary['unmatched_users'] = summary['unmatched_users'][:max_items]
+        del summary['diff']
+        return summary
+
 class CSVImportService:
     """Service for importing indicators from CSV files."""
     
-    REQUIRED_HEADERS = [
-        'Section',
-        'Standard',
-        'Indicator',
-    ]
+    REQUIRED_HEADERS = REQUIRED_HEADERS
     # Optional but recommended
     OPTIONAL_HEADERS = [
         'Evidence Required',
@@ -50,31 +90,66 @@ class CSVImportService:
         'Compliance Evidence',
         'Score'
     ]
+    # Fields overwritten when an imported row matches an existing indicator_key
+    UPDATE_FIELDS = [
+        'section', 'standard', 'indicator', 'description', 'responsible_person',
+        'frequency', 'assignee', 'notes', 'score', 'form_schema',
+    ]
+    BATCH_SIZE = 1000
 
-    def __init__(self, project: Project):
+    def __init__(self, project: Project, dry_run: bool = False, fixups: Optional[Sequence[Fixup]] = None):
         self.project = project
+        self.dry_run = dry_run
+        self.fixups = DEFAULT_FIXUPS if fixups is None else fixups
         self.result = CSVImportResult()
+        # Dry runs write nothing, so later batches compare against the values planned so far
+        self._planned = {}
+
+    def import_csv(self, csv_file, user=None, progress=None, skip_rows: int = 0,
+                   checkpoint=None) -> CSVImportResult:
+        """
+        Import a CSV upload, streaming it in ``BATCH_SIZE`` row batches.
+
+        With ``dry_run`` nothing is written; the result's ``diff`` lists every
+        row that would be created or updated with its changed fields.
+
+        ``progress`` is called after each batch with the number of data rows
+        read and the number of bytes consumed so far. Without ``checkpoint``
+        the whole import is one transaction. With it, every batch commits on
+        its own and ``checkpoint`` is called with the same arguments inside
+        the batch's transaction, so a recorded position always matches the
+        committed rows; ``skip_rows`` resumes after that many data rows.
+        """
+        bytes_read = 0
+
+        def counted(chunks):
+            nonlocal bytes_read
+            for chunk in chunks:
+                bytes_read += len(chunk)
+                yield chunk
 
-    def import_csv(self, csv_file, user=None) -> CSVImportResult:
         try:
-            # Read and decode CSV file
-            csv_content = csv_file.read()
-            if isinstance(csv_content, bytes):
-                csv_content = csv_content.decode('utf-8-sig') # Handle BOM
-            
-            csv_reader = csv.DictReader(io.StringIO(csv_content))
+            csv_reader = csv.DictReader(iter_lines(counted(iter_chunks(csv_file))))
             
             # Basic validation
-            if not self._validate_headers(csv_reader.fieldnames):
+            if not validate_headers(csv_reader.fieldnames):
                 self.result.errors.append({
                     'row': 0,
                     'error': f'Invalid CSV headers. Required: {", ".join(self.REQUIRED_HEADERS)}'
                 })
                 return self.result
 
-            with transaction.atomic():
-                for row_num, row in enumerate(csv_reader, start=2):
-                    self._process_row(row, row_num)
+            rows_read = skip_rows
+            records = parse_rows(islice(enumerate(csv_reader, start=2), skip_rows, None), self.fixups)
+            with transaction.atomic() if checkpoint is None else nullcontext():
+                for batch in batched(records, self.BATCH_SIZE):
+                    with transaction.atomic() if checkpoint is not None else nullcontext():
+                        self.import_records(batch)
+                        rows_read += len(batch)
+                        if checkpoint:
+                            checkpoint(rows_read, bytes_read)
+                    if progress:
+                        progress(rows_read, bytes_read)
             
             return self.result
             
@@ -85,60 +160,95 @@ class CSVImportService:
             })
             return self.result
 
-    def _validate_headers(self, headers: List[str]) -> bool:
-        if not headers: return False
-        # Flexible matching? For now strict on required
-        return all(h in headers for h in self.REQUIRED_HEADERS)
-
-    def _process_row(self, row: Dict[str, str], row_num: int):
-        section_name = row.get('Section', '').strip()
-        standard_name = row.get('Standard', '').strip()
-        indicator_text = row.get('Indicator', '').strip()
-        
-        if not section_name or not standard_name or not indicator_text:
+    def import_records(self, records: Iterable[Record]):
+        """Write one batch of parsed ``(row_num, fields)`` records (see ``csv_parsing``)"""
+        indicators = {}
+        for row_num, fields in records:
+            indicator = self._build_indicator(fields, row_num)
+            if indicator is None:
+                continue
+            previous = indicators.get(indicator.indicator_key)
+            if previous is not None:
+                # Repeated row: the last occurrence wins, as with per-row upserts
+                if self._changes(previous, indicator):
+                    self.result.indicators_updated += 1
+                else:
+                    self.result.indicators_unchanged += 1
+            indicator._row_num = row_num
+            indicators[indicator.indicator_key] = indicator
+        self._write(list(indicators.values()))
+
+    def _build_indicator(self, fields: Optional[Dict[str, Any]], row_num: int):
+        """Unsaved Indicator for a parsed row (with its ``indicator_key``), or None if skipped"""
+        if fields is None:
             self.result.rows_skipped += 1
-            return
+            self.result.errors.append({'row': row_num, 'error': 'Missing Section, Standard or Indicator'})
+            return None
 
-        # Generate Key
         indicator_key = Indicator.generate_indicator_key_static(
-            self.project.id, section_name, standard_name, indicator_text
+            self.project.id, fields['section'], fields['standard'], fields['indicator']
         )
+        return Indicator(indicator_key=indicator_key, project=self.project, **fields)
 
-        # Prepare defaults
-        description = row.get('Description', '')
-        evidence_required = row.get('Evidence Required', '')
-        if evidence_required:
-            if description:
-                description += f"\n\nEvidence Required: {evidence_required}"
-            else:
-                description = f"Evidence Required: {evidence_required}"
-
-        # Upsert
-        indicator, created = Indicator.objects.update_or_create(
-            indicator_key=indicator_key,
-            defaults={
-                'project': self.project,
-                'section': section_name,
-                'standard': standard_name,
-                'indicator': indicator_text,
-                'description': description,
-                'responsible_person': row.get('Responsible Person', ''),
-                'frequency': row.get('Frequency', ''),
-                'assignee': row.get('Assigned to', ''),
-                'notes': row.get('Compliance Evidence', ''),
-                'score': self._parse_score(row.get('Score')),
-            }
-        )
+    def _changes(self, old, new) -> Dict[str, Dict[str, Any]]:
+        """``{field: {'old': ..., 'new': ...}}`` for UPDATE_FIELDS that differ (None and '' are equal)"""
+        changes = {}
+        for field in self.UPDATE_FIELDS:
+            old_value = getattr(old, field)
+            new_value = getattr(new, field)
+            if (old_value if old_value is not None else '') != (new_value if new_value is not None else ''):
+                changes[field] = {'old': old_value, 'new': new_value}
+        return changes
 
-        if created:
-            self.result.indicators_created += 1
-        else:
-            self.result.indicators_updated += 1
-        
-        self.result.indicators_processed.append(indicator)
+    def _write(self, indicators: List[Indicator]):
+        """
+        Upsert one batch by ``indicator_key``.
 
-    def _parse_score(self, val):
-        try:
-            return int(val)
-        except:
-            return 10
+        The stored rows are fetched in one query and compared field by field;
+        only new and changed indicators are written, in one bulk statement.
+        """
+        if not indicators:
+            return
+        existing = {
+            ind.indicator_key: ind
+            for ind in Indicator.objects.filter(indicator_key__in=[ind.indicator_key for ind in indicators])
+            .only('indicator_key', *self.UPDATE_FIELDS)
+        }
+        if self.dry_run:
+            existing.update(
+                (ind.indicator_key, self._planned[ind.indicator_key])
+                for ind in indicators if ind.indicator_key in self._planned
+            )
+
+        to_write = []
+        for ind in indicators:
+            old = existing.get(ind.indicator_key)
+            if old is None:
+                self.result.indicators_created += 1
+                changes = {field: {'old': None, 'new': getattr(ind, field)} for field in self.UPDATE_FIELDS}
+                action = 'create'
+            else:
+                changes = self._changes(old, ind)
+                if not changes:
+                    self.result.indicators_unchanged += 1
+                    continue
+                self.result.indicators_updated += 1
+                action = 'update'
+            to_write.append(ind)
+            if self.dry_run:
+                self.result.diff.append({
+                    'row': ind._row_num,
+                    'indicator_key': ind.indicator_key,
+                    'action': action,
+                    'changes': changes,
+                })
+
+        if self.dry_run:
+            self._planned.update((ind.indicator_key, ind) for ind in to_write)
+        elif to_write:
+            Indicator.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=['indicator_key'],
+                update_fields=self.UPDATE_FIELDS,
+            )
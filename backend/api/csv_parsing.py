@@ -0,0 +1,239 @@
+"""
+Shared parsing pipeline for indicator checklist CSVs.
+
+Used by both the API import (``CSVImportService``) and the ``import_phc_csv``
+command. A raw ``csv.DictReader`` row is cleaned into canonical keys, passed
+through the row fixups in order (each takes and returns the cleaned dict, so
+new source quirks are handled by adding a function), checked for the
+required columns and turned into Indicator field values.
+
+API imports apply no fixups (``DEFAULT_FIXUPS``). ``import_phc_csv`` applies
+``PHC_FIXUPS`` for the quirks of the PHC checklist files: its AAC rows are
+repaired and indicators without a Description are described by their own
+text, so the keys and descriptions it writes stay as they always were.
+
+``parse_file`` parses a whole file with no database access, so the command
+can run it in worker processes.
+"""
+import codecs
+import csv
+import re
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from . import scheduling_service
+from .models import Frequency, Indicator
+
+CHUNK_SIZE = 64 * 1024
+
+REQUIRED_HEADERS = ['Section', 'Standard', 'Indicator']
+
+# Canonical row key -> CSV header
+COLUMNS = {
+    'section': 'Section',
+    'standard': 'Standard',
+    'indicator': 'Indicator',
+    'description': 'Description',
+    'evidence_required': 'Evidence Required',
+    'responsible_person': 'Responsible Person',
+    'frequency': 'Frequency',
+    'assigned_to': 'Assigned to',
+    'compliance_evidence': 'Compliance Evidence',
+    'score': 'Score',
+}
+
+DEFAULT_SCORE = 10
+FREQUENCY_MAX_LENGTH = Indicator._meta.get_field('frequency').max_length
+
+_FREQ_CANON = {
+    'one time': Frequency.ONE_TIME,
+    'one-time': Frequency.ONE_TIME,
+    'onetime': Frequency.ONE_TIME,
+    'daily': Frequency.DAILY,
+    'weekly': Frequency.WEEKLY,
+    'monthly': Frequency.MONTHLY,
+    'quarterly': Frequency.QUARTERLY,
+    'annually': Frequency.ANNUALLY,
+    'annual': Frequency.ANNUALLY,
+    'yearly': Frequency.ANNUALLY,
+}
+
+Fixup = Callable[[Dict[str, str]], Dict[str, str]]
+# (row number, Indicator field values or None if the row is skipped)
+Record = Tuple[int, Optional[Dict[str, Any]]]
+
+
+def iter_chunks(fileobj, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """Chunks of an uploaded file (``.chunks()``) or any object with ``read()``"""
+    if hasattr(fileobj, 'chunks'):
+        yield from fileobj.chunks(chunk_size)
+        return
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_lines(chunks: Iterable, encoding: str = 'utf-8-sig') -> Iterator[str]:
+    """
+    Decode byte chunks incrementally and yield lines with their endings.
+
+    A BOM is dropped and multi-byte characters split across chunks are
+    reassembled. Lines are split on ``\\n`` only and keep their endings, so
+    ``csv`` still reassembles quoted fields that span lines.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def clean(value: Optional[str]) -> str:
+    return (value or '').strip()
+
+
+def parse_int(value: Optional[str], default: int) -> int:
+    value = clean(value)
+    if not value:
+        return default
+    try:
+        return int(float(value))
+    except ValueError:
+        return default
+
+
+def parse_frequency(raw: Optional[str]) -> Optional[str]:
+    """
+    Canonical frequency, or None if blank.
+
+    One-time spellings and every spelling the scheduler recognises map to
+    their canonical name (a Frequency choice, or e.g. ``Bi-weekly`` and
+    ``Semi-annually``, which have recurrence rules but no choice). Other
+    values are kept as written, cut to the column length.
+    """
+    raw = clean(raw)
+    if not raw:
+        return None
+    canonical = _FREQ_CANON.get(re.sub(r'\s+', ' ', raw.lower()))
+    if canonical:
+        return canonical
+    rule = scheduling_service.get_rule(raw)
+    if rule is not None:
+        return rule.name
+    return raw[:FREQUENCY_MAX_LENGTH]
+
+
+def build_form_schema(evidence_required: str) -> Optional[List[Dict[str, Any]]]:
+    """Basic text parameters split from "Evidence Required" on ``;``, newlines and full stops"""
+    if not evidence_required:
+        return None
+    schema = []
+    for part in re.split(r'[;\n\.]', evidence_required):
+        part = part.strip()
+        if len(part) > 5:
+            schema.append({
+                'name': re.sub(r'[^a-zA-Z0-9_]', '_', part[:30]).lower(),
+                'label': part,
+                'type': 'text',
+                'required': False,
+            })
+    return schema
+
+
+def fix_aac_shift(row: Dict[str, str]) -> Dict[str, str]:
+    """
+    Repair rows of the "Access, Assessment and Continuity of Care (AAC)" section.
+
+    The unquoted comma in the section name shifts the columns: Section reads
+    "Access", Standard holds the rest of the name and Indicator holds
+    "<standard>. <indicator>", which is split at the first full stop.
+    """
+    if row['section'] == 'Access' and row['standard'].startswith('Assessment and Continuity of Care (AAC)'):
+        row['section'] = 'Access, Assessment and Continuity of Care (AAC)'
+        parts = row['indicator'].split('.', 1)
+        if len(parts) == 2:
+            row['standard'] = parts[0].strip() + '.'
+            row['indicator'] = parts[1].strip()
+        else:
+            row['standard'] = row['indicator']
+    return row
+
+
+def fill_phc_description(row: Dict[str, str]) -> Dict[str, str]:
+    """PHC checklists have no Description column: describe the indicator with its own text"""
+    if not row['description']:
+        row['description'] = row['indicator']
+    return row
+
+
+DEFAULT_FIXUPS: Sequence[Fixup] = ()
+PHC_FIXUPS: Sequence[Fixup] = (fix_aac_shift, fill_phc_description)
+
+
+def validate_headers(headers: Optional[Sequence[str]]) -> bool:
+    return bool(headers) and all(h in headers for h in REQUIRED_HEADERS)
+
+
+def parse_row(raw: Dict[str, Optional[str]], fixups: Sequence[Fixup] = DEFAULT_FIXUPS) -> Optional[Dict[str, Any]]:
+    """Indicator field values for a CSV row, or None if Section, Standard or Indicator is missing"""
+    row = {key: clean(raw.get(header)) for key, header in COLUMNS.items()}
+    for fixup in fixups:
+        row = fixup(row)
+
+    if not (row['section'] and row['standard'] and row['indicator']):
+        return None
+
+    description = row['description']
+    if row['evidence_required']:
+        evidence = f"Evidence Required: {row['evidence_required']}"
+        description = f'{description}\n\n{evidence}' if description else evidence
+
+    return {
+        'section': row['section'],
+        'standard': row['standard'],
+        'indicator': row['indicator'],
+        'description': description,
+        'responsible_person': row['responsible_person'] or None,
+        'frequency': parse_frequency(row['frequency']),
+        'assignee': row['assigned_to'] or None,
+        'notes': row['compliance_evidence'] or None,
+        'score': parse_int(row['score'], DEFAULT_SCORE),
+        'form_schema': build_form_schema(row['evidence_required']),
+    }
+
+
+def parse_rows(rows: Iterable[Tuple[int, Dict[str, Optional[str]]]],
+               fixups: Sequence[Fixup] = DEFAULT_FIXUPS) -> Iterator[Record]:
+    for row_num, raw in rows:
+        yield row_num, parse_row(raw, fixups)
+
+
+def parse_file(path, fixups: Sequence[Fixup] = DEFAULT_FIXUPS) -> Tuple[Optional[str], List[Record]]:
+    """
+    Parse a whole CSV file: ``(error, records)``.
+
+    ``error`` is set (and ``records`` empty) if the required headers are
+    missing. Rows are numbered from 2, the header being row 1.
+    """
+    with open(path, 'rb') as f:
+        reader = csv.DictReader(iter_lines(iter_chunks(f)))
+        if not validate_headers(reader.fieldnames):
+            return f'Invalid CSV headers. Required: {", ".join(REQUIRED_HEADERS)}', []
+        return None, list(parse_rows(enumerate(reader, start=2), fixups))
@@ -0,0 +1,149 @@
+"""
+Compiled keyword rules for indicator categorization and frequency grouping.
+
+Each rule set compiles all of its keyword patterns into one alternation regex
+with a named group per rule, anchored at word starts, so classifying an
+indicator is a single regex pass over its lower-cased text. A classification
+carries a confidence score in [0, 1]: unambiguous hits on strong keywords score
+high, competing or weak hits score low, and no hit at all scores 0.
+
+``ai_services`` runs these rules first on every categorization and frequency
+grouping request; only indicators below ``AI_HEURISTIC_CONFIDENCE`` are sent
+to the model. When the model is unavailable the rule labels are used as-is.
+"""
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+from django.conf import settings
+
+
+class Rule(NamedTuple):
+    """A lower-case pattern matched from the start of a word"""
+    label: str
+    pattern: str
+    weight: float = 1.0
+
+
+class Classification(NamedTuple):
+    label: str
+    confidence: float
+
+
+class RuleSet:
+    """
+    A set of weighted keyword rules compiled into one regex.
+
+    The label with hits that comes first in ``labels`` wins, matching the
+    precedence of the original if/elif keyword chains. Confidence is the
+    winning label's weight (capped at 1) times its share of all matched weight.
+    """
+
+    def __init__(self, labels: Sequence[str], default_label: str, rules: Sequence[Rule]):
+        self.labels = tuple(labels)
+        self.default_label = default_label
+        self.rules = tuple(rules)
+        self._priority = {label: i for i, label in enumerate(self.labels)}
+        self._regex = re.compile(
+            r'\b(?:' + '|'.join(f'(?P<r{i}>{rule.pattern})' for i, rule in enumerate(self.rules)) + ')'
+        )
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Matched weight per label; each rule counts once however often it matches"""
+        matched = {int(m.lastgroup[1:]) for m in self._regex.finditer(text.lower())}
+        scores: Dict[str, float] = {}
+        for i in matched:
+            rule = self.rules[i]
+            scores[rule.label] = scores.get(rule.label, 0.0) + rule.weight
+        return scores
+
+    def classify(self, text: str) -> Classification:
+        scores = self.scores(text)
+        if not scores:
+            return Classification(self.default_label, 0.0)
+        label = min(scores, key=self._priority.__getitem__)
+        confidence = min(scores[label], 1.0) * scores[label] / sum(scores.values())
+        return Classification(label, round(confidence, 3))
+
+
+def _text(indicator: Dict[str, Any]) -> str:
+    return f"{indicator.get('indicator') or ''} {indicator.get('description') or ''}"
+
+
+CATEGORIZATION_RULES = RuleSet(
+    labels=['ai_fully_manageable', 'ai_assisted', 'manual'],
+    default_label='manual',
+    rules=[
+        Rule('ai_fully_manageable', r'sops?\b'),
+        Rule('ai_fully_manageable', r'polic(?:y|ies)\b'),
+        Rule('ai_fully_manageable', r'procedures?\b'),
+        Rule('ai_fully_manageable', r'document(?:s|ed|ation)?\b', 0.8),
+        Rule('ai_fully_manageable', r'record(?:s|ed)?\b', 0.6),
+        Rule('ai_assisted', r'log(?:s|ged|book|books)?\b'),
+        Rule('ai_assisted', r'forms?\b', 0.8),
+        Rule('ai_assisted', r'checklists?\b'),
+        Rule('ai_assisted', r'report(?:s|ed|ing)?\b', 0.6),
+        Rule('manual', r'(?:equipped|installed|displayed|available|physical(?:ly)?|premises|sign ?board)\b', 0.6),
+        Rule('manual', r'(?:inspect(?:ion|ed)?|calibrat(?:e|ed|ion)|maintain(?:ed)?|clean(?:ed|ing)?)\b', 0.4),
+    ]
+)
+
+FREQUENCY_RULES = RuleSet(
+    labels=['one_time', 'daily', 'weekly', 'monthly', 'quarterly', 'annually'],
+    default_label='one_time',
+    rules=[
+        Rule('one_time', r'(?:one[- ]?time|once(?! (?:a|per|every) ))\b'),
+        Rule('daily', r'(?:daily|(?:every|each|per) (?:day|shift))\b'),
+        Rule('weekly', r'(?:weekly|(?:every|each|per) week)\b'),
+        Rule('monthly', r'(?:monthly|(?:every|each|per) month)\b'),
+        Rule('quarterly', r'(?:quarterly|every (?:three|3) months|(?:every|each|per) quarter)\b'),
+        Rule('annually', r'(?:annual(?:ly)?|yearly|(?:every|each|per) year|once a year)\b'),
+    ]
+)
+
+# Confidence given to a frequency inferred from free text rather than the frequency field
+TEXT_FREQUENCY_CONFIDENCE = 0.7
+
+
+def categorize(indicator: Dict[str, Any]) -> Classification:
+    """Categorize an indicator by AI manageability from its text"""
+    return CATEGORIZATION_RULES.classify(_text(indicator))
+
+
+def frequency_group(indicator: Dict[str, Any]) -> Classification:
+    """
+    Group an indicator by compliance frequency.
+
+    A recognised ``frequency`` field is authoritative; otherwise frequency
+    words in the indicator text give a lower-confidence guess.
+    """
+    frequency = indicator.get('frequency') or ''
+    if frequency:
+        from_field = FREQUENCY_RULES.classify(frequency)
+        if from_field.confidence:
+            return Classification(from_field.label, 1.0)
+    from_text = FREQUENCY_RULES.classify(_text(indicator))
+    return Classification(from_text.label, round(from_text.confidence * TEXT_FREQUENCY_CONFIDENCE, 3))
+
+
+def confidence_threshold() -> float:
+    return getattr(settings, 'AI_HEURISTIC_CONFIDENCE', 0.8)
+
+
+def prefilter(classify: Callable[[Dict[str, Any]], Classification], indicators: Sequence[Dict[str, Any]],
+              labels: Sequence[str], threshold: float) -> Tuple[Dict[str, List[str]], List[Dict[str, Any]]]:
+    """
+    Split indicators into rule-decided groups and ones left for the model.
+
+    Returns ``(groups, pending)`` where ``groups`` maps every label to the IDs
+    classified with at least ``threshold`` confidence, in input order, and
+    ``pending`` holds the remaining indicators.
+    """
+    groups: Dict[str, List[str]] = {label: [] for label in labels}
+    pending = []
+    for indicator in indicators:
+        label, confidence = classify(indicator)
+        if confidence >= threshold:
+            groups[label].append(str(indicator.get('id', '')))
+        else:
+            pending.append(indicator)
+    return groups, pending
@@ -0,0 +1,179 @@
+"""
+Background CSV import jobs.
+
+An upload is saved to default storage and recorded as an ``ImportJob``; the
+import then runs on a small in-process thread pool. Every batch commits
+together with the job's checkpoint (rows processed and counts so far), so a
+job that fails or whose worker dies can be resumed from the last committed
+batch with ``resume_job`` or the ``resume_import_jobs`` command.
+
+With ``IMPORT_JOBS_ASYNC`` disabled (tests) jobs run inline.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .csv_import_service import CSVImportResult, CSVImportService
+from .models import ImportJob, ImportJobStatus, Project
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMPORT_JOB_WORKERS, thread_name_prefix='import-job'
+                )
+    return _executor
+
+
+def create_job(project, uploaded_file, user=None, request=None) -> ImportJob:
+    """Store an uploaded CSV and queue an import job for it (``request`` is kept for the audit entry)"""
+    from .audit import extract_request_meta
+    job = ImportJob(
+        project=project, created_by=user, file_name=uploaded_file.name, total_bytes=uploaded_file.size,
+        **extract_request_meta(request),
+    )
+    job.file_path = default_storage.save(f'imports/{project.id}/{job.id}.csv', uploaded_file)
+    job.save()
+    enqueue(job.id)
+    return job
+
+
+def enqueue(job_id):
+    """Run a job on the worker pool once the current transaction commits, or inline in sync mode"""
+    if settings.IMPORT_JOBS_ASYNC:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job_id))
+    else:
+        run_job(job_id)
+
+
+def _run_in_worker(job_id):
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception("Import job %s crashed", job_id)
+    finally:
+        connections.close_all()
+
+
+def _save_checkpoint(job: ImportJob, result: CSVImportResult, rows: int, bytes_read: int):
+    job.rows_processed = rows
+    job.bytes_processed = bytes_read
+    job.result = result.to_dict()
+    job.save(update_fields=['rows_processed', 'bytes_processed', 'result', 'updated_at'])
+
+
+def run_job(job_id) -> Optional[ImportJob]:
+    """
+    Run (or resume) a queued or failed job from its checkpoint.
+
+    Returns None if another worker already claimed the job.
+    """
+    claimed = ImportJob.objects.filter(
+        id=job_id, status__in=[ImportJobStatus.QUEUED, ImportJobStatus.FAILED]
+    ).update(status=ImportJobStatus.RUNNING, started_at=timezone.now(), error='', updated_at=timezone.now())
+    if not claimed:
+        return None
+    job = ImportJob.objects.select_related('project', 'created_by').get(id=job_id)
+
+    service = CSVImportService(job.project)
+    # Row 0 errors belong to the previous attempt; counts and row errors carry over
+    service.result = CSVImportResult.from_dict(job.result)
+    service.result.errors = [error for error in service.result.errors if error['row'] != 0]
+    job.result = service.result.to_dict()
+    try:
+        with default_storage.open(job.file_path, 'rb') as csv_file:
+            result = service.import_csv(
+                csv_file,
+                skip_rows=job.rows_processed,
+                checkpoint=lambda rows, read: _save_checkpoint(job, service.result, rows, read),
+            )
+    except Exception as e:
+        # e.g. the stored file is missing
+        result = service.result
+        result.errors.append({'row': 0, 'error': f'Failed to process CSV file: {str(e)}'})
+
+    job.finished_at = timezone.now()
+    if result.failed:
+        fatal = [error for error in result.errors if error['row'] == 0]
+        # Keep the counts of the last checkpoint: the failed batch was rolled back and is redone on resume
+        result = CSVImportResult.from_dict(job.result)
+        result.errors += fatal
+        job.status = ImportJobStatus.FAILED
+        job.error = fatal[0]['error']
+    else:
+        job.status = ImportJobStatus.COMPLETED
+    job.result = result.to_dict()
+    job.save(update_fields=['result', 'finished_at', 'status', 'error', 'updated_at'])
+
+    from . import retrieval
+    # Bulk writes bypass the post_save re-indexing signals
+    retrieval.invalidate_project(job.project_id)
+    Project.bump_version(job.project_id)
+
+    if job.status == ImportJobStatus.COMPLETED:
+        from .audit import log_audit
+        from .models import AuditAction
+        log_audit(
+            actor=job.created_by,
+            action=AuditAction.IMPORT,
+            entity_type='Project',
+            entity_id=job.project_id,
+            summary=f"Imported indicators CSV. Created: {result.indicators_created}, Updated: {result.indicators_updated}",
+            metadata={**result.to_audit_dict(), 'job_id': str(job.id)},
+            ip_address=job.ip_address,
+            user_agent=job.user_agent,
+        )
+        default_storage.delete(job.file_path)
+    return job
+
+
+def resume_job(job_id) -> Optional[ImportJob]:
+    """
+    Queue a failed or queued job again; it continues after its last checkpoint.
+
+    A queued job may have been lost with its worker pool (e.g. a gunicorn
+    restart); enqueuing it again is safe as ``run_job`` claims it only once.
+    """
+    updated = ImportJob.objects.filter(
+        id=job_id, status__in=[ImportJobStatus.FAILED, ImportJobStatus.QUEUED]
+    ).update(status=ImportJobStatus.QUEUED, updated_at=timezone.now())
+    if not updated:
+        return None
+    enqueue(job_id)
+    return ImportJob.objects.get(id=job_id)
+
+
+def mark_stalled(older_than: timedelta) -> List:
+    """
+    Mark jobs untouched for ``older_than`` as failed; returns their IDs.
+
+    Running jobs without a checkpoint lost their worker mid-import; queued
+    jobs were lost with the pool before they started.
+    """
+    cutoff = timezone.now() - older_than
+    job_ids = []
+    for job_status, error in (
+        (ImportJobStatus.RUNNING, 'Worker stopped before the import finished'),
+        (ImportJobStatus.QUEUED, 'Worker stopped before the import started'),
+    ):
+        stalled = list(
+            ImportJob.objects.filter(status=job_status, updated_at__lt=cutoff).values_list('id', flat=True)
+        )
+        ImportJob.objects.filter(id__in=stalled, status=job_status).update(status=ImportJobStatus.FAILED, error=error)
+        job_ids += stalled
+    return job_ids
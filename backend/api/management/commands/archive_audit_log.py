@@ -0,0 +1,91 @@
+"""
+Move old audit log rows into compressed monthly JSONL archives.
+
+Rows older than the cutoff are written to
+``<output-dir>/auditlog-YYYY-MM.<run>.jsonl.gz`` and deleted in batches.
+Safe to re-run: each batch is on disk before its rows are deleted.
+
+Usage:
+  python manage.py archive_audit_log --older-than-days 365
+  python manage.py archive_audit_log --before 2025-01-01 --output-dir /backups/audit
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import audit_archive
+from api.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = "Archive audit log rows older than a cutoff to compressed JSONL and delete them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=str,
+            default="",
+            help="Archive rows logged before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Archive rows older than this many days (default: AUDIT_LOG_RETENTION_DAYS)",
+        )
+        parser.add_argument(
+            "--output-dir",
+            type=str,
+            default="",
+            help="Archive directory (default: AUDIT_LOG_ARCHIVE_DIR)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written and deleted per batch",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be archived",
+        )
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                cutoff_date = date.fromisoformat(options["before"])
+            except ValueError:
+                raise CommandError(f"Invalid --before date: {options['before']}")
+            cutoff = timezone.make_aware(datetime.combine(cutoff_date, time.min))
+        else:
+            days = options["older_than_days"]
+            if days is None:
+                days = settings.AUDIT_LOG_RETENTION_DAYS
+            if days < 0:
+                raise CommandError("--older-than-days must be >= 0")
+            cutoff = timezone.now() - timedelta(days=days)
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1")
+
+        if options["dry_run"]:
+            count = AuditLog.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(f"{count} audit rows older than {cutoff.isoformat()} would be archived")
+            return
+
+        output_dir = options["output_dir"] or settings.AUDIT_LOG_ARCHIVE_DIR
+        self.stdout.write(f"Archiving audit rows older than {cutoff.isoformat()} to {output_dir}")
+        result = audit_archive.archive_before(
+            cutoff,
+            output_dir,
+            batch_size=options["batch_size"],
+            progress=lambda n: self.stdout.write(f"  {n} rows archived"),
+        )
+        for path in result.files:
+            self.stdout.write(f"  wrote {path}")
+        self.stdout.write(self.style.SUCCESS(f"Archive complete. rows_archived={result.rows_archived}"))
@@ -3,118 +3,45 @@ Import PHC checklist CSV into the database as a Project + Indicators.
 
 Designed for demo/audit runs on a VPS (idempotent-ish, tolerant parsing).
 
+Rows go through the same parsing pipeline and batched writer as the API
+import (``api.csv_parsing`` / ``CSVImportService``), plus the PHC row fixups
+(``PHC_FIXUPS``). A single file is
+streamed with a progress bar. Given a directory, every ``*.csv`` in it is
+imported into the project: files are parsed in a process pool and written in
+batches as they come back, so a full standards catalogue is one command.
+
 Usage:
   python manage.py import_phc_csv /path/to/Final\ PHC\ list.csv --project-name "PHC Demo"
+  python manage.py import_phc_csv /path/to/standards/ --project-name "PHC Demo" --jobs 4
 """
 
 from __future__ import annotations
 
 import csv
-import re
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Tuple
 
+import django
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+from tqdm import tqdm
 
-from api.models import Evidence, EvidenceType, Frequency, Indicator, Project
-
-
-def _clean(s: Optional[str]) -> str:
-    return (s or "").strip()
-
-
-def _parse_int(s: str, default: int) -> int:
-    s = _clean(s)
-    if not s:
-        return default
-    try:
-        return int(float(s))
-    except ValueError:
-        return default
-
-
-_FREQ_CANON = {
-    "one time": Frequency.ONE_TIME,
-    "one-time": Frequency.ONE_TIME,
-    "onetime": Frequency.ONE_TIME,
-    "daily": Frequency.DAILY,
-    "weekly": Frequency.WEEKLY,
-    "monthly": Frequency.MONTHLY,
-    "quarterly": Frequency.QUARTERLY,
-    "annually": Frequency.ANNUALLY,
-    "annual": Frequency.ANNUALLY,
-    "yearly": Frequency.ANNUALLY,
-}
-
-
-def _parse_frequency(raw: str) -> Optional[str]:
-    raw = _clean(raw)
-    if not raw:
-        return None
-    key = re.sub(r"\s+", " ", raw.lower()).strip()
-    return _FREQ_CANON.get(key)
-
-
-def _get_cols(row: dict) -> Tuple[str, str, str, str, str, str, str, str, str]:
-    """
-    Returns:
-      section, standard, indicator, evidence_required, responsible_person,
-      frequency, assigned_to, compliance_evidence, score
-    """
-    # The provided file uses these exact headers:
-    # Section,Standard,Indicator,Evidence Required,Responsible Person,Frequency,Assigned to,Compliance Evidence,Score
-    
-    # Handle shifting columns due to "Access, Assessment and Continuity of Care (AAC)"
-    # If the CSV DictReader sees 'Access' as Section, it might put the rest in other columns.
-    section = _clean(row.get("Section"))
-    standard = _clean(row.get("Standard"))
-    indicator = _clean(row.get("Indicator"))
-    evidence_required = _clean(row.get("Evidence Required"))
-    responsible_person = _clean(row.get("Responsible Person"))
-    frequency = _clean(row.get("Frequency"))
-    assigned_to = _clean(row.get("Assigned to"))
-    compliance_evidence = _clean(row.get("Compliance Evidence"))
-    score = _clean(row.get("Score"))
-
-    # FIX for "Access, Assessment and Continuity of Care (AAC)" shift
-    if section == "Access" and standard.strip().startswith("Assessment and Continuity of Care (AAC)"):
-        # Shift everything back!
-        section = "Access, Assessment and Continuity of Care (AAC)"
-        # Indicator becomes Standard? Wait, let's look at the data.
-        # Original Row: Access, Assessment and Continuity... (AAC), Laboratory services...
-        # DictReader: Section='Access', Standard=' Assessment...', Indicator='Laboratory services...'
-        # So we want: Section='Access...', Standard='Laboratory services...', Indicator=next_col
-        # But wait, in the CSV row 98, there is NO next_col after 'Laboratory services...'.
-        # This implies 'Laboratory services...' was supposed to be the Standard AND the Indicator?
-        # Or maybe it was Standard='Laboratory services are easily accessible.' and Indicator='The laboratory’s location is easily accessible.'
-        # Let's check for dots.
-        parts = indicator.split('.', 1)
-        if len(parts) == 2:
-            standard = parts[0].strip() + "."
-            indicator = parts[1].strip()
-        else:
-            standard = indicator
-            indicator = indicator # Fallback
-            
-    return (
-        section,
-        standard,
-        indicator,
-        evidence_required,
-        responsible_person,
-        frequency,
-        assigned_to,
-        compliance_evidence,
-        score,
-    )
+from api import retrieval
+from api.csv_import_service import CSVImportService
+from api.csv_parsing import (
+    PHC_FIXUPS, REQUIRED_HEADERS, batched, iter_chunks, iter_lines, parse_file, parse_rows, validate_headers
+)
+from api.models import Evidence, EvidenceType, Indicator, Project
 
 
 class Command(BaseCommand):
     help = "Import PHC checklist CSV as a demo Project + Indicators"
 
     def add_arguments(self, parser):
-        parser.add_argument("csv_path", type=str, help="Path to PHC checklist CSV")
+        parser.add_argument("csv_path", type=str, help="Path to PHC checklist CSV, or a directory of CSV files")
         parser.add_argument(
             "--project-name",
             type=str,
@@ -131,13 +58,30 @@ class Command(BaseCommand):
             "--limit",
             type=int,
             default=0,
-            help="Import only first N data rows (0 = no limit)",
+            help="Import only first N data rows, across all files (0 = no limit)",
         )
         parser.add_argument(
             "--dry-run",
             action="store_true",
             help="Parse and report counts without writing to the DB",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows processed per batch",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=0,
+            help="Worker processes for parsing a directory of files (0 = one per CPU)",
+        )
+        parser.add_argument(
+            "--no-progress",
+            action="store_true",
+            help="Do not show a progress bar",
+        )
         parser.add_argument(
             "--create-evidence-notes",
             action="store_true",
@@ -151,159 +95,137 @@ class Command(BaseCommand):
 
         project_name = options["project_name"]
         project_description = options["project_description"]
-        limit = int(options["limit"] or 0)
+        self.limit = int(options["limit"] or 0)
         dry_run = bool(options["dry_run"])
-        create_evidence_notes = bool(options["create_evidence_notes"])
-
-        self.stdout.write(f"Reading CSV: {csv_path}")
+        self.create_evidence_notes = bool(options["create_evidence_notes"])
+        self.show_progress = not options["no_progress"]
 
-        created = 0
-        updated = 0
-        skipped = 0
-        evidence_notes = 0
+        self.batch_size = int(options["batch_size"])
+        if self.batch_size < 1:
+            raise CommandError("--batch-size must be >= 1")
+        jobs = int(options["jobs"] or os.cpu_count() or 1)
 
-        with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            required_headers = {"Section", "Standard", "Indicator"}
-            if not reader.fieldnames or not required_headers.issubset(set(reader.fieldnames)):
-                raise CommandError(
-                    f"CSV headers missing. Expected at least {sorted(required_headers)}; got {reader.fieldnames}"
-                )
-
-            rows = list(reader)
-            if limit > 0:
-                rows = rows[:limit]
-
-        self.stdout.write(f"Parsed {len(rows)} data rows")
+        files = sorted(csv_path.glob("*.csv")) if csv_path.is_dir() else None
+        if files == []:
+            raise CommandError(f"No .csv files in {csv_path}")
 
         if dry_run:
-            self.stdout.write(self.style.WARNING("Dry run: no DB writes performed"))
-            return
+            # Nothing is written: compare against the existing project, if any
+            project = Project.objects.filter(name=project_name).first() or Project(name=project_name)
+        self.rows_read = 0
+        self.evidence_notes = 0
 
         with transaction.atomic():
-            project, _ = Project.objects.get_or_create(
-                name=project_name, defaults={"description": project_description}
-            )
-            if project.description != project_description:
-                project.description = project_description
-                project.save(update_fields=["description"])
-
-            for idx, row in enumerate(rows, start=1):
-                (
-                    section,
-                    standard,
-                    indicator_text,
-                    evidence_required,
-                    responsible_person,
-                    frequency_raw,
-                    assigned_to,
-                    compliance_evidence,
-                    score_raw,
-                ) = _get_cols(row)
-
-                if not (section and standard and indicator_text):
-                    skipped += 1
-                    continue
-
-                frequency = _parse_frequency(frequency_raw)
-                score = _parse_int(score_raw, default=10)
-
-                description_parts = []
-                if indicator_text:
-                    description_parts.append(indicator_text)
-                if evidence_required:
-                    description_parts.append(f"Evidence Required: {evidence_required}")
-                description = "\n\n".join(description_parts)
-
-                # Map "Evidence Required" to a basic form schema (Parameters) if requested
-                form_schema = None
-                if evidence_required:
-                    # Very basic split by newline or semicolon if present
-                    potential_params = re.split(r'[;\n\.]', evidence_required)
-                    form_schema = []
-                    for p in potential_params:
-                        p = p.strip()
-                        if p and len(p) > 5:
-                            form_schema.append({
-                                "name": re.sub(r'[^a-zA-Z0-9_]', '_', p[:30]).lower(),
-                                "label": p,
-                                "type": "text",
-                                "required": False
-                            })
-
-                notes_parts = []
-                # Keep original text fields around for easy audit/review
-                if compliance_evidence and not create_evidence_notes:
-                    notes_parts.append(f"Compliance Evidence: {compliance_evidence}")
-                notes = "\n".join(notes_parts) or None
-
-                obj, was_created = Indicator.objects.get_or_create(
-                    project=project,
-                    section=section,
-                    standard=standard,
-                    indicator=indicator_text,
-                    defaults={
-                        "description": description,
-                        "score": score,
-                        "responsible_person": responsible_person or None,
-                        "frequency": frequency,
-                        "assignee": assigned_to or None,
-                        "notes": notes,
-                        "form_schema": form_schema,
-                    },
+            if not dry_run:
+                project, _ = Project.objects.get_or_create(
+                    name=project_name, defaults={"description": project_description}
                 )
-
-                if was_created:
-                    created += 1
-                else:
-                    # Update selected fields if new data is present
-                    changed_fields = []
-                    if description and obj.description != description:
-                        obj.description = description
-                        changed_fields.append("description")
-                    if score_raw and obj.score != score:
-                        obj.score = score
-                        changed_fields.append("score")
-                    if responsible_person and obj.responsible_person != responsible_person:
-                        obj.responsible_person = responsible_person
-                        changed_fields.append("responsible_person")
-                    if frequency and obj.frequency != frequency:
-                        obj.frequency = frequency
-                        changed_fields.append("frequency")
-                    if assigned_to and obj.assignee != assigned_to:
-                        obj.assignee = assigned_to
-                        changed_fields.append("assignee")
-                    if notes and obj.notes != notes:
-                        obj.notes = notes
-                        changed_fields.append("notes")
-                    if form_schema and obj.form_schema != form_schema:
-                        obj.form_schema = form_schema
-                        changed_fields.append("form_schema")
-                    if changed_fields:
-                        obj.save(update_fields=changed_fields)
-                        updated += 1
-
-                if create_evidence_notes and compliance_evidence:
-                    # Create one note per row; idempotency via a simple "same content" check
-                    content = f"Imported compliance evidence (row {idx}):\n{compliance_evidence}"
-                    exists = Evidence.objects.filter(
-                        indicator=obj,
-                        type=EvidenceType.NOTE,
-                        content=content,
-                    ).exists()
-                    if not exists:
-                        Evidence.objects.create(
-                            indicator=obj,
-                            type=EvidenceType.NOTE,
-                            file_name="Imported evidence note",
-                            content=content,
-                        )
-                        evidence_notes += 1
-
+                if project.description != project_description:
+                    project.description = project_description
+                    project.save(update_fields=["description"])
+
+            self.service = CSVImportService(project, dry_run=dry_run)
+            if files is None:
+                self.stdout.write(f"Reading CSV: {csv_path}")
+                self._import_file(csv_path)
+            else:
+                self.stdout.write(f"Reading {len(files)} CSV files from {csv_path}")
+                self._import_directory(files, jobs)
+
+        if not dry_run:
+            # Bulk writes bypass the post_save re-indexing signals
+            retrieval.invalidate_project(project.id)
+            Project.bump_version(project.id)
+
+        result = self.service.result
+        self.stdout.write(f"Parsed {self.rows_read} data rows")
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Dry run: no DB writes performed"))
         self.stdout.write(
             self.style.SUCCESS(
-                f"Import complete. Project='{project_name}'. created={created} updated={updated} skipped={skipped} evidence_notes={evidence_notes}"
+                f"Import complete. Project='{project_name}'. created={result.indicators_created} "
+                f"updated={result.indicators_updated} unchanged={result.indicators_unchanged} "
+                f"skipped={result.rows_skipped} evidence_notes={self.evidence_notes}"
             )
         )
 
-
+    def _import_file(self, csv_path: Path):
+        with csv_path.open("rb") as f, tqdm(
+            total=csv_path.stat().st_size,
+            unit="B",
+            unit_scale=True,
+            desc="Importing",
+            disable=not self.show_progress,
+            file=self.stderr,
+        ) as bar:
+
+            def chunks():
+                for chunk in iter_chunks(f):
+                    bar.update(len(chunk))
+                    yield chunk
+
+            reader = csv.DictReader(iter_lines(chunks()))
+            if not validate_headers(reader.fieldnames):
+                raise CommandError(
+                    f"CSV headers missing. Expected at least {REQUIRED_HEADERS}; got {reader.fieldnames}"
+                )
+            self._write(parse_rows(enumerate(reader, start=2), PHC_FIXUPS))
+
+    def _import_directory(self, files, jobs: int):
+        parse = partial(parse_file, fixups=PHC_FIXUPS)
+        if jobs > 1:
+            # Workers only parse; django.setup() makes the model enums importable under any start method
+            pool = ProcessPoolExecutor(max_workers=min(jobs, len(files)), initializer=django.setup)
+            parsed = pool.map(parse, files)
+        else:
+            pool = None
+            parsed = map(parse, files)
+        try:
+            with tqdm(total=len(files), unit="file", desc="Importing",
+                      disable=not self.show_progress, file=self.stderr) as bar:
+                for path, (error, records) in zip(files, parsed):
+                    bar.update(1)
+                    if error:
+                        self.stderr.write(self.style.WARNING(f"Skipping {path.name}: {error}"))
+                        continue
+                    if self.limit and self.rows_read >= self.limit:
+                        break
+                    self._write(records)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    def _write(self, records):
+        """Write parsed records in batches, honouring --limit across files"""
+        if self.limit:
+            records = islice(records, self.limit - self.rows_read)
+        for batch in batched(records, self.batch_size):
+            self.rows_read += len(batch)
+            self.service.import_records(batch)
+            if self.create_evidence_notes and not self.service.dry_run:
+                self.evidence_notes += self._create_evidence_notes(batch)
+
+    def _create_evidence_notes(self, batch) -> int:
+        """One note Evidence per row with "Compliance Evidence"; rows whose note already exists are skipped"""
+        project = self.service.project
+        contents = {}
+        for row_num, fields in batch:
+            if fields and fields["notes"]:
+                key = Indicator.generate_indicator_key_static(
+                    project.id, fields["section"], fields["standard"], fields["indicator"]
+                )
+                contents[key] = f"Imported compliance evidence (row {row_num}):\n{fields['notes']}"
+        if not contents:
+            return 0
+        ids = dict(Indicator.objects.filter(indicator_key__in=contents).values_list("indicator_key", "id"))
+        existing = set(
+            Evidence.objects.filter(indicator_id__in=ids.values(), type=EvidenceType.NOTE)
+            .values_list("indicator_id", "content")
+        )
+        notes = [
+            Evidence(indicator_id=ids[key], type=EvidenceType.NOTE, file_name="Imported evidence note", content=content)
+            for key, content in contents.items()
+            if key in ids and (ids[key], content) not in existing
+        ]
+        Evidence.objects.bulk_create(notes)
+        return len(notes)
@@ -0,0 +1,88 @@
+"""
+Materialize EvidencePeriod / FrequencyLog rows for recurring indicators.
+
+Idempotent and safe to run from cron: missing periods are inserted with
+bulk_create(ignore_conflicts=True), counts and due dates are only written when
+they change, and overlapping runs are skipped via a cache lock.
+
+The lock is a cache.add, so it only spans processes that share the cache
+(Redis or the database cache). With the local-memory cache each process has
+its own lock and two runs may overlap. That costs repeated work but not
+correctness, as every write above is idempotent.
+
+Usage:
+  python manage.py materialize_periods --since 2026-01-01 --horizon-days 30
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import period_service
+
+LOCK_KEY = "materialize_periods:lock"
+LOCK_TIMEOUT = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Generate missing evidence periods for recurring indicators and refresh their compliance"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=str,
+            default="",
+            help="First date to materialize periods for (YYYY-MM-DD, default: one year ago)",
+        )
+        parser.add_argument(
+            "--horizon-days",
+            type=int,
+            default=0,
+            help="Also create periods up to this many days after today",
+        )
+        parser.add_argument(
+            "--project",
+            type=str,
+            default="",
+            help="Only process indicators of this project ID",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Indicators processed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        try:
+            since = date.fromisoformat(options["since"]) if options["since"] else today - timedelta(days=365)
+        except ValueError:
+            raise CommandError(f"Invalid --since date: {options['since']}")
+        if options["horizon_days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--horizon-days must be >= 0 and --batch-size >= 1")
+        until = today + timedelta(days=options["horizon_days"])
+
+        if not cache.add(LOCK_KEY, True, LOCK_TIMEOUT):
+            self.stdout.write(self.style.WARNING("Another materialize_periods run is in progress; skipping"))
+            return
+
+        try:
+            self.stdout.write(f"Materializing periods from {since} to {until}")
+            result = period_service.materialize_periods(
+                since,
+                until,
+                project_id=options["project"] or None,
+                batch_size=options["batch_size"],
+                today=today,
+                progress=lambda n: self.stdout.write(f"  {n} indicators processed"),
+            )
+        finally:
+            cache.delete(LOCK_KEY)
+
+        summary = " ".join(f"{key}={value}" for key, value in result.to_dict().items())
+        self.stdout.write(self.style.SUCCESS(f"Materialization complete. {summary}"))
@@ -0,0 +1,61 @@
+"""
+Search archived audit log rows and print them as JSONL.
+
+Usage:
+  python manage.py query_audit_archive --entity-type Project --entity-id <uuid>
+  python manage.py query_audit_archive --since 2025-01-01 --until 2025-02-01 --actor 3
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from api import audit_archive
+
+
+class Command(BaseCommand):
+    help = "Query compressed audit log archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=str, default="", help="Rows logged on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--until", type=str, default="", help="Rows logged before this date (YYYY-MM-DD)")
+        parser.add_argument("--entity-type", type=str, default=None, help="Entity type, e.g. Project")
+        parser.add_argument("--entity-id", type=str, default=None, help="Entity ID")
+        parser.add_argument("--actor", type=int, default=None, help="Actor user ID")
+        parser.add_argument("--action", type=str, default=None, help="Audit action, e.g. IMPORT")
+        parser.add_argument(
+            "--archive-dir",
+            type=str,
+            default="",
+            help="Archive directory (default: AUDIT_LOG_ARCHIVE_DIR)",
+        )
+
+    def _parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return timezone.make_aware(datetime.combine(date.fromisoformat(value), time.min))
+        except ValueError:
+            raise CommandError(f"Invalid {option} date: {value}")
+
+    def handle(self, *args, **options):
+        rows = audit_archive.iter_archive(
+            options["archive_dir"] or settings.AUDIT_LOG_ARCHIVE_DIR,
+            since=self._parse_date(options["since"], "--since"),
+            until=self._parse_date(options["until"], "--until"),
+            entity_type=options["entity_type"],
+            entity_id=options["entity_id"],
+            actor_id=options["actor"],
+            action=options["action"],
+        )
+        count = 0
+        for row in rows:
+            self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder))
+            count += 1
+        self.stderr.write(f"{count} archived rows matched")
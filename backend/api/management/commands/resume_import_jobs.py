@@ -0,0 +1,58 @@
+"""
+Resume failed or stalled CSV import jobs from their last checkpoint.
+
+Jobs run inline in this process. A running job whose checkpoint has not moved
+for --stalled-minutes, or a queued job that has not started in that time, is
+assumed to have lost its worker (e.g. a gunicorn restart) and is resumed too.
+
+Usage:
+  python manage.py resume_import_jobs <job-id> [<job-id> ...]
+  python manage.py resume_import_jobs --stalled-minutes 15
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import import_jobs
+from api.models import ImportJob, ImportJobStatus
+
+
+class Command(BaseCommand):
+    help = "Resume failed or stalled CSV import jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=str, help="Failed or queued jobs to resume")
+        parser.add_argument(
+            "--stalled-minutes",
+            type=int,
+            default=0,
+            help="Also resume queued or running jobs without progress for this many minutes (0 = off)",
+        )
+
+    def handle(self, *args, **options):
+        job_ids = list(options["job_ids"])
+        if options["stalled_minutes"] < 0:
+            raise CommandError("--stalled-minutes must be >= 0")
+        if options["stalled_minutes"]:
+            stalled = import_jobs.mark_stalled(timedelta(minutes=options["stalled_minutes"]))
+            self.stdout.write(f"{len(stalled)} stalled jobs marked as failed")
+            job_ids += [str(job_id) for job_id in stalled]
+        if not job_ids:
+            raise CommandError("Give job IDs to resume or --stalled-minutes")
+
+        for job_id in job_ids:
+            if not ImportJob.objects.filter(
+                id=job_id, status__in=[ImportJobStatus.FAILED, ImportJobStatus.QUEUED]
+            ).exists():
+                self.stdout.write(self.style.WARNING(f"{job_id}: not a failed or queued job; skipped"))
+                continue
+            job = import_jobs.run_job(job_id)
+            if job is None:
+                self.stdout.write(self.style.WARNING(f"{job_id}: claimed by another worker; skipped"))
+            elif job.status == ImportJobStatus.COMPLETED:
+                self.stdout.write(self.style.SUCCESS(f"{job_id}: completed ({job.rows_processed} rows)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{job_id}: failed at row {job.rows_processed}: {job.error}"))
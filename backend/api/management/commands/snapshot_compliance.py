@@ -0,0 +1,36 @@
+"""
+Record today's compliance snapshot of every project.
+
+Idempotent and safe to run from cron (daily, or more often): each run
+upserts one ComplianceSnapshot per project for the current date, so a
+repeated run on the same day replaces that day's figures.
+
+Usage:
+  python manage.py snapshot_compliance
+  python manage.py snapshot_compliance --project <uuid>
+"""
+
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import stats_service
+
+
+class Command(BaseCommand):
+    help = "Store today's status, evidence-state and score totals of each project for trend charts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            type=str,
+            action="append",
+            default=[],
+            help="Only snapshot this project ID (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        written = stats_service.take_snapshots(today, project_ids=options["project"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Snapshot complete. date={today} projects={written}"))
@@ -4,10 +4,19 @@ Custom middleware for monitoring and request tracking.
 import time
 import logging
 import uuid
+import contextvars
 from django.utils.deprecation import MiddlewareMixin
 
 logger = logging.getLogger(__name__)
 
+# Request ID of the request being handled on this thread/task, for log correlation
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+
+def get_current_request_id():
+    """Return the request ID of the request currently being processed, if any"""
+    return _request_id.get()
+
 
 class RequestTimingMiddleware(MiddlewareMixin):
     """Middleware to track request duration and log slow queries"""
@@ -19,6 +28,7 @@ class RequestTimingMiddleware(MiddlewareMixin):
         request.start_time = time.time()
         # Generate request ID for tracing
         request.request_id = str(uuid.uuid4())[:8]
+        _request_id.set(request.request_id)
         return None
     
     def process_response(self, request, response):
@@ -43,6 +53,7 @@ class RequestTimingMiddleware(MiddlewareMixin):
             # Add request ID to response headers for tracing
             response['X-Request-ID'] = request.request_id
         
+        _request_id.set(None)
         return response
 
 
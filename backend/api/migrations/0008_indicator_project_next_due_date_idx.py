@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_alter_userprofile_role_auditlog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='indicator',
+            index=models.Index(fields=['project', 'next_due_date'], name='api_indicat_project_6d33df_idx'),
+        ),
+    ]
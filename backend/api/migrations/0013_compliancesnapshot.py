@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 08:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_project_version_projectreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_indicators', models.IntegerField(default=0)),
+                ('status_counts', models.JSONField(default=dict, help_text='Indicator count per ComplianceStatus')),
+                ('evidence_states', models.JSONField(default=dict, help_text='Indicator count per EvidenceState')),
+                ('score_total', models.IntegerField(default=0)),
+                ('applicable_score', models.IntegerField(default=0)),
+                ('compliant_score', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_snapshots', to='api.project')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'date'), name='unique_compliance_snapshot_per_day')],
+            },
+        ),
+    ]
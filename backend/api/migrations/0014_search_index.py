@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install_index(apps, schema_editor):
+    from api.search_service import install_index
+    install_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    from api.search_service import drop_index
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_compliancesnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectreport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When a worker last claimed the report', null=True),
+        ),
+    ]
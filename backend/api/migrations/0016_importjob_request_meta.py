@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_projectreport_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='user_agent',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
 class AuditAction(models.TextChoices):
@@ -14,7 +15,8 @@ class AuditAction(models.TextChoices):
 
 class AuditLog(models.Model):
   id=models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-  timestamp=models.DateTimeField(auto_now_add=True)
+  # Set when the entry is logged, not when a buffered batch is written
+  timestamp=models.DateTimeField(default=timezone.now, editable=False)
   actor=models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="audit_logs")
   action=models.CharField(max_length=32, choices=AuditAction.choices)
   entity_type=models.CharField(max_length=255)
@@ -26,6 +28,13 @@ class AuditLog(models.Model):
   after=models.JSONField(null=True, blank=True)
   metadata=models.JSONField(null=True, blank=True)
 
+  class Meta:
+    indexes = [
+      models.Index(fields=['timestamp']),
+      models.Index(fields=['entity_type', 'entity_id', 'timestamp']),
+      models.Index(fields=['actor', 'timestamp']),
+    ]
+
 
 class UserRole(models.TextChoices):
     """User roles for role-based access control"""
@@ -153,6 +162,8 @@ class Project(models.Model):
         blank=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Incremented on every project, indicator or evidence change; keys cached reports and stats
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
@@ -163,6 +174,27 @@ class Project(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Save the project; saving an existing one bumps its version.
+
+        ``version`` is only ever changed by ``bump_version``, so a save from a
+        stale instance cannot wind it back.
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+        kwargs['update_fields'] = [name for name in update_fields if name != 'version']
+        super().save(*args, **kwargs)
+        Project.bump_version(self.id)
+
+    @staticmethod
+    def bump_version(project_id):
+        """Mark a project, its indicators or its evidence as changed"""
+        Project.objects.filter(id=project_id).update(version=models.F('version') + 1)
+
 
 class Indicator(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -235,6 +267,7 @@ class Indicator(models.Model):
             models.Index(fields=['frequency']),
             models.Index(fields=['ai_categorization']),
             models.Index(fields=['indicator_key']),  # Added index
+            models.Index(fields=['project', 'next_due_date']),
         ]
 
     def __str__(self):
@@ -267,6 +300,11 @@ class Indicator(models.Model):
         all_evidence = self.evidence.all()
         
         if not all_evidence.exists():
+            if self.evidence_type == IndicatorEvidenceType.FREQUENCY:
+                # A user sign-off meets the current period without evidence
+                from .compliance_service import current_period_met
+                if current_period_met(self):
+                    return EvidenceState.ACCEPTED
             return EvidenceState.NO_EVIDENCE
         
         # Check for rejected evidence first (takes precedence)
@@ -303,11 +341,12 @@ class Indicator(models.Model):
                 return EvidenceState.PARTIAL_EVIDENCE
             
             elif self.evidence_type == IndicatorEvidenceType.FREQUENCY:
-                # Frequency-based: need evidence for current cycle
-                # For now, any accepted evidence is sufficient
-                if accepted_evidence.exists():
-                    return EvidenceState.ACCEPTED
-                return EvidenceState.PARTIAL_EVIDENCE
+                # Frequency-based: the current period must be met (compliance_service.is_period_met)
+                from .compliance_service import current_period_met
+                if current_period_met(self) is False:
+                    return EvidenceState.PARTIAL_EVIDENCE
+                # Met, or no recurrence to check against: any accepted evidence counts
+                return EvidenceState.ACCEPTED
         
         # Has evidence but not accepted
         return EvidenceState.PARTIAL_EVIDENCE
@@ -466,3 +505,97 @@ class DriveConfig(models.Model):
 
     def __str__(self):
         return f"DriveConfig for {self.project.name}"
+
+
+class ImportJobStatus(models.TextChoices):
+    QUEUED = 'queued', 'Queued'
+    RUNNING = 'running', 'Running'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+
+
+class ImportJob(models.Model):
+    """A background CSV indicator import, checkpointed after every committed batch."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='import_jobs')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, help_text='Uploaded file in default storage')
+    total_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=ImportJobStatus.choices, default=ImportJobStatus.QUEUED)
+    # Data rows committed so far; a resumed job skips this many rows
+    rows_processed = models.IntegerField(default=0)
+    bytes_processed = models.BigIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True, help_text='CSVImportResult counts and per-row errors')
+    error = models.TextField(blank=True, default='')
+    # Uploader's request, recorded on the audit entry written when the job completes
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project', 'created_at']),
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Import {self.file_name} ({self.status})"
+
+
+class ReportStatus(models.TextChoices):
+    QUEUED = 'queued', 'Queued'
+    RUNNING = 'running', 'Running'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+
+
+class ProjectReport(models.Model):
+    """A server-generated PDF compliance report for one version of a project."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='reports')
+    version = models.PositiveIntegerField(help_text='Project.version the report was requested for')
+    include_summary = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=ReportStatus.choices, default=ReportStatus.QUEUED)
+    file_path = models.CharField(max_length=500, blank=True, default='', help_text='Generated PDF in default storage')
+    error = models.TextField(blank=True, default='')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, help_text='When a worker last claimed the report')
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'version', 'include_summary'], name='unique_report_per_version'),
+        ]
+
+    def __str__(self):
+        return f"Report {self.project_id} v{self.version} ({self.status})"
+
+
+class ComplianceSnapshot(models.Model):
+    """Daily compliance figures for a project, written by the ``snapshot_compliance`` command."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='compliance_snapshots')
+    date = models.DateField()
+    total_indicators = models.IntegerField(default=0)
+    status_counts = models.JSONField(default=dict, help_text='Indicator count per ComplianceStatus')
+    evidence_states = models.JSONField(default=dict, help_text='Indicator count per EvidenceState')
+    score_total = models.IntegerField(default=0)
+    applicable_score = models.IntegerField(default=0)
+    compliant_score = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            # Also the index trend queries scan: project_id = ? AND date BETWEEN ? AND ?
+            models.UniqueConstraint(fields=['project', 'date'], name='unique_compliance_snapshot_per_day'),
+        ]
+
+    def __str__(self):
+        return f"Snapshot {self.project_id} {self.date}"
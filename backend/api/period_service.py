@@ -0,0 +1,227 @@
+"""
+Period Service for materializing EvidencePeriod and FrequencyLog rows.
+
+Recurring indicators (any frequency with a recurrence rule) get one
+EvidencePeriod per calendar period, marked compliant by
+``compliance_service.is_period_met`` (the rule ``evaluate`` also uses):
+accepted evidence reaching ``expected_evidence_count``, or a user sign-off
+such as ``quick_log``. Evidence counts and compliance are
+recomputed from evidence upload dates, a FrequencyLog row is kept for every
+compliant period, and ``next_due_date`` is moved to the end of the first open
+period. Work is done per batch of indicators with a fixed number of queries,
+and every step is idempotent so the command can run from cron; overlapping
+runs only repeat work.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import scheduling_service
+from .compliance_service import MATERIALIZED_NOTE, is_period_met, is_sign_off
+from .models import Evidence, EvidencePeriod, EvidenceReviewState, FrequencyLog, Indicator, Project
+
+class MaterializeResult:
+    """Container for materialization results."""
+    def __init__(self):
+        self.indicators = 0
+        self.periods_created = 0
+        self.periods_updated = 0
+        self.frequency_logs_created = 0
+        self.frequency_logs_removed = 0
+        self.due_dates_updated = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'indicators': self.indicators,
+            'periods_created': self.periods_created,
+            'periods_updated': self.periods_updated,
+            'frequency_logs_created': self.frequency_logs_created,
+            'frequency_logs_removed': self.frequency_logs_removed,
+            'due_dates_updated': self.due_dates_updated,
+        }
+
+
+def recurring_indicators(project_id=None):
+    """
+    Indicators whose frequency has a recurrence rule.
+
+    Any spelling ``scheduling_service.get_rule`` accepts counts (e.g.
+    ``Bi-weekly``), so the stored values in use are read first and matched
+    with it (one query).
+    """
+    queryset = Indicator.objects.all()
+    if project_id is not None:
+        queryset = queryset.filter(project_id=project_id)
+    frequencies = [
+        frequency for frequency in queryset.values_list('frequency', flat=True).distinct().order_by()
+        if scheduling_service.get_rule(frequency) is not None
+    ]
+    return queryset.filter(frequency__in=frequencies)
+
+
+def evidence_counts_by_period(rows: List[Dict[str, Any]], lo: date, hi: date) -> Dict[Tuple[Any, date], Tuple[int, int]]:
+    """
+    ``{(indicator_id, period_start): (submitted, accepted)}`` for many indicators.
+
+    One grouped query counts evidence per indicator and upload day; the day
+    totals are then binned into each indicator's periods. Rejected evidence
+    is not counted as submitted.
+    """
+    rules = {row['id']: scheduling_service.get_rule(row['frequency']) for row in rows}
+    daily = (
+        Evidence.objects
+        .filter(indicator_id__in=list(rules), date_uploaded__date__gte=lo, date_uploaded__date__lte=hi)
+        .annotate(day=TruncDate('date_uploaded'))
+        .values('indicator_id', 'day')
+        .annotate(
+            submitted=Count('id', filter=~Q(review_state=EvidenceReviewState.REJECTED)),
+            accepted=Count('id', filter=Q(review_state=EvidenceReviewState.ACCEPTED)),
+        )
+    )
+    counts: Dict[Tuple[Any, date], List[int]] = defaultdict(lambda: [0, 0])
+    for item in daily:
+        rule = rules[item['indicator_id']]
+        period_start = rule.period_for(item['day'])[0]
+        totals = counts[(item['indicator_id'], period_start)]
+        totals[0] += item['submitted']
+        totals[1] += item['accepted']
+    return {key: (submitted, accepted) for key, (submitted, accepted) in counts.items()}
+
+
+def _next_due_date(rule, periods, compliant_starts, today: date) -> Optional[date]:
+    """End of the first period from today onwards that is not yet compliant"""
+    for start, end in periods:
+        if end >= today and start not in compliant_starts:
+            return end
+    # Everything materialized is done: due at the end of the following period
+    following = max(periods[-1][1], today - timedelta(days=1))
+    if following >= date.max:
+        return None
+    return rule.period_for(following + timedelta(days=1))[1]
+
+
+def _materialize_batch(rows: List[Dict[str, Any]], start: date, end: date, today: date,
+                       result: MaterializeResult):
+    periods_by_id = scheduling_service.generate_periods(((row['id'], row['frequency']) for row in rows), start, end)
+    if not periods_by_id:
+        return
+    indicator_ids = list(periods_by_id)
+    lo = min(periods[0][0] for periods in periods_by_id.values())
+    hi = max(periods[-1][1] for periods in periods_by_id.values())
+    counts = evidence_counts_by_period(rows, lo, hi)
+
+    periods_in_range = EvidencePeriod.objects.filter(
+        indicator_id__in=indicator_ids, period_start__gte=lo, period_start__lte=hi
+    )
+    existing = {(p.indicator_id, p.period_start): p for p in periods_in_range.all()}
+    logs_in_range = FrequencyLog.objects.filter(
+        indicator_id__in=indicator_ids, period_start__gte=lo, period_start__lte=hi
+    )
+    logs = list(logs_in_range.values_list('id', 'indicator_id', 'period_start', 'notes', 'is_compliant'))
+    signed_off = {
+        (indicator_id, period_start) for _, indicator_id, period_start, notes, is_compliant in logs
+        if is_sign_off(notes, is_compliant)
+    }
+
+    wanted = {}
+    for indicator_id, periods in periods_by_id.items():
+        for period_start, period_end in periods:
+            submitted, accepted = counts.get((indicator_id, period_start), (0, 0))
+            period = existing.get((indicator_id, period_start))
+            expected = period.expected_evidence_count if period else 1
+            compliant = is_period_met(accepted, expected, (indicator_id, period_start) in signed_off)
+            wanted[(indicator_id, period_start)] = (period_end, submitted, compliant)
+
+    to_create, to_update = [], []
+    now = timezone.now()
+    for (indicator_id, period_start), (period_end, submitted, compliant) in wanted.items():
+        period = existing.get((indicator_id, period_start))
+        if period is None:
+            to_create.append(EvidencePeriod(
+                indicator_id=indicator_id, period_start=period_start, period_end=period_end,
+                actual_evidence_count=submitted, is_compliant=compliant,
+            ))
+        elif (period.actual_evidence_count, period.is_compliant) != (submitted, compliant):
+            period.actual_evidence_count = submitted
+            period.is_compliant = compliant
+            period.updated_at = now
+            to_update.append(period)
+
+    if to_create:
+        EvidencePeriod.objects.bulk_create(to_create, ignore_conflicts=True)
+        # ignore_conflicts returns every object, inserted or not: count the rows instead
+        result.periods_created += periods_in_range.count() - len(existing)
+    EvidencePeriod.objects.bulk_update(to_update, ['actual_evidence_count', 'is_compliant', 'updated_at'])
+    result.periods_updated += len(to_update)
+
+    compliant_keys = {key for key, (_, _, compliant) in wanted.items() if compliant}
+    logged = {(indicator_id, period_start) for _, indicator_id, period_start, _, _ in logs}
+    # Materialized logs follow the evidence; user-submitted logs are left alone
+    stale_logs = [
+        log_id for log_id, indicator_id, period_start, notes, _ in logs
+        if notes == MATERIALIZED_NOTE and (indicator_id, period_start) not in compliant_keys
+    ]
+    if stale_logs:
+        FrequencyLog.objects.filter(id__in=stale_logs).delete()
+        result.frequency_logs_removed += len(stale_logs)
+    new_logs = [
+        FrequencyLog(
+            indicator_id=indicator_id, period_start=period_start, period_end=wanted[(indicator_id, period_start)][0],
+            is_compliant=True, notes=MATERIALIZED_NOTE,
+        )
+        for indicator_id, period_start in compliant_keys - logged
+    ]
+    if new_logs:
+        FrequencyLog.objects.bulk_create(new_logs, ignore_conflicts=True)
+        result.frequency_logs_created += logs_in_range.count() - (len(logs) - len(stale_logs))
+
+    compliant_starts = defaultdict(set)
+    for indicator_id, period_start in compliant_keys:
+        compliant_starts[indicator_id].add(period_start)
+    due_updates, changed_projects = [], set()
+    for row in rows:
+        periods = periods_by_id.get(row['id'])
+        if not periods:
+            continue
+        rule = scheduling_service.get_rule(row['frequency'])
+        next_due = _next_due_date(rule, periods, compliant_starts[row['id']], today)
+        if next_due != row['next_due_date']:
+            due_updates.append(Indicator(id=row['id'], next_due_date=next_due))
+            changed_projects.add(row['project_id'])
+    Indicator.objects.bulk_update(due_updates, ['next_due_date'])
+    result.due_dates_updated += len(due_updates)
+    # bulk_update skips the signals that invalidate cached reports and stats
+    for project_id in changed_projects:
+        Project.bump_version(project_id)
+
+
+def materialize_periods(start: date, end: date, project_id=None, batch_size: int = 500,
+                        today: Optional[date] = None, progress=None) -> MaterializeResult:
+    """
+    Create missing periods overlapping ``[start, end]`` and refresh their counts.
+
+    ``progress`` is called with the number of indicators processed after
+    each batch.
+    """
+    today = today or timezone.localdate()
+    result = MaterializeResult()
+    queryset = recurring_indicators(project_id).order_by('id').values('id', 'project_id', 'frequency', 'next_due_date')
+
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(page[:batch_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            _materialize_batch(rows, start, end, today, result)
+        result.indicators += len(rows)
+        last_id = rows[-1]['id']
+        if progress:
+            progress(result.indicators)
+    return result
@@ -1,8 +1,9 @@
 """
 Custom permission classes for role-based access control.
 """
+from django.db.models import Q
 from rest_framework import permissions
-from .models import UserRole, UserProfile
+from .models import Project, UserRole, UserProfile
 
 
 class IsAdmin(permissions.BasePermission):
@@ -144,3 +145,20 @@ class IsAuthenticatedReadOnly(permissions.BasePermission):
         
         return False
 
+
+def get_accessible_projects(user):
+    """Projects a user may read: every project for admins, otherwise owned or member projects."""
+    if not user or not user.is_authenticated:
+        return Project.objects.none()
+    if hasattr(user, 'profile') and user.profile.is_admin:
+        return Project.objects.all()
+    return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct()
+
+
+def get_writable_projects(user):
+    """Projects a user may modify: every project for admins, otherwise owned projects."""
+    if not user or not user.is_authenticated:
+        return Project.objects.none()
+    if hasattr(user, 'profile') and user.profile.is_admin:
+        return Project.objects.all()
+    return Project.objects.filter(owner=user)
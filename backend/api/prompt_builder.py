@@ -0,0 +1,170 @@
+"""
+Prompt building for AI tasks.
+
+Each AI task declares which indicator fields it needs and how they are encoded.
+Indicators are projected onto those fields, encoded compactly (a pipe-separated
+table or minified JSON), and split into prompts that fit the task's token
+budget. Splitting and truncation are deterministic: the same input always
+produces the same prompts.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .ai_metrics import estimate_tokens
+from .serializers import to_camel_case, to_snake_case
+
+TABLE = 'table'
+JSON = 'json'
+
+TRUNCATION_MARK = '…'
+
+
+class PromptTask:
+    """Field projection, encoding and token budget for one AI task"""
+
+    def __init__(self, name: str, fields: Sequence[str], encoding: str = TABLE,
+                 token_budget: int = 6000, max_field_chars: Optional[Dict[str, int]] = None):
+        self.name = name
+        self.fields = tuple(fields)
+        self.encoding = encoding
+        self.token_budget = token_budget
+        self.max_field_chars = max_field_chars or {}
+
+
+_LONG_TEXT = {'description': 600, 'notes': 400, 'indicator': 300, 'standard': 200}
+
+TASKS: Dict[str, PromptTask] = {task.name: task for task in [
+    PromptTask('analyze_checklist', ['id', 'section', 'standard', 'indicator', 'description', 'frequency', 'score'],
+               token_budget=12000, max_field_chars=_LONG_TEXT),
+    PromptTask('analyze_categorization', ['id', 'indicator', 'description'],
+               token_budget=8000, max_field_chars=_LONG_TEXT),
+    PromptTask('ask_assistant', ['section', 'standard', 'indicator', 'description', 'status', 'frequency', 'notes'],
+               token_budget=3000, max_field_chars=_LONG_TEXT),
+    PromptTask('generate_report_summary', ['section', 'standard', 'indicator', 'status'],
+               token_budget=8000, max_field_chars={'indicator': 160, 'standard': 120}),
+    PromptTask('generate_compliance_guide',
+               ['section', 'standard', 'indicator', 'description', 'frequency', 'responsible_person', 'evidence_type'],
+               encoding=JSON, token_budget=4000),
+    PromptTask('analyze_tasks', ['id', 'indicator', 'status', 'frequency'],
+               token_budget=8000, max_field_chars=_LONG_TEXT),
+    PromptTask('analyze_indicator_explanations', ['id', 'section', 'standard', 'indicator', 'description'],
+               token_budget=12000, max_field_chars=_LONG_TEXT),
+    PromptTask('analyze_frequency_grouping', ['id', 'indicator', 'description', 'frequency'],
+               token_budget=8000, max_field_chars=_LONG_TEXT),
+]}
+
+
+def _field_value(indicator: Dict[str, Any], field: str) -> Any:
+    """Look up a field in either snake_case (server) or camelCase (client) form"""
+    for key in (field, to_camel_case(field), to_snake_case(field)):
+        if key in indicator:
+            return indicator[key]
+    return None
+
+
+def _truncate(value: str, limit: Optional[int]) -> str:
+    if limit and len(value) > limit:
+        return value[:limit - 1].rstrip() + TRUNCATION_MARK
+    return value
+
+
+def project(task: PromptTask, indicator: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce an indicator to the fields the task needs, dropping empty values"""
+    projected = {}
+    for field in task.fields:
+        value = _field_value(indicator, field)
+        if value is None or value == '':
+            continue
+        if isinstance(value, str):
+            value = _truncate(' '.join(value.split()), task.max_field_chars.get(field))
+        elif not isinstance(value, (int, float, bool)):
+            value = str(value)
+        projected[field] = value
+    return projected
+
+
+def _table_cell(value: Any) -> str:
+    return str(value).replace('|', '/')
+
+
+def _table_header(task: PromptTask) -> str:
+    return '|'.join(task.fields)
+
+
+def _encode_row(task: PromptTask, row: Dict[str, Any]) -> str:
+    if task.encoding == JSON:
+        return json.dumps(row, separators=(',', ':'), ensure_ascii=False)
+    return '|'.join(_table_cell(row.get(field, '')) for field in task.fields)
+
+
+def _encode_block(task: PromptTask, encoded_rows: List[str]) -> str:
+    if task.encoding == JSON:
+        return '[' + ','.join(encoded_rows) + ']'
+    return '\n'.join([f'(pipe-separated table, columns: {_table_header(task)})'] + encoded_rows)
+
+
+def encode(task_name: str, indicators: Iterable[Dict[str, Any]]) -> str:
+    """Encode indicators for a task without any budget applied"""
+    task = TASKS[task_name]
+    return _encode_block(task, [_encode_row(task, project(task, ind)) for ind in indicators])
+
+
+def _fit_row(task: PromptTask, row: Dict[str, Any], budget: int) -> str:
+    """Shrink the longest text fields of a row until it fits the budget"""
+    encoded = _encode_row(task, row)
+    while estimate_tokens(encoded) > budget:
+        text_fields = [f for f, v in row.items() if isinstance(v, str) and len(v) > 16]
+        if not text_fields:
+            break
+        longest = max(text_fields, key=lambda f: (len(row[f]), f))
+        row = {**row, longest: _truncate(row[longest], len(row[longest]) // 2)}
+        encoded = _encode_row(task, row)
+    return encoded
+
+
+def build_prompts(task_name: str, indicators: Sequence[Dict[str, Any]], template: str,
+                  max_prompts: Optional[int] = None, **context: Any) -> List[str]:
+    """
+    Render ``template`` once per batch of indicators that fits the task budget.
+
+    The template receives the encoded batch as ``{indicators}`` plus any extra
+    ``context`` values. Indicators keep their input order. With ``max_prompts``
+    set, batches past the limit are dropped and the last prompt notes how many
+    indicators were omitted.
+    """
+    task = TASKS[task_name]
+    overhead = estimate_tokens(template.format(indicators='', **context))
+    row_budget = max(task.token_budget - overhead, 256)
+
+    batches: List[List[str]] = []
+    current: List[str] = []
+    used = estimate_tokens(_encode_block(task, []))
+    for indicator in indicators:
+        row = _fit_row(task, project(task, indicator), row_budget)
+        cost = estimate_tokens(row) + 1
+        if current and used + cost > row_budget:
+            batches.append(current)
+            current = []
+            used = estimate_tokens(_encode_block(task, []))
+        current.append(row)
+        used += cost
+    if current or not batches:
+        batches.append(current)
+
+    omitted = 0
+    if max_prompts is not None and len(batches) > max_prompts:
+        omitted = sum(len(batch) for batch in batches[max_prompts:])
+        batches = batches[:max_prompts]
+
+    prompts = [template.format(indicators=_encode_block(task, batch), **context) for batch in batches]
+    if omitted:
+        prompts[-1] = template.format(
+            indicators=_encode_block(task, batches[-1]) + f'\n({omitted} more indicators omitted for length)',
+            **context
+        )
+    return prompts
+
+
+def estimate_prompt_tokens(prompts: Iterable[str]) -> int:
+    """Total estimated tokens across a set of prompts"""
+    return sum(estimate_tokens(p) for p in prompts)
@@ -0,0 +1,249 @@
+"""
+Server-side PDF compliance reports.
+
+A report belongs to one ``Project.version``. Requesting a report for a
+version that already has one returns the existing report, so repeated
+downloads of an unchanged project are served from the stored file. New
+reports are built with reportlab on a small in-process thread pool (inline
+with ``REPORTS_ASYNC`` disabled); once a report completes, the project's
+older finished reports and their files are removed. A report left RUNNING
+for longer than ``REPORT_STALE_SECONDS`` (its worker died) is retried like
+a failed one. If the project changes while a report is rendered, the PDF is
+discarded, the report fails as stale and the new version is queued instead.
+
+The PDF contains a status summary, the optional ``generate_report_summary``
+text, one indicator table per section and an evidence inventory.
+"""
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .models import ComplianceStatus, Evidence, Indicator, Project, ProjectReport, ReportStatus
+
+logger = logging.getLogger(__name__)
+
+STALE_ERROR = 'The project changed while the report was generated'
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+_styles = getSampleStyleSheet()
+_CELL = ParagraphStyle('ReportCell', parent=_styles['BodyText'], fontSize=8, leading=10)
+_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e5e7eb')),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.REPORT_WORKERS, thread_name_prefix='report')
+    return _executor
+
+
+def _current_version(project_id) -> Optional[int]:
+    return Project.objects.filter(id=project_id).values_list('version', flat=True).first()
+
+
+def current_report(project: Project, include_summary: bool = False) -> Optional[ProjectReport]:
+    """The report for the project's current version, if one was requested"""
+    version = _current_version(project.id)
+    return ProjectReport.objects.filter(project=project, version=version, include_summary=include_summary).first()
+
+
+def _stalled() -> Q:
+    """RUNNING reports whose worker has not finished within REPORT_STALE_SECONDS"""
+    cutoff = timezone.now() - timedelta(seconds=settings.REPORT_STALE_SECONDS)
+    return Q(status=ReportStatus.RUNNING) & (Q(started_at__lt=cutoff) | Q(started_at__isnull=True))
+
+
+def request_report(project: Project, include_summary: bool = False, user=None) -> ProjectReport:
+    """Return the current version's report, queuing its generation if it is new, failed or abandoned"""
+    version = _current_version(project.id)
+    report, created = ProjectReport.objects.get_or_create(
+        project=project, version=version, include_summary=include_summary, defaults={'created_by': user}
+    )
+    if created or ProjectReport.objects.filter(Q(status=ReportStatus.FAILED) | _stalled(), id=report.id).update(
+        status=ReportStatus.QUEUED, error=''
+    ):
+        enqueue(report.id)
+        # Built inline, a stale report is already replaced by the current version's
+        return ProjectReport.objects.filter(id=report.id).first() or current_report(project, include_summary)
+    return report
+
+
+def enqueue(report_id):
+    """Generate a report on the worker pool once the current transaction commits, or inline in sync mode"""
+    if settings.REPORTS_ASYNC:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, report_id))
+    else:
+        generate_report(report_id)
+
+
+def _run_in_worker(report_id):
+    try:
+        generate_report(report_id)
+    finally:
+        connections.close_all()
+
+
+def generate_report(report_id) -> Optional[ProjectReport]:
+    """
+    Build and store a queued report.
+
+    Returns None if another worker already claimed it.
+    """
+    if not ProjectReport.objects.filter(id=report_id, status=ReportStatus.QUEUED).update(
+        status=ReportStatus.RUNNING, started_at=timezone.now()
+    ):
+        return None
+    report = ProjectReport.objects.select_related('project').get(id=report_id)
+    changed = False
+    try:
+        pdf = build_pdf(report.project, report.version, report.include_summary)
+        # The PDF is rendered from live data: only keep it if nothing changed meanwhile
+        changed = _current_version(report.project_id) != report.version
+        if changed:
+            report.status = ReportStatus.FAILED
+            report.error = STALE_ERROR
+        else:
+            report.file_path = default_storage.save(
+                f'reports/{report.project_id}/{report.id}.pdf', ContentFile(pdf)
+            )
+            report.status = ReportStatus.COMPLETED
+    except Exception as e:
+        logger.exception("Report %s failed", report_id)
+        report.status = ReportStatus.FAILED
+        report.error = str(e)
+    report.finished_at = timezone.now()
+    report.save(update_fields=['file_path', 'status', 'error', 'finished_at'])
+
+    if changed:
+        # Build the version the project is at now instead
+        request_report(report.project, report.include_summary, user=report.created_by)
+    if report.status == ReportStatus.COMPLETED:
+        # Older reports a worker is still building are left for it to finish
+        stale = ProjectReport.objects.filter(
+            Q(status__in=[ReportStatus.COMPLETED, ReportStatus.FAILED]) | _stalled(),
+            project_id=report.project_id, include_summary=report.include_summary, version__lt=report.version,
+        )
+        for path in stale.exclude(file_path='').values_list('file_path', flat=True):
+            default_storage.delete(path)
+        stale.delete()
+    return report
+
+
+def _cell(value) -> Paragraph:
+    return Paragraph(escape(str(value if value is not None else '')), _CELL)
+
+
+def _table(header: List[str], rows: List[List[Any]], widths: List[float]) -> Table:
+    table = Table([[_cell(h) for h in header]] + [[_cell(v) for v in row] for row in rows],
+                  colWidths=widths, repeatRows=1)
+    table.setStyle(_TABLE_STYLE)
+    return table
+
+
+def _summary_text(indicators: List[Dict[str, Any]]) -> str:
+    from . import ai_services
+    return ai_services.generate_report_summary(
+        [{field: row[field] for field in ('section', 'standard', 'indicator', 'status')} for row in indicators]
+    )
+
+
+def build_pdf(project: Project, version: int, include_summary: bool = False) -> bytes:
+    """Render the report PDF for ``project`` (three queries plus the optional summary call)"""
+    indicators = list(
+        Indicator.objects.filter(project=project)
+        .order_by('section', 'standard', 'indicator')
+        .values('id', 'section', 'standard', 'indicator', 'status', 'next_due_date')
+    )
+    evidence_counts = dict(
+        Evidence.objects.filter(indicator__project=project)
+        .values('indicator_id').annotate(n=Count('id')).values_list('indicator_id', 'n')
+    )
+    evidence = (
+        Evidence.objects.filter(indicator__project=project)
+        .order_by('indicator__section', 'indicator__indicator', 'date_uploaded')
+        .values_list('indicator__section', 'indicator__indicator', 'type', 'file_name', 'content',
+                     'date_uploaded', 'review_state')
+    )
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=15 * mm, bottomMargin=15 * mm, title=f'{project.name} compliance report')
+    width = doc.width
+    story = [
+        Paragraph(escape(f'{project.name}: Compliance Report'), _styles['Title']),
+        Paragraph(escape(f'Generated {timezone.now():%Y-%m-%d %H:%M} UTC, project version {version}'),
+                  _styles['Normal']),
+        Spacer(1, 6 * mm),
+        Paragraph('Status summary', _styles['Heading2']),
+    ]
+
+    total = len(indicators)
+    counts = Counter(row['status'] for row in indicators)
+    story.append(_table(
+        ['Status', 'Indicators', '%'],
+        [[label, counts[value], f'{100 * counts[value] // max(total, 1)}%'] for value, label in ComplianceStatus.choices]
+        + [['Total', total, '100%' if total else '0%']],
+        [width * 0.5, width * 0.25, width * 0.25],
+    ))
+
+    if include_summary:
+        story.append(Paragraph('Summary', _styles['Heading2']))
+        for paragraph in _summary_text(indicators).split('\n\n'):
+            story.append(Paragraph(escape(paragraph).replace('\n', '<br/>'), _styles['BodyText']))
+
+    story.append(Paragraph('Indicators by section', _styles['Heading2']))
+    sections: Dict[str, List[List[Any]]] = {}
+    for row in indicators:
+        sections.setdefault(row['section'], []).append([
+            row['standard'], row['indicator'], row['status'],
+            evidence_counts.get(row['id'], 0), row['next_due_date'] or '',
+        ])
+    for section, rows in sections.items():
+        story.append(Paragraph(escape(section), _styles['Heading3']))
+        story.append(_table(
+            ['Standard', 'Indicator', 'Status', 'Evidence', 'Next due'], rows,
+            [width * 0.25, width * 0.4, width * 0.13, width * 0.09, width * 0.13],
+        ))
+
+    story.append(Paragraph('Evidence inventory', _styles['Heading2']))
+    inventory = [
+        [section, indicator, kind, file_name or (content or '')[:80], f'{uploaded:%Y-%m-%d}', review_state]
+        for section, indicator, kind, file_name, content, uploaded, review_state in evidence
+    ]
+    if inventory:
+        story.append(_table(
+            ['Section', 'Indicator', 'Type', 'File / note', 'Uploaded', 'Review'], inventory,
+            [width * 0.18, width * 0.3, width * 0.1, width * 0.2, width * 0.11, width * 0.11],
+        ))
+    else:
+        story.append(Paragraph('No evidence uploaded.', _styles['BodyText']))
+
+    doc.build(story)
+    return buffer.getvalue()
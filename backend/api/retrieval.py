@@ -0,0 +1,197 @@
+"""
+Lexical (BM25) retrieval over indicators.
+
+Used to pick the indicators most relevant to an assistant question instead of
+sending the first few rows of a project. Each project gets an inverted index
+over indicator text, standard, section, description, notes and evidence notes.
+Indexes are cached per process, updated incrementally from model signals, and
+expire after ``RETRIEVAL_INDEX_TTL`` seconds so that changes made by other
+workers are eventually picked up.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cachetools import TTLCache
+from django.conf import settings
+
+from .models import Evidence, Indicator
+
+TEXT_FIELDS = ('indicator', 'standard', 'section', 'description', 'notes')
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how i in is it its of on or our that the this to
+was what when which who why will with we you your do does should must can shall
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def indicator_text(indicator: Dict[str, Any], evidence_notes: Iterable[str] = ()) -> str:
+    """Searchable text for an indicator dict (snake_case or camelCase keys)"""
+    parts = [str(indicator.get(field) or '') for field in TEXT_FIELDS]
+    parts.extend(evidence_notes)
+    return ' '.join(parts)
+
+
+class BM25Index:
+    """Incrementally maintained Okapi BM25 inverted index"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Any, int]] = defaultdict(dict)
+        self._doc_terms: Dict[Any, Counter] = {}
+        self._doc_len: Dict[Any, int] = {}
+        self._doc_seq: Dict[Any, int] = {}
+        self._next_seq = 0
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_terms
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._doc_seq.pop(doc_id, None)
+
+    def add(self, doc_id, text: str):
+        """Add or replace a document"""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_seq[doc_id] = self._next_seq
+            self._next_seq += 1
+            length = sum(terms.values())
+            self._doc_len[doc_id] = length
+            self._total_len += length
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Any, float]]:
+        """Return up to ``k`` (doc_id, score) pairs, best first; ties keep insertion order"""
+        query_terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not n_docs or not query_terms:
+                return []
+            avg_len = self._total_len / n_docs or 1
+            scores: Dict[Any, float] = defaultdict(float)
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self._doc_seq[item[0]]))
+        return ranked[:k]
+
+
+# Per-process cache of project indexes
+_project_indexes = TTLCache(maxsize=64, ttl=getattr(settings, 'RETRIEVAL_INDEX_TTL', 300))
+_cache_lock = threading.Lock()
+
+
+def _evidence_notes_by_indicator(indicator_ids: Optional[Sequence] = None, project_id=None) -> Dict[Any, List[str]]:
+    queryset = Evidence.objects.all()
+    if project_id is not None:
+        queryset = queryset.filter(indicator__project_id=project_id)
+    if indicator_ids is not None:
+        queryset = queryset.filter(indicator_id__in=indicator_ids)
+    notes: Dict[Any, List[str]] = defaultdict(list)
+    for indicator_id, content, file_name in queryset.values_list('indicator_id', 'content', 'file_name'):
+        notes[indicator_id].extend(v for v in (content, file_name) if v)
+    return notes
+
+
+def build_project_index(project_id) -> BM25Index:
+    """Build a project's index with one indicator query and one evidence query"""
+    index = BM25Index()
+    notes = _evidence_notes_by_indicator(project_id=project_id)
+    rows = Indicator.objects.filter(project_id=project_id).order_by('section', 'standard', 'id').values('id', *TEXT_FIELDS)
+    for row in rows:
+        index.add(row['id'], indicator_text(row, notes.get(row['id'], ())))
+    return index
+
+
+def get_project_index(project_id) -> BM25Index:
+    key = str(project_id)
+    with _cache_lock:
+        index = _project_indexes.get(key)
+    if index is None:
+        index = build_project_index(project_id)
+        with _cache_lock:
+            _project_indexes[key] = index
+    return index
+
+
+def refresh_indicator(project_id, indicator_id):
+    """Re-index one indicator in its project's cached index, if that index is loaded"""
+    with _cache_lock:
+        index = _project_indexes.get(str(project_id))
+    if index is None:
+        return
+    row = Indicator.objects.filter(id=indicator_id).values('id', *TEXT_FIELDS).first()
+    if row is None:
+        index.remove(indicator_id)
+        return
+    notes = _evidence_notes_by_indicator(indicator_ids=[indicator_id])
+    index.add(indicator_id, indicator_text(row, notes.get(indicator_id, ())))
+
+
+def remove_indicator(project_id, indicator_id):
+    with _cache_lock:
+        index = _project_indexes.get(str(project_id))
+    if index is not None:
+        index.remove(indicator_id)
+
+
+def invalidate_project(project_id):
+    with _cache_lock:
+        _project_indexes.pop(str(project_id), None)
+
+
+def search_project(project_id, query: str, k: int = 10) -> List[Any]:
+    """Indicator IDs in a project ranked by relevance to ``query``"""
+    return [doc_id for doc_id, _ in get_project_index(project_id).search(query, k)]
+
+
+def select_relevant(query: str, indicators: Sequence[Dict[str, Any]], k: int = 10) -> List[Dict[str, Any]]:
+    """
+    Pick the ``k`` indicators from a client-supplied list most relevant to ``query``.
+
+    Falls back to the first ``k`` rows when nothing matches the query terms.
+    """
+    if len(indicators) <= k:
+        return list(indicators)
+    index = BM25Index()
+    for position, indicator in enumerate(indicators):
+        index.add(position, indicator_text(indicator))
+    hits = index.search(query, k)
+    if not hits:
+        return list(indicators[:k])
+    return [indicators[position] for position, _ in hits]
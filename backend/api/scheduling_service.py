@@ -1,123 +1,199 @@
 """
 Scheduling Service for calculating due dates and managing recurring compliance.
+
+Frequencies are compiled once into ``RecurrenceRule`` objects. A rule maps
+dates onto calendar-aligned periods with integer arithmetic (day ordinals for
+daily/weekly rules, month indexes for monthly and longer rules), so binning
+many dates or listing every period in a range needs no per-date branching.
 """
 from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
-from typing import Optional
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .models import Frequency
+
+_MAX_ORDINAL = date.max.toordinal()
+_MAX_MONTH_INDEX = date.max.year * 12 + date.max.month - 1
+
+Period = Tuple[date, date]
+
+
+def _month_index(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def _month_start(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _days_in_month(index: int) -> int:
+    if index >= _MAX_MONTH_INDEX:
+        return 31
+    return (_month_start(index + 1) - _month_start(index)).days
+
+
+class RecurrenceRule:
+    """
+    A calendar-aligned recurrence compiled from a frequency.
+
+    Day rules (``unit='day'``) repeat every ``step`` days from a Monday anchor,
+    so weekly periods run Monday to Sunday. Month rules (``unit='month'``)
+    repeat every ``step`` months from January, so quarters and half-years
+    follow the calendar. Period ``n`` is the ``n``-th period since 0001-01-01;
+    periods that would pass ``date.max`` are clipped to it.
+    """
+
+    def __init__(self, name: str, unit: str, step: int):
+        if unit not in ('day', 'month'):
+            raise ValueError(f"Unknown recurrence unit: {unit}")
+        self.name = str(name)
+        self.unit = unit
+        self.step = step
+
+    def __repr__(self):
+        return f"RecurrenceRule({self.name!r}, {self.unit!r}, {self.step})"
+
+    def period_index(self, d: date) -> int:
+        if self.unit == 'day':
+            # Ordinal 1 (0001-01-01) is a Monday
+            return (d.toordinal() - 1) // self.step
+        return _month_index(d) // self.step
+
+    def period_indexes(self, dates: Sequence[date]) -> List[int]:
+        """Period index of every date in one pass"""
+        step = self.step
+        if self.unit == 'day':
+            return [(d.toordinal() - 1) // step for d in dates]
+        return [(d.year * 12 + d.month - 1) // step for d in dates]
+
+    def period_bounds(self, index: int) -> Period:
+        """(start, end) of period ``index``, inclusive"""
+        if self.unit == 'day':
+            start = index * self.step + 1
+            return date.fromordinal(start), date.fromordinal(min(start + self.step - 1, _MAX_ORDINAL))
+        first = index * self.step
+        last = min(first + self.step - 1, _MAX_MONTH_INDEX)
+        return _month_start(first), _month_start(last).replace(day=_days_in_month(last))
+
+    def period_for(self, d: date) -> Period:
+        return self.period_bounds(self.period_index(d))
+
+    def periods_between(self, start: date, end: date) -> List[Period]:
+        """Every period overlapping ``[start, end]``, oldest first"""
+        if end < start:
+            return []
+        return [self.period_bounds(i) for i in range(self.period_index(start), self.period_index(end) + 1)]
+
+    def advance(self, d: date, count: int = 1) -> Optional[date]:
+        """
+        ``d`` moved forward by ``count`` intervals, or None past ``date.max``.
+
+        Month rules keep the day of month, clipped to the length of the target
+        month (Jan 31 + 1 month is Feb 28/29).
+        """
+        if self.unit == 'day':
+            ordinal = d.toordinal() + self.step * count
+            return date.fromordinal(ordinal) if ordinal <= _MAX_ORDINAL else None
+        index = _month_index(d) + self.step * count
+        if index > _MAX_MONTH_INDEX:
+            return None
+        return _month_start(index).replace(day=min(d.day, _days_in_month(index)))
+
+
+RULES: Dict[str, RecurrenceRule] = {
+    Frequency.DAILY: RecurrenceRule(Frequency.DAILY, 'day', 1),
+    Frequency.WEEKLY: RecurrenceRule(Frequency.WEEKLY, 'day', 7),
+    Frequency.MONTHLY: RecurrenceRule(Frequency.MONTHLY, 'month', 1),
+    Frequency.QUARTERLY: RecurrenceRule(Frequency.QUARTERLY, 'month', 3),
+    Frequency.ANNUALLY: RecurrenceRule(Frequency.ANNUALLY, 'month', 12),
+}
+
+# Rules for free-text frequencies that have no Frequency choice
+BIWEEKLY = RecurrenceRule('Bi-weekly', 'day', 14)
+SEMIANNUAL = RecurrenceRule('Semi-annually', 'month', 6)
+
+_ALIASES: Dict[str, RecurrenceRule] = {}
+for _names, _rule in [
+    (['daily', 'day'], RULES[Frequency.DAILY]),
+    (['weekly', 'week'], RULES[Frequency.WEEKLY]),
+    (['bi-weekly', 'biweekly', 'fortnightly'], BIWEEKLY),
+    (['monthly', 'month'], RULES[Frequency.MONTHLY]),
+    (['quarterly', 'quarter'], RULES[Frequency.QUARTERLY]),
+    (['semi-annually', 'semiannually', 'semi-annual', 'semiannual'], SEMIANNUAL),
+    (['annual', 'annually', 'yearly', 'year'], RULES[Frequency.ANNUALLY]),
+]:
+    for _name in _names:
+        _ALIASES[_name] = _rule
+
+
+def get_rule(normalized_frequency: Optional[str]) -> Optional[RecurrenceRule]:
+    """Compiled rule for a frequency string, or None for one-time/unknown"""
+    if not normalized_frequency:
+        return None
+    return _ALIASES.get(normalized_frequency.lower().strip())
+
+
+def generate_periods(frequencies: Iterable[Tuple[Hashable, Optional[str]]],
+                     start: date, end: date) -> Dict[Hashable, List[Period]]:
+    """
+    Periods overlapping ``[start, end]`` for many items at once.
+
+    ``frequencies`` yields ``(key, frequency)`` pairs, e.g. indicator IDs and
+    frequencies. Each distinct rule's period list is computed once and shared
+    by every item using it; items without a recurring rule are omitted.
+    """
+    by_rule: Dict[str, List[Period]] = {}
+    result: Dict[Hashable, List[Period]] = {}
+    for key, frequency in frequencies:
+        rule = get_rule(frequency)
+        if rule is None:
+            continue
+        if rule.name not in by_rule:
+            by_rule[rule.name] = rule.periods_between(start, end)
+        result[key] = by_rule[rule.name]
+    return result
 
 
 def calculate_next_due_date(normalized_frequency: str, reference_date: Optional[date] = None) -> Optional[date]:
     """
     Calculate the next due date based on normalized frequency.
-    
+
     Args:
         normalized_frequency: Normalized frequency string (Daily, Weekly, Monthly, etc.)
         reference_date: Reference date to calculate from (defaults to today)
-        
+
     Returns:
-        Next due date or None if frequency is not recognized
+        Next due date or None if frequency is not recognized or the date
+        would fall past ``date.max``
     """
-    if not normalized_frequency:
+    rule = get_rule(normalized_frequency)
+    if rule is None:
         return None
-    
+
     if reference_date is None:
         reference_date = date.today()
-    
-    freq_lower = normalized_frequency.lower().strip()
-    
-    # Map frequencies to date calculations
-    if freq_lower in ['daily', 'day']:
-        return reference_date + timedelta(days=1)
-    
-    elif freq_lower in ['weekly', 'week']:
-        return reference_date + timedelta(weeks=1)
-    
-    elif freq_lower in ['bi-weekly', 'biweekly', 'fortnightly']:
-        return reference_date + timedelta(weeks=2)
-    
-    elif freq_lower in ['monthly', 'month']:
-        return reference_date + relativedelta(months=1)
-    
-    elif freq_lower in ['quarterly', 'quarter']:
-        return reference_date + relativedelta(months=3)
-    
-    elif freq_lower in ['semi-annually', 'semiannually', 'semi-annual', 'semiannual']:
-        return reference_date + relativedelta(months=6)
-    
-    elif freq_lower in ['annual', 'annually', 'yearly', 'year']:
-        return reference_date + relativedelta(years=1)
-    
-    # If not recognized, return None
-    return None
+
+    return rule.advance(reference_date)
 
 
 def get_period_dates(normalized_frequency: str, reference_date: Optional[date] = None) -> tuple:
     """
     Get the period start and end dates for a given frequency.
-    
+
     Args:
         normalized_frequency: Normalized frequency string
         reference_date: Reference date (defaults to today)
-        
+
     Returns:
-        Tuple of (period_start, period_end)
+        Tuple of (period_start, period_end); a single day for one-time or
+        unrecognized frequencies
     """
     if reference_date is None:
         reference_date = date.today()
-    
-    freq_lower = normalized_frequency.lower().strip()
-    
-    if freq_lower in ['daily', 'day']:
+
+    rule = get_rule(normalized_frequency)
+    if rule is None:
         return (reference_date, reference_date)
-    
-    elif freq_lower in ['weekly', 'week']:
-        # Start of week (Monday)
-        start = reference_date - timedelta(days=reference_date.weekday())
-        end = start + timedelta(days=6)
-        return (start, end)
-    
-    elif freq_lower in ['bi-weekly', 'biweekly', 'fortnightly']:
-        # Two-week period starting from Monday of current week
-        start = reference_date - timedelta(days=reference_date.weekday())
-        end = start + timedelta(days=13)
-        return (start, end)
-    
-    elif freq_lower in ['monthly', 'month']:
-        # Start of month
-        start = reference_date.replace(day=1)
-        # Last day of month
-        if start.month == 12:
-            end = start.replace(year=start.year + 1, month=1) - timedelta(days=1)
-        else:
-            end = start.replace(month=start.month + 1) - timedelta(days=1)
-        return (start, end)
-    
-    elif freq_lower in ['quarterly', 'quarter']:
-        # Determine quarter
-        quarter = (reference_date.month - 1) // 3
-        start_month = quarter * 3 + 1
-        start = reference_date.replace(month=start_month, day=1)
-        end = start + relativedelta(months=3) - timedelta(days=1)
-        return (start, end)
-    
-    elif freq_lower in ['semi-annually', 'semiannually', 'semi-annual', 'semiannual']:
-        # First or second half of year
-        if reference_date.month <= 6:
-            start = reference_date.replace(month=1, day=1)
-            end = reference_date.replace(month=6, day=30)
-        else:
-            start = reference_date.replace(month=7, day=1)
-            end = reference_date.replace(month=12, day=31)
-        return (start, end)
-    
-    elif freq_lower in ['annual', 'annually', 'yearly', 'year']:
-        # Calendar year
-        start = reference_date.replace(month=1, day=1)
-        end = reference_date.replace(month=12, day=31)
-        return (start, end)
-    
-    # Default to single day
-    return (reference_date, reference_date)
+    return rule.period_for(reference_date)
 
 
 def is_overdue(due_date: date, current_date: Optional[date] = None) -> bool:
@@ -132,3 +208,18 @@ def days_until_due(due_date: date, current_date: Optional[date] = None) -> int:
     if current_date is None:
         current_date = date.today()
     return (due_date - current_date).days
+
+
+def due_within(queryset, window_days: int, current_date: Optional[date] = None):
+    """
+    Narrow an Indicator queryset to rows overdue or due within ``window_days``.
+
+    The filter runs in SQL on ``next_due_date`` (served by the
+    ``(project, next_due_date)`` index) and orders soonest first.
+    """
+    if current_date is None:
+        current_date = date.today()
+    return queryset.filter(
+        next_due_date__isnull=False,
+        next_due_date__lte=current_date + timedelta(days=window_days)
+    ).order_by('next_due_date', 'id')
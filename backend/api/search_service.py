@@ -0,0 +1,230 @@
+"""
+Ranked full-text search over indicators and evidence.
+
+Indicators are matched on standard, indicator, section, description and
+notes; evidence on file name and content. The index lives in the database
+and is kept current by the database itself on every write, including the
+bulk inserts and updates of CSV imports that bypass model signals:
+
+* PostgreSQL: weighted ``tsvector`` expression GIN indexes on
+  ``api_indicator`` and ``api_evidence``, ranked with ``ts_rank``.
+* SQLite: external-content FTS5 tables maintained by triggers, ranked with
+  ``bm25``. SQLite table rebuilds (in later migrations) drop the triggers and
+  renumber rows, so ``install_index`` also runs after every ``migrate``.
+
+Other backends fall back to unranked ``icontains`` matching.
+
+Query words are ANDed and matched as prefixes, so partial input finds
+results while it is typed.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Evidence, Indicator, Project
+from .retrieval import tokenize
+
+KINDS = ('indicator', 'evidence')
+MAX_TERMS = 8
+SNIPPET_LENGTH = 200
+
+INDICATOR_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(standard, '') || ' ' || coalesce(indicator, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(section, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '') || ' ' || coalesce(notes, '')), 'C')"
+)
+EVIDENCE_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(file_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+# (FTS table, content table, columns, bm25 column weights)
+_FTS_TABLES = [
+    ('api_indicator_fts', 'api_indicator', ('standard', 'indicator', 'section', 'description', 'notes'),
+     (10.0, 10.0, 4.0, 2.0, 2.0)),
+    ('api_evidence_fts', 'api_evidence', ('file_name', 'content'), (6.0, 2.0)),
+]
+
+
+def _sqlite_ddl() -> List[str]:
+    statements = []
+    for fts, table, columns, _ in _FTS_TABLES:
+        cols = ', '.join(columns)
+        new = ', '.join(f'new.{c}' for c in columns)
+        old = ', '.join(f'old.{c}' for c in columns)
+        statements += [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', "
+            f"content_rowid='rowid', tokenize='porter unicode61')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new}); END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+    return statements
+
+
+def install_index(conn=connection):
+    """Create (or repair and rebuild) the search index; idempotent"""
+    if conn.vendor == 'postgresql':
+        statements = [
+            f"CREATE INDEX IF NOT EXISTS api_indicator_search_idx ON api_indicator USING GIN (({INDICATOR_VECTOR}))",
+            f"CREATE INDEX IF NOT EXISTS api_evidence_search_idx ON api_evidence USING GIN (({EVIDENCE_VECTOR}))",
+        ]
+    elif conn.vendor == 'sqlite':
+        statements = _sqlite_ddl()
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def drop_index(conn=connection):
+    """Remove the search index"""
+    if conn.vendor == 'postgresql':
+        statements = ["DROP INDEX IF EXISTS api_indicator_search_idx", "DROP INDEX IF EXISTS api_evidence_search_idx"]
+    elif conn.vendor == 'sqlite':
+        statements = []
+        for fts, *_ in _FTS_TABLES:
+            statements += [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ('ai', 'ad', 'au')]
+            statements.append(f"DROP TABLE IF EXISTS {fts}")
+    else:
+        return
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def _project_filter(column: str, project_ids: Optional[Sequence]) -> tuple:
+    if project_ids is None:
+        return '', []
+    prep = Project._meta.pk.get_db_prep_value
+    return (
+        f" AND {column} IN ({', '.join(['%s'] * len(project_ids))})",
+        [prep(project_id, connection) for project_id in project_ids],
+    )
+
+
+def _ranked_sql(terms: List[str], kinds: Sequence[str], project_ids: Optional[Sequence], limit: int):
+    """(sql, params) selecting ``(kind, id, rank)`` best first"""
+    parts, params = [], []
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        if 'indicator' in kinds:
+            where, where_params = _project_filter('project_id', project_ids)
+            parts.append(
+                f"SELECT 'indicator' AS kind, id, ts_rank({INDICATOR_VECTOR}, to_tsquery('english', %s)) AS rank "
+                f"FROM api_indicator WHERE ({INDICATOR_VECTOR}) @@ to_tsquery('english', %s){where}"
+            )
+            params += [tsquery, tsquery, *where_params]
+        if 'evidence' in kinds:
+            where, where_params = _project_filter('i.project_id', project_ids)
+            vector = EVIDENCE_VECTOR.replace('coalesce(', 'coalesce(e.')
+            parts.append(
+                f"SELECT 'evidence' AS kind, e.id, ts_rank({vector}, to_tsquery('english', %s)) AS rank "
+                f"FROM api_evidence e JOIN api_indicator i ON i.id = e.indicator_id "
+                f"WHERE ({vector}) @@ to_tsquery('english', %s){where}"
+            )
+            params += [tsquery, tsquery, *where_params]
+    else:
+        match = ' '.join(f'"{term}"*' for term in terms)
+        (indicator_fts, _, _, indicator_weights), (evidence_fts, _, _, evidence_weights) = _FTS_TABLES
+        if 'indicator' in kinds:
+            where, where_params = _project_filter('i.project_id', project_ids)
+            parts.append(
+                f"SELECT 'indicator' AS kind, i.id, -bm25({indicator_fts}, "
+                f"{', '.join(map(str, indicator_weights))}) AS rank "
+                f"FROM {indicator_fts} JOIN api_indicator i ON i.rowid = {indicator_fts}.rowid "
+                f"WHERE {indicator_fts} MATCH %s{where}"
+            )
+            params += [match, *where_params]
+        if 'evidence' in kinds:
+            where, where_params = _project_filter('i.project_id', project_ids)
+            parts.append(
+                f"SELECT 'evidence' AS kind, e.id, -bm25({evidence_fts}, "
+                f"{', '.join(map(str, evidence_weights))}) AS rank "
+                f"FROM {evidence_fts} JOIN api_evidence e ON e.rowid = {evidence_fts}.rowid "
+                f"JOIN api_indicator i ON i.id = e.indicator_id WHERE {evidence_fts} MATCH %s{where}"
+            )
+            params += [match, *where_params]
+    return ' UNION ALL '.join(parts) + ' ORDER BY rank DESC LIMIT %s', params + [limit]
+
+
+def _fallback_ranked(terms: List[str], kinds: Sequence[str], project_ids: Optional[Sequence], limit: int):
+    ranked = []
+    if 'indicator' in kinds:
+        indicators = Indicator.objects.all()
+        if project_ids is not None:
+            indicators = indicators.filter(project_id__in=project_ids)
+        for term in terms:
+            indicators = indicators.filter(
+                Q(indicator__icontains=term) | Q(standard__icontains=term) | Q(section__icontains=term)
+                | Q(description__icontains=term) | Q(notes__icontains=term)
+            )
+        ranked += [('indicator', pk, 0.0) for pk in indicators.values_list('id', flat=True)[:limit]]
+    if 'evidence' in kinds:
+        evidence = Evidence.objects.all()
+        if project_ids is not None:
+            evidence = evidence.filter(indicator__project_id__in=project_ids)
+        for term in terms:
+            evidence = evidence.filter(Q(content__icontains=term) | Q(file_name__icontains=term))
+        ranked += [('evidence', pk, 0.0) for pk in evidence.values_list('id', flat=True)[:limit]]
+    return ranked[:limit]
+
+
+def search(query: str, project_ids: Optional[Sequence] = None, kinds: Sequence[str] = KINDS,
+           limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Best-ranked indicators and evidence matching ``query``.
+
+    ``project_ids`` limits results to those projects (None: all projects).
+    Three queries: the ranked match and one lookup per result kind.
+    """
+    terms = tokenize(query)[:MAX_TERMS]
+    if not terms or (project_ids is not None and not project_ids):
+        return []
+
+    if connection.vendor in ('postgresql', 'sqlite'):
+        sql, params = _ranked_sql(terms, kinds, project_ids, limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ranked = cursor.fetchall()
+    else:
+        ranked = _fallback_ranked(terms, kinds, project_ids, limit)
+
+    pk_field = Indicator._meta.pk
+    ids = {kind: [pk_field.to_python(pk) for k, pk, _ in ranked if k == kind] for kind in KINDS}
+    indicators = {
+        row['id']: row for row in Indicator.objects.filter(id__in=ids['indicator'])
+        .values('id', 'project_id', 'section', 'standard', 'indicator', 'status')
+    }
+    evidence = {
+        row['id']: row for row in Evidence.objects.filter(id__in=ids['evidence']).values(
+            'id', 'indicator_id', 'indicator__project_id', 'indicator__indicator', 'type', 'file_name', 'content',
+        )
+    }
+
+    results = []
+    for kind, pk, rank in ranked:
+        pk = pk_field.to_python(pk)
+        if kind == 'indicator' and pk in indicators:
+            row = indicators[pk]
+            results.append({
+                'type': kind, 'id': str(pk), 'project_id': str(row['project_id']), 'indicator_id': str(pk),
+                'title': row['indicator'], 'section': row['section'], 'standard': row['standard'],
+                'status': row['status'], 'rank': round(rank, 4),
+            })
+        elif kind == 'evidence' and pk in evidence:
+            row = evidence[pk]
+            results.append({
+                'type': kind, 'id': str(pk), 'project_id': str(row['indicator__project_id']),
+                'indicator_id': str(row['indicator_id']), 'title': row['file_name'] or row['indicator__indicator'],
+                'evidence_type': row['type'], 'snippet': (row['content'] or '')[:SNIPPET_LENGTH],
+                'rank': round(rank, 4),
+            })
+    return results
@@ -1,8 +1,13 @@
+from datetime import date
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import Project, Indicator, Evidence, DriveConfig, UserProfile, UserRole, AuditLog
+from .models import (
+    Project, Indicator, Evidence, DriveConfig, UserProfile, UserRole, AuditLog, AuditAction, ComplianceStatus, Frequency,
+    ImportJob, ImportJobStatus, ProjectReport, ReportStatus
+)
 
 
 def to_camel_case(snake_str):
@@ -117,6 +122,33 @@ class IndicatorSerializer(CamelCaseModelSerializer):
         return super(serializers.ModelSerializer, self).to_internal_value(data)
 
 
+class UpcomingIndicatorSerializer(CamelCaseModelSerializer):
+    """Due-soon indicator for task lists, without the per-row evidence state queries"""
+    evidence = EvidenceSerializer(many=True, read_only=True)
+    project_name = serializers.CharField(source='project.name', read_only=True)
+    days_until_due = serializers.SerializerMethodField()
+    is_overdue = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Indicator
+        fields = [
+            'id', 'project', 'project_name', 'section', 'standard', 'indicator',
+            'frequency', 'assignee', 'responsible_person', 'status', 'last_updated',
+            'evidence_type', 'next_due_date', 'days_until_due', 'is_overdue', 'evidence'
+        ]
+        read_only_fields = fields
+
+    def _days_until_due(self, obj):
+        today = self.context.get('today') or date.today()
+        return (obj.next_due_date - today).days
+
+    def get_days_until_due(self, obj):
+        return self._days_until_due(obj)
+
+    def get_is_overdue(self, obj):
+        return self._days_until_due(obj) < 0
+
+
 class IndicatorCreateSerializer(CamelCaseModelSerializer):
     """Serializer for creating indicators within a project"""
     class Meta:
@@ -169,21 +201,47 @@ class ProjectCreateSerializer(CamelCaseModelSerializer):
 
 
 # AI-related serializers
-class AnalyzeChecklistInputSerializer(serializers.Serializer):
-    indicators = serializers.ListField(child=serializers.DictField())
+class ProjectIndicatorsInputSerializer(serializers.Serializer):
+    """
+    Indicators for an AI endpoint, either posted in full or selected by project.
+
+    With ``project_id`` the server loads only the fields the task needs; the
+    optional ``indicator_ids``, ``section``, ``status`` and ``frequency``
+    narrow the selection. ``write_back`` saves results onto the indicators
+    where the endpoint supports it and requires write access to the project.
+    """
+    indicators = serializers.ListField(child=serializers.DictField(), required=False)
+    project_id = serializers.UUIDField(required=False)
+    indicator_ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    section = serializers.CharField(required=False)
+    status = serializers.ChoiceField(choices=ComplianceStatus.choices, required=False)
+    frequency = serializers.ChoiceField(choices=Frequency.choices, required=False)
+    write_back = serializers.BooleanField(default=False)
 
+    def validate(self, attrs):
+        if 'project_id' not in attrs and 'indicators' not in attrs:
+            raise serializers.ValidationError("Provide either indicators or project_id.")
+        if attrs.get('write_back') and 'project_id' not in attrs:
+            raise serializers.ValidationError({"write_back": "write_back requires project_id."})
+        return attrs
 
-class AnalyzeCategorizationInputSerializer(serializers.Serializer):
-    indicators = serializers.ListField(child=serializers.DictField())
+
+class AnalyzeChecklistInputSerializer(ProjectIndicatorsInputSerializer):
+    pass
+
+
+class AnalyzeCategorizationInputSerializer(ProjectIndicatorsInputSerializer):
+    pass
 
 
 class AskAssistantInputSerializer(serializers.Serializer):
     query = serializers.CharField()
     indicators = serializers.ListField(child=serializers.DictField(), required=False)
+    project_id = serializers.UUIDField(required=False)
 
 
-class ReportSummaryInputSerializer(serializers.Serializer):
-    indicators = serializers.ListField(child=serializers.DictField())
+class ReportSummaryInputSerializer(ProjectIndicatorsInputSerializer):
+    pass
 
 
 class ConvertDocumentInputSerializer(serializers.Serializer):
@@ -191,20 +249,25 @@ class ConvertDocumentInputSerializer(serializers.Serializer):
 
 
 class ComplianceGuideInputSerializer(serializers.Serializer):
-    indicator = serializers.DictField()
+    indicator = serializers.DictField(required=False)
+    indicator_id = serializers.UUIDField(required=False)
 
+    def validate(self, attrs):
+        if 'indicator' not in attrs and 'indicator_id' not in attrs:
+            raise serializers.ValidationError("Provide either indicator or indicator_id.")
+        return attrs
 
 
-class AnalyzeTasksInputSerializer(serializers.Serializer):
-    indicators = serializers.ListField(child=serializers.DictField())
+class AnalyzeTasksInputSerializer(ProjectIndicatorsInputSerializer):
+    pass
 
 
-class AnalyzeIndicatorExplanationsInputSerializer(serializers.Serializer):
-    indicators = serializers.ListField(child=serializers.DictField())
+class AnalyzeIndicatorExplanationsInputSerializer(ProjectIndicatorsInputSerializer):
+    pass
 
 
-class AnalyzeFrequencyGroupingInputSerializer(serializers.Serializer):
-    indicators = serializers.ListField(child=serializers.DictField())
+class AnalyzeFrequencyGroupingInputSerializer(ProjectIndicatorsInputSerializer):
+    pass
 
 
 # Authentication serializers
@@ -309,3 +372,58 @@ class AuditLogSerializer(CamelCaseModelSerializer):
     class Meta:
         model = AuditLog
         fields = '__all__'
+
+
+class AuditLogFilterSerializer(serializers.Serializer):
+    """Query parameters for filtering the audit log"""
+    actor = serializers.IntegerField(required=False)
+    action = serializers.ChoiceField(choices=AuditAction.choices, required=False)
+    entity_type = serializers.CharField(required=False)
+    entity_id = serializers.CharField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if data.get('since') and data.get('until') and data['since'] > data['until']:
+            raise serializers.ValidationError("since must not be after until")
+        return data
+
+
+class ImportJobSerializer(CamelCaseModelSerializer):
+    """Status and progress of a background CSV import"""
+    percent_complete = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'project', 'file_name', 'status', 'rows_processed', 'bytes_processed',
+            'total_bytes', 'percent_complete', 'result', 'error', 'created_at',
+            'started_at', 'finished_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_percent_complete(self, obj):
+        if obj.status == ImportJobStatus.COMPLETED:
+            return 100
+        if not obj.total_bytes:
+            return 0
+        return min(99, int(obj.bytes_processed * 100 / obj.total_bytes))
+
+
+class ProjectReportSerializer(CamelCaseModelSerializer):
+    """Status of a server-generated PDF report"""
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProjectReport
+        fields = [
+            'id', 'project', 'version', 'include_summary', 'status', 'error',
+            'created_at', 'finished_at', 'download_url'
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != ReportStatus.COMPLETED:
+            return None
+        url = f'/api/projects/{obj.project_id}/report/download/'
+        return f'{url}?summary=true' if obj.include_summary else url
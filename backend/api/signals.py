@@ -0,0 +1,54 @@
+"""
+Model signal handlers keeping derived data in sync with writes.
+"""
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import retrieval, search_service
+from .models import Evidence, EvidencePeriod, FrequencyLog, Indicator, Project
+
+
+@receiver(post_save, sender=Indicator)
+def reindex_indicator(sender, instance, **kwargs):
+    retrieval.refresh_indicator(instance.project_id, instance.id)
+
+
+@receiver(post_delete, sender=Indicator)
+def unindex_indicator(sender, instance, **kwargs):
+    retrieval.remove_indicator(instance.project_id, instance.id)
+
+
+@receiver(post_save, sender=Evidence)
+@receiver(post_delete, sender=Evidence)
+def reindex_evidence_indicator(sender, instance, **kwargs):
+    indicator = Indicator.objects.filter(id=instance.indicator_id).values('project_id').first()
+    if indicator:
+        retrieval.refresh_indicator(indicator['project_id'], instance.indicator_id)
+        Project.bump_version(indicator['project_id'])
+
+
+@receiver(post_save, sender=Indicator)
+@receiver(post_delete, sender=Indicator)
+def bump_indicator_project_version(sender, instance, **kwargs):
+    Project.bump_version(instance.project_id)
+
+
+@receiver(post_save, sender=FrequencyLog)
+@receiver(post_delete, sender=FrequencyLog)
+@receiver(post_save, sender=EvidencePeriod)
+@receiver(post_delete, sender=EvidencePeriod)
+def bump_period_project_version(sender, instance, **kwargs):
+    """Sign-offs and expected counts decide frequency-based evidence states"""
+    project_id = Indicator.objects.filter(id=instance.indicator_id).values_list('project_id', flat=True).first()
+    if project_id:
+        Project.bump_version(project_id)
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    """SQLite table rebuilds drop the FTS triggers and renumber rows; restore and rebuild"""
+    connection = connections[using]
+    if sender.name == 'api' and connection.vendor == 'sqlite' \
+            and 'api_indicator_fts' in connection.introspection.table_names():
+        search_service.install_index(connection)
@@ -0,0 +1,132 @@
+"""
+Zip snapshot export of a project (the "evidence pack").
+
+The archive holds ``project.json`` (the project as returned by the API),
+``indicators.csv`` (the ``export.csv`` layout), every stored evidence file
+under ``evidence/<section>/`` and a closing ``manifest.json`` listing each
+evidence row with its archive path, or why it has no file.
+
+The zip is written to an unseekable sink that is drained after every chunk,
+so the archive is produced on the fly: no temporary files, and evidence
+files are copied from storage in ``CHUNK_SIZE`` pieces rather than read
+into memory.
+"""
+import json
+import posixpath
+import zipfile
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .csv_export_service import stream_csv
+from .csv_parsing import CHUNK_SIZE, iter_chunks
+from .models import Evidence, Project
+
+
+class _ZipSink:
+    """Write-only, unseekable file object collecting zip output until drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def storage_path(file_url: Optional[str]) -> Optional[str]:
+    """Default storage path of an uploaded evidence file, or None for external/unsafe URLs"""
+    if not file_url or '://' in file_url:
+        return None
+    path = file_url.lstrip('/')
+    for prefix in (settings.MEDIA_URL.strip('/') + '/', 'media/'):
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    if not path or '..' in path.split('/'):
+        return None
+    return path
+
+
+def _archive_name(section: str, evidence_id, name: str) -> str:
+    filename = posixpath.basename((name or '').replace('\\', '/')) or 'file'
+    return f'evidence/{slugify(section)[:60] or "section"}/{evidence_id}-{filename}'
+
+
+def _project_json(project: Project) -> bytes:
+    from .serializers import ProjectSerializer
+    project = Project.objects.prefetch_related('indicators', 'indicators__evidence').get(id=project.id)
+    return json.dumps(ProjectSerializer(project).data, cls=DjangoJSONEncoder, indent=2).encode('utf-8')
+
+
+def iter_snapshot(project: Project, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Bytes of the snapshot zip, produced incrementally"""
+    return (chunk for chunk in _write_snapshot(project, chunk_size) if chunk)
+
+
+def _write_snapshot(project: Project, chunk_size: int) -> Iterator[bytes]:
+    sink = _ZipSink()
+    manifest = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('project.json', _project_json(project))
+        yield sink.drain()
+
+        with archive.open('indicators.csv', 'w') as dest:
+            for line in stream_csv(project):
+                dest.write(line.encode('utf-8'))
+        yield sink.drain()
+
+        evidence = (
+            Evidence.objects.filter(indicator__project=project)
+            .order_by('indicator__section', 'indicator__standard', 'date_uploaded')
+            .values_list('id', 'indicator_id', 'indicator__section', 'type', 'file_name', 'file_url',
+                         'drive_web_view_link', 'review_state')
+            .iterator()
+        )
+        for evidence_id, indicator_id, section, kind, file_name, file_url, drive_link, review_state in evidence:
+            entry = {
+                'id': str(evidence_id), 'indicator_id': str(indicator_id), 'type': kind,
+                'file_name': file_name, 'review_state': review_state, 'path': None,
+            }
+            manifest.append(entry)
+            path = storage_path(file_url)
+            if path is None:
+                entry['note'] = f'Linked file: {drive_link or file_url}' if (drive_link or file_url) else 'No file'
+                continue
+            try:
+                source = default_storage.open(path, 'rb')
+            except (FileNotFoundError, OSError):
+                entry['note'] = 'File missing from storage'
+                continue
+            entry['path'] = _archive_name(section, evidence_id, file_name or path)
+            with source, archive.open(entry['path'], 'w', force_zip64=True) as dest:
+                for chunk in iter_chunks(source, chunk_size):
+                    dest.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+
+        archive.writestr('manifest.json', json.dumps({
+            'project_id': str(project.id),
+            'project_name': project.name,
+            'exported_at': timezone.now().isoformat(),
+            'evidence': manifest,
+        }, indent=2))
+    # Closing the archive writes the central directory
+    yield sink.drain()
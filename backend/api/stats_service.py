@@ -0,0 +1,341 @@
+"""
+Project statistics computed in the database.
+
+Status counts, per-section breakdowns and score totals come from one
+``GROUP BY section, status`` query; evidence-state histograms from one
+per-indicator aggregate of evidence counts, current-period counts and
+sign-offs (classified with the rules of ``Indicator.get_evidence_state``,
+after one query for the recurring frequencies in use); the review backlog
+from one ``GROUP BY review_state`` query.
+
+Results are cached under the project's ``version``, which every indicator,
+evidence, frequency log or evidence period write increments, so a change is visible on the next request. The
+date is part of the key because frequency-based evidence states depend on
+the current period.
+
+``portfolio_rollup`` gives admins the same figures for every project at once,
+from three grouped queries however many projects there are.
+
+``take_snapshots`` stores the day's status, evidence-state and score totals of
+every project in ``ComplianceSnapshot`` (one upsert per run, so re-running on
+the same day overwrites), and ``compliance_trend`` reads a date range of them
+back with one query on the ``(project, date)`` unique index.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, Min, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .compliance_service import MATERIALIZED_NOTE, is_period_met
+from .models import (
+    ComplianceSnapshot, ComplianceStatus, Evidence, EvidencePeriod, EvidenceReviewState, EvidenceState,
+    FrequencyLog, Indicator, IndicatorEvidenceType, Project
+)
+from .scheduling_service import get_rule
+
+PENDING_REVIEW_STATES = [EvidenceReviewState.DRAFT, EvidenceReviewState.UNDER_REVIEW]
+
+# Sort keys accepted by portfolio_rollup (prefix with '-' for descending)
+PORTFOLIO_ORDERING = [
+    'weighted_compliance', 'overdue', 'pending_reviews', 'evidence_total', 'total', 'name',
+]
+
+
+def _percent(part, whole) -> float:
+    return round(100 * part / whole, 1) if whole else 0.0
+
+
+def _status_breakdown(rows) -> Dict[str, Any]:
+    """Counts and score totals for ``(status, count, score)`` rows"""
+    counts = {value: 0 for value in ComplianceStatus.values}
+    score_total = applicable = compliant = 0
+    for status, n, score in rows:
+        counts[status] = counts.get(status, 0) + n
+        score = score or 0
+        score_total += score
+        if status != ComplianceStatus.NOT_APPLICABLE:
+            applicable += score
+        if status == ComplianceStatus.COMPLIANT:
+            compliant += score
+    return {
+        'total': sum(counts.values()),
+        'status_counts': counts,
+        'score_total': score_total,
+        'applicable_score': applicable,
+        'compliant_score': compliant,
+        'weighted_compliance': _percent(compliant, applicable),
+    }
+
+
+def _current_period_met(row: Dict[str, Any]) -> bool:
+    return is_period_met(row['period_accepted'], row['period_expected'] or 1, row['signed_off'])
+
+
+def _evidence_state(row: Dict[str, Any]) -> str:
+    """``Indicator.get_evidence_state`` for an aggregated row"""
+    recurring = row['evidence_type'] == IndicatorEvidenceType.FREQUENCY and get_rule(row['frequency']) is not None
+    if not row['evidence_total']:
+        return EvidenceState.ACCEPTED if recurring and _current_period_met(row) else EvidenceState.NO_EVIDENCE
+    if row['rejected']:
+        return EvidenceState.REJECTED
+    if row['pending']:
+        return EvidenceState.REVIEW_PENDING
+    if not row['accepted']:
+        return EvidenceState.PARTIAL_EVIDENCE
+    if row['evidence_type'] == IndicatorEvidenceType.TEXT:
+        return EvidenceState.ACCEPTED if row['accepted_text'] else EvidenceState.PARTIAL_EVIDENCE
+    if row['evidence_type'] == IndicatorEvidenceType.FILE:
+        return EvidenceState.ACCEPTED if row['accepted_file'] else EvidenceState.PARTIAL_EVIDENCE
+    if row['evidence_type'] == IndicatorEvidenceType.FREQUENCY:
+        return EvidenceState.ACCEPTED if not recurring or _current_period_met(row) else EvidenceState.PARTIAL_EVIDENCE
+    return EvidenceState.PARTIAL_EVIDENCE
+
+
+def _current_periods(indicators, today: date) -> Dict[str, tuple]:
+    """Current period per recurring frequency used by ``indicators``' frequency-based rows (one query)"""
+    periods = {}
+    for frequency in (
+        indicators.filter(evidence_type=IndicatorEvidenceType.FREQUENCY)
+        .values_list('frequency', flat=True).distinct().order_by()
+    ):
+        rule = get_rule(frequency)
+        if rule is not None:
+            periods[frequency] = rule.period_for(today)
+    return periods
+
+
+def _evidence_rows(indicators, today: date, *fields: str):
+    """
+    Per-indicator evidence aggregates of ``indicators`` (plus ``fields``), as read by ``_evidence_state``.
+
+    Frequency-based rows also get their current period's accepted evidence
+    count, expected count and user sign-off, the inputs of ``is_period_met``.
+    """
+    accepted = Q(evidence__review_state=EvidenceReviewState.ACCEPTED)
+    periods = _current_periods(indicators, today)
+    in_period = Q(pk__in=[])
+    current_log = Q(pk__in=[])
+    for frequency, (start, end) in periods.items():
+        in_period |= Q(frequency=frequency, evidence__date_uploaded__date__range=(start, end))
+        current_log |= Q(indicator__frequency=frequency, period_start=start)
+    return (
+        indicators
+        .values('id', 'evidence_type', 'frequency', *fields)
+        .annotate(
+            evidence_total=Count('evidence'),
+            rejected=Count('evidence', filter=Q(evidence__review_state=EvidenceReviewState.REJECTED)),
+            pending=Count('evidence', filter=Q(evidence__review_state__in=PENDING_REVIEW_STATES)),
+            accepted=Count('evidence', filter=accepted),
+            accepted_text=Count('evidence', filter=accepted & Q(evidence__type__in=['note', 'document'])
+                                & ~Q(evidence__content='') & Q(evidence__content__isnull=False)),
+            accepted_file=Count('evidence', filter=accepted
+                                & (Q(evidence__drive_file_id__isnull=False) | Q(evidence__file_url__isnull=False))
+                                & ~Q(evidence__drive_file_id='') & ~Q(evidence__file_url='')),
+            period_accepted=Count('evidence', filter=accepted & in_period),
+            period_expected=Subquery(
+                EvidencePeriod.objects.filter(current_log, indicator=OuterRef('pk'))
+                .values('expected_evidence_count')[:1]
+            ),
+            signed_off=Exists(
+                FrequencyLog.objects.filter(current_log, indicator=OuterRef('pk'), is_compliant=True)
+                .exclude(notes=MATERIALIZED_NOTE)
+            ),
+        )
+        .order_by()
+    )
+
+
+def compute_stats(project_id, today: Optional[date] = None) -> Dict[str, Any]:
+    """Uncached statistics for a project (four queries)"""
+    today = today or timezone.localdate()
+
+    section_rows = (
+        Indicator.objects.filter(project_id=project_id)
+        .values('section', 'status')
+        .annotate(n=Count('id'), score=Sum('score'))
+        .order_by('section', 'status')
+    )
+    by_section: Dict[str, list] = {}
+    for row in section_rows:
+        by_section.setdefault(row['section'], []).append((row['status'], row['n'], row['score']))
+    overall = _status_breakdown(row for rows in by_section.values() for row in rows)
+
+    evidence_states = {value: 0 for value in EvidenceState.values}
+    for row in _evidence_rows(Indicator.objects.filter(project_id=project_id), today):
+        evidence_states[_evidence_state(row)] += 1
+
+    review = {value: {'count': 0, 'oldest': None} for value in EvidenceReviewState.values}
+    for row in (
+        Evidence.objects.filter(indicator__project_id=project_id)
+        .values('review_state')
+        .annotate(n=Count('id'), oldest=Min('date_uploaded'))
+        .order_by()
+    ):
+        review[row['review_state']] = {'count': row['n'], 'oldest': row['oldest']}
+    pending_dates = [review[state]['oldest'] for state in PENDING_REVIEW_STATES if review[state]['oldest']]
+
+    return {
+        'project_id': str(project_id),
+        'total_indicators': overall['total'],
+        'status_counts': overall['status_counts'],
+        'score': {key: overall[key] for key in (
+            'score_total', 'applicable_score', 'compliant_score', 'weighted_compliance'
+        )},
+        'sections': [
+            {'section': section, **_status_breakdown(rows)} for section, rows in by_section.items()
+        ],
+        'evidence_states': evidence_states,
+        'review_backlog': {
+            **{state: review[state]['count'] for state in EvidenceReviewState.values},
+            'pending_total': sum(review[state]['count'] for state in PENDING_REVIEW_STATES),
+            'oldest_pending': min(pending_dates) if pending_dates else None,
+        },
+    }
+
+
+def get_stats(project: Project) -> Dict[str, Any]:
+    """Statistics for a project, cached until its next write (or the next day)"""
+    version = Project.objects.filter(id=project.id).values_list('version', flat=True).first()
+    today = timezone.localdate()
+    key = f'project-stats:{project.id}:{version}:{today.isoformat()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(project.id, today)
+        stats['version'] = version
+        cache.set(key, stats, settings.PROJECT_STATS_CACHE_TTL)
+    return stats
+
+
+def portfolio_rollup(ordering: str = 'weighted_compliance', today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Per-project and overall rollups for all projects (three queries).
+
+    ``ordering`` is one of ``PORTFOLIO_ORDERING``, optionally prefixed with
+    ``-``; the default puts the least compliant projects first. Ties are
+    broken by project name.
+    """
+    field = ordering.lstrip('-')
+    if field not in PORTFOLIO_ORDERING:
+        raise ValueError(f"ordering must be one of {', '.join(PORTFOLIO_ORDERING)} (optionally prefixed with '-')")
+    today = today or timezone.localdate()
+
+    status_rows: Dict[Any, list] = {}
+    overdue: Dict[Any, int] = {}
+    for row in (
+        Indicator.objects.values('project_id', 'status')
+        .annotate(
+            n=Count('id'),
+            score=Sum('score'),
+            overdue=Count('id', filter=Q(next_due_date__lt=today) & ~Q(status=ComplianceStatus.NOT_APPLICABLE)),
+        )
+        .order_by()
+    ):
+        status_rows.setdefault(row['project_id'], []).append((row['status'], row['n'], row['score']))
+        overdue[row['project_id']] = overdue.get(row['project_id'], 0) + row['overdue']
+
+    evidence = {
+        row['indicator__project_id']: row
+        for row in (
+            Evidence.objects.values('indicator__project_id')
+            .annotate(
+                total=Count('id'),
+                pending=Count('id', filter=Q(review_state__in=PENDING_REVIEW_STATES)),
+                rejected=Count('id', filter=Q(review_state=EvidenceReviewState.REJECTED)),
+                oldest_pending=Min('date_uploaded', filter=Q(review_state__in=PENDING_REVIEW_STATES)),
+            )
+            .order_by()
+        )
+    }
+
+    projects: List[Dict[str, Any]] = []
+    for project in Project.objects.values('id', 'name', 'owner__username', 'created_at').order_by():
+        ev = evidence.get(project['id'], {})
+        projects.append({
+            'project_id': str(project['id']),
+            'name': project['name'],
+            'owner': project['owner__username'],
+            'created_at': project['created_at'],
+            **_status_breakdown(status_rows.get(project['id'], [])),
+            'overdue': overdue.get(project['id'], 0),
+            'evidence_total': ev.get('total', 0),
+            'pending_reviews': ev.get('pending', 0),
+            'rejected_evidence': ev.get('rejected', 0),
+            'oldest_pending': ev.get('oldest_pending'),
+        })
+
+    projects.sort(key=lambda p: p['name'].lower())
+    projects.sort(key=lambda p: p[field] if field != 'name' else p['name'].lower(), reverse=ordering.startswith('-'))
+
+    summary = _status_breakdown(row for rows in status_rows.values() for row in rows)
+    summary.update({
+        'project_count': len(projects),
+        'overdue': sum(overdue.values()),
+        'evidence_total': sum(row['total'] for row in evidence.values()),
+        'pending_reviews': sum(row['pending'] for row in evidence.values()),
+        'rejected_evidence': sum(row['rejected'] for row in evidence.values()),
+    })
+    return {'summary': summary, 'ordering': ordering, 'projects': projects}
+
+
+SNAPSHOT_FIELDS = [
+    'total_indicators', 'status_counts', 'evidence_states', 'score_total', 'applicable_score', 'compliant_score',
+]
+
+
+def take_snapshots(today: Optional[date] = None, project_ids: Optional[Iterable] = None) -> int:
+    """
+    Upsert today's ``ComplianceSnapshot`` for every project (or ``project_ids``).
+
+    Three grouped queries and one bulk upsert; returns the number of snapshots
+    written.
+    """
+    today = today or timezone.localdate()
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(id__in=list(project_ids))
+    project_ids = list(projects.values_list('id', flat=True))
+    indicators = Indicator.objects.filter(project_id__in=project_ids)
+
+    status_rows: Dict[Any, list] = {}
+    for row in indicators.values('project_id', 'status').annotate(n=Count('id'), score=Sum('score')).order_by():
+        status_rows.setdefault(row['project_id'], []).append((row['status'], row['n'], row['score']))
+
+    evidence_states: Dict[Any, Dict[str, int]] = {
+        project_id: {value: 0 for value in EvidenceState.values} for project_id in project_ids
+    }
+    for row in _evidence_rows(indicators, today, 'project_id').iterator(chunk_size=2000):
+        evidence_states[row['project_id']][_evidence_state(row)] += 1
+
+    snapshots = []
+    for project_id in project_ids:
+        breakdown = _status_breakdown(status_rows.get(project_id, []))
+        snapshots.append(ComplianceSnapshot(
+            project_id=project_id,
+            date=today,
+            total_indicators=breakdown['total'],
+            status_counts=breakdown['status_counts'],
+            evidence_states=evidence_states[project_id],
+            score_total=breakdown['score_total'],
+            applicable_score=breakdown['applicable_score'],
+            compliant_score=breakdown['compliant_score'],
+        ))
+    ComplianceSnapshot.objects.bulk_create(
+        snapshots, batch_size=500, update_conflicts=True,
+        unique_fields=['project', 'date'], update_fields=SNAPSHOT_FIELDS + ['updated_at'],
+    )
+    return len(snapshots)
+
+
+def compliance_trend(project_id, start: date, end: date) -> List[Dict[str, Any]]:
+    """Stored daily snapshots of a project from ``start`` to ``end`` inclusive, oldest first (one query)"""
+    points = list(
+        ComplianceSnapshot.objects.filter(project_id=project_id, date__range=(start, end))
+        .order_by('date')
+        .values('date', *SNAPSHOT_FIELDS)
+    )
+    for point in points:
+        point['weighted_compliance'] = _percent(point['compliant_score'], point['applicable_score'])
+    return points
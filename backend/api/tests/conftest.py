@@ -116,3 +116,76 @@ def api_client():
     from rest_framework.test import APIClient
     return APIClient()
 
+
+@pytest.fixture
+def contributor_user(db):
+    """Create a contributor user"""
+    user = User.objects.create_user(
+        username='contributor',
+        email='contributor@test.com',
+        password='testpass123'
+    )
+    UserProfile.objects.create(user=user, role=UserRole.CONTRIBUTOR)
+    return user
+
+
+@pytest.fixture
+def contributor_token(contributor_user):
+    """Get JWT token for contributor user"""
+    refresh = RefreshToken.for_user(contributor_user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
+
+@pytest.fixture
+def contributor_project(contributor_user):
+    """Create a project owned by the contributor user"""
+    project = Project.objects.create(
+        name='Contributor Project',
+        description='Owned by contributor',
+        owner=contributor_user
+    )
+    project.members.add(contributor_user)
+    return project
+
+
+@pytest.fixture
+def reviewer_user(db):
+    """Create a reviewer user"""
+    user = User.objects.create_user(
+        username='reviewer',
+        email='reviewer@test.com',
+        password='testpass123'
+    )
+    UserProfile.objects.create(user=user, role=UserRole.REVIEWER)
+    return user
+
+
+@pytest.fixture
+def reviewer_token(reviewer_user):
+    """Get JWT token for reviewer user"""
+    refresh = RefreshToken.for_user(reviewer_user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
+
+@pytest.fixture(autouse=True)
+def sync_audit_log(settings):
+    """Write audit entries inline so tests can read them back immediately"""
+    settings.AUDIT_LOG_ASYNC = False
+
+
+@pytest.fixture(autouse=True)
+def sync_import_jobs(settings):
+    """Run CSV import jobs inline instead of on the worker pool"""
+    settings.IMPORT_JOBS_ASYNC = False
+
+
+@pytest.fixture(autouse=True)
+def sync_reports(settings):
+    """Generate PDF reports inline instead of on the worker pool"""
+    settings.REPORTS_ASYNC = False
@@ -0,0 +1,176 @@
+"""
+Tests for the Gemini concurrency limiter and circuit breaker.
+"""
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from api import ai_services, ai_metrics, ai_guard
+
+
+@pytest.fixture(autouse=True)
+def reset_guard(settings):
+    settings.AI_MAX_CONCURRENT_CALLS = 2
+    settings.AI_SLOT_WAIT_SECONDS = 0
+    settings.AI_CIRCUIT_FAILURE_THRESHOLD = 3
+    settings.AI_CIRCUIT_SLOW_CALL_SECONDS = 30
+    settings.AI_CIRCUIT_RECOVERY_SECONDS = 60
+    ai_guard.circuit_breaker.reset()
+    ai_guard.concurrency_limiter.reset()
+    ai_guard.stats.reset()
+    ai_metrics.registry.reset()
+    yield
+    ai_guard.circuit_breaker.reset()
+    ai_guard.concurrency_limiter.reset()
+
+
+@pytest.fixture
+def gemini_client(monkeypatch):
+    """Fake Gemini client whose model always raises"""
+    model = MagicMock()
+    model.generate_content.side_effect = RuntimeError('upstream timeout')
+    client = MagicMock()
+    client.GenerativeModel.return_value = model
+    monkeypatch.setattr(ai_services, 'get_gemini_client', lambda: client)
+    return model
+
+
+class TestCircuitBreaker:
+    """Tests for circuit breaker state transitions"""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = ai_guard.circuit_breaker
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure()
+
+        assert breaker.state == ai_guard.OPEN
+        assert not breaker.allow_request()
+        assert ai_guard.stats.transitions == {'closed->open': 1}
+
+    def test_success_resets_failure_count(self):
+        breaker = ai_guard.circuit_breaker
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        breaker.record_failure()
+
+        assert breaker.state == ai_guard.CLOSED
+
+    def test_slow_calls_count_as_failures(self, settings):
+        settings.AI_CIRCUIT_SLOW_CALL_SECONDS = 1
+        breaker = ai_guard.circuit_breaker
+        for _ in range(3):
+            breaker.record_success(5.0)
+
+        assert breaker.state == ai_guard.OPEN
+
+    def test_half_open_allows_single_probe(self, settings):
+        settings.AI_CIRCUIT_RECOVERY_SECONDS = 0
+        breaker = ai_guard.circuit_breaker
+        for _ in range(3):
+            breaker.record_failure()
+
+        assert breaker.allow_request()
+        assert breaker.state == ai_guard.HALF_OPEN
+        assert not breaker.allow_request()
+
+        breaker.record_success(0.2)
+        assert breaker.state == ai_guard.CLOSED
+        assert ai_guard.stats.transitions == {
+            'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1
+        }
+
+    def test_failed_probe_reopens(self, settings):
+        settings.AI_CIRCUIT_RECOVERY_SECONDS = 0
+        breaker = ai_guard.circuit_breaker
+        for _ in range(3):
+            breaker.record_failure()
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == ai_guard.OPEN
+        assert ai_guard.stats.transitions['half_open->open'] == 1
+
+    def test_only_the_probe_decides_half_open(self, settings):
+        settings.AI_CIRCUIT_RECOVERY_SECONDS = 0
+        breaker = ai_guard.circuit_breaker
+        for _ in range(3):
+            breaker.record_failure()
+        assert breaker.allow_request()
+
+        # Calls already in flight on other threads finish while the probe runs
+        for outcome in (breaker.record_failure, lambda: breaker.record_success(0.1)):
+            thread = threading.Thread(target=outcome)
+            thread.start()
+            thread.join()
+        assert breaker.state == ai_guard.HALF_OPEN
+
+        breaker.record_success(0.1)
+        assert breaker.state == ai_guard.CLOSED
+
+    def test_in_flight_success_does_not_close_open_breaker(self):
+        breaker = ai_guard.circuit_breaker
+        for _ in range(3):
+            breaker.record_failure()
+
+        breaker.record_success(0.1)
+
+        assert breaker.state == ai_guard.OPEN
+        assert not breaker.allow_request()
+
+    def test_concurrent_failures_are_all_counted(self, settings):
+        settings.AI_CIRCUIT_FAILURE_THRESHOLD = 40
+        breaker = ai_guard.circuit_breaker
+        threads = [threading.Thread(target=lambda: [breaker.record_failure() for _ in range(10)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert breaker.snapshot()['consecutive_failures'] == 40
+        assert breaker.state == ai_guard.OPEN
+        assert ai_guard.stats.transitions == {'closed->open': 1}
+
+
+class TestAIServicesUnderGuard:
+    """Tests for ai_services behaviour while the breaker is open"""
+
+    def test_open_circuit_returns_heuristic_fallback_without_calling_model(self, gemini_client):
+        indicators = [{'id': '1', 'status': 'Non-Compliant', 'indicator': 'Fire drill'}]
+        for _ in range(3):
+            ai_services.analyze_tasks(indicators)
+        assert gemini_client.generate_content.call_count == 3
+
+        result = ai_services.analyze_tasks(indicators)
+
+        assert gemini_client.generate_content.call_count == 3
+        assert result[0]['isActionableByAI'] is True
+        fallbacks = ai_metrics.registry.snapshot()['functions']['analyze_tasks'][ai_services.FLASH_MODEL]['fallbacks']
+        assert fallbacks == {'error': 3, 'circuit_open': 1}
+
+
+class TestConcurrencyLimiter:
+    """Tests for the cross-worker concurrency cap"""
+
+    def test_rejects_when_all_slots_busy(self):
+        limiter = ai_guard.concurrency_limiter
+        with limiter.slot():
+            with limiter.slot():
+                assert limiter.in_flight() == 2
+                with pytest.raises(ai_guard.ConcurrencyLimitError):
+                    with limiter.slot():
+                        pass
+        assert limiter.in_flight() == 0
+        assert ai_guard.stats.rejected_calls == 1
+
+    def test_rejected_call_falls_back(self):
+        model = MagicMock()
+        with patch('api.ai_services.get_flash_model', return_value=model):
+            with ai_guard.concurrency_limiter.slot(), ai_guard.concurrency_limiter.slot():
+                result = ai_services.ask_assistant('What is a SOP?')
+
+        model.generate_content.assert_not_called()
+        assert result.startswith('I encountered an error')
@@ -0,0 +1,91 @@
+"""
+Tests for AI call instrumentation.
+"""
+import pytest
+from unittest.mock import patch, MagicMock
+from rest_framework import status
+
+from api import ai_services, ai_metrics, ai_guard
+
+
+@pytest.fixture(autouse=True)
+def reset_ai_metrics():
+    ai_metrics.registry.reset()
+    ai_guard.circuit_breaker.reset()
+    yield
+    ai_metrics.registry.reset()
+    ai_guard.circuit_breaker.reset()
+
+
+def _series(function, model):
+    return ai_metrics.registry.snapshot()['functions'][function][model]
+
+
+class TestAIMetrics:
+    """Tests for the AI metrics registry and instrumentation"""
+
+    def test_estimate_tokens(self):
+        assert ai_metrics.estimate_tokens('') == 0
+        assert ai_metrics.estimate_tokens('abcd') == 1
+        assert ai_metrics.estimate_tokens('abcde') == 2
+
+    def test_fallback_recorded_when_model_unavailable(self, monkeypatch):
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+        ai_services.analyze_tasks([{'id': '1', 'status': 'Not Started', 'indicator': 'Test'}])
+
+        series = _series('analyze_tasks', ai_services.FLASH_MODEL)
+        assert series['fallbacks'] == {'unavailable': 1}
+        assert series['calls'] == 0
+
+    def test_successful_call_records_latency_and_sizes(self):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text='```json\n{"manual": ["1"]}\n```')
+        with patch('api.ai_services.get_flash_model', return_value=model):
+            result = ai_services.analyze_categorization([{'id': '1', 'indicator': 'Test'}])
+
+        assert result['manual'] == ['1']
+        series = _series('analyze_categorization', ai_services.FLASH_MODEL)
+        assert series['calls'] == 1
+        assert series['errors'] == 0
+        assert series['latency_seconds']['count'] == 1
+        assert series['prompt_chars_total'] > 0
+        assert series['response_chars_total'] > 0
+        assert series['fallbacks_total'] == 0
+
+    def test_invalid_json_counts_parse_failure_and_fallback(self):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text='not json')
+        with patch('api.ai_services.get_pro_model', return_value=model):
+            result = ai_services.analyze_checklist([{'id': '1', 'indicator': 'Test'}])
+
+        assert result == [{'id': '1', 'indicator': 'Test'}]
+        series = _series('analyze_checklist', ai_services.PRO_MODEL)
+        assert series['json_parse_failures'] == 1
+        assert series['fallbacks'] == {'error': 1}
+
+    def test_model_exception_counts_error(self):
+        model = MagicMock()
+        model.generate_content.side_effect = RuntimeError('boom')
+        with patch('api.ai_services.get_flash_model', return_value=model):
+            ai_services.ask_assistant('What is compliance?')
+
+        series = _series('ask_assistant', ai_services.FLASH_MODEL)
+        assert series['calls'] == 1
+        assert series['errors'] == 1
+        assert series['fallbacks'] == {'error': 1}
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    """Tests for AI metrics exposure on /api/metrics/"""
+
+    def test_metrics_include_ai_section(self, api_client, admin_token, monkeypatch):
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+        ai_services.generate_report_summary([])
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_token["access"]}')
+
+        response = api_client.get('/api/metrics/')
+
+        assert response.status_code == status.HTTP_200_OK
+        functions = response.data['ai']['functions']
+        assert functions['generate_report_summary'][ai_services.FLASH_MODEL]['fallbacks'] == {'unavailable': 1}
@@ -0,0 +1,171 @@
+"""
+Tests for AI endpoints that load indicators server-side from a project.
+"""
+from unittest.mock import patch
+
+import pytest
+from rest_framework import status
+
+from api.models import AuditLog, ComplianceStatus, Frequency, Indicator
+
+
+@pytest.fixture
+def indicators(contributor_project):
+    return [
+        Indicator.objects.create(
+            project=contributor_project, section='QM', standard='QM-1',
+            indicator='Quality policy is documented as an SOP', status=ComplianceStatus.NOT_STARTED,
+        ),
+        Indicator.objects.create(
+            project=contributor_project, section='QM', standard='QM-2',
+            indicator='Fridge temperature checked', frequency=Frequency.DAILY,
+            status=ComplianceStatus.COMPLIANT,
+        ),
+        Indicator.objects.create(
+            project=contributor_project, section='Safety', standard='S-1',
+            indicator='Fire extinguisher available', description='Existing description',
+            status=ComplianceStatus.NOT_STARTED,
+        ),
+    ]
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.mark.django_db
+class TestProjectInputs:
+    """Tests for selecting indicators by project, filters and IDs"""
+
+    def test_loads_only_task_fields(self, owner_client, contributor_project, indicators):
+        with patch('api.ai_services.analyze_tasks', return_value=[]) as mock_tasks:
+            response = owner_client.post('/api/analyze-tasks/', {'project_id': str(contributor_project.id)}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        loaded = mock_tasks.call_args[0][0]
+        assert len(loaded) == 3
+        assert set(loaded[0]) == {'id', 'indicator', 'status', 'frequency'}
+        assert isinstance(loaded[0]['id'], str)
+
+    def test_filters_and_ids_narrow_selection(self, owner_client, contributor_project, indicators):
+        with patch('api.ai_services.generate_report_summary', return_value='ok') as mock_summary:
+            owner_client.post('/api/report-summary/', {
+                'project_id': str(contributor_project.id), 'section': 'QM', 'status': ComplianceStatus.NOT_STARTED,
+            }, format='json')
+        assert [row['id'] for row in mock_summary.call_args[0][0]] == [str(indicators[0].id)]
+
+        with patch('api.ai_services.analyze_indicator_explanations', return_value={}) as mock_explain:
+            owner_client.post('/api/analyze-indicator-explanations/', {
+                'project_id': str(contributor_project.id), 'indicator_ids': [str(indicators[2].id)],
+            }, format='json')
+        assert [row['id'] for row in mock_explain.call_args[0][0]] == [str(indicators[2].id)]
+
+    def test_requires_indicators_or_project(self, owner_client):
+        response = owner_client.post('/api/analyze-categorization/', {}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_posted_indicators_still_accepted(self, owner_client):
+        with patch('api.ai_services.analyze_tasks', return_value=[]) as mock_tasks:
+            response = owner_client.post('/api/analyze-tasks/', {'indicators': [{'id': '1'}]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_tasks.call_args[0][0] == [{'id': '1'}]
+
+    def test_inaccessible_project_is_not_found(self, api_client, admin_user, reviewer_token, contributor_project):
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {reviewer_token["access"]}')
+        response = api_client.post(
+            '/api/analyze-tasks/', {'project_id': str(contributor_project.id)}, format='json'
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_compliance_guide_by_indicator_id(self, owner_client, indicators):
+        with patch('api.ai_services.generate_compliance_guide', return_value='# Guide') as mock_guide:
+            response = owner_client.post('/api/compliance-guide/', {'indicator_id': str(indicators[0].id)}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_guide.call_args[0][0]['indicator'] == indicators[0].indicator
+
+
+@pytest.mark.django_db
+class TestWriteBack:
+    """Tests for saving AI results onto indicators with bulk_update"""
+
+    def test_categorization_write_back(self, owner_client, contributor_project, indicators, monkeypatch):
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+        response = owner_client.post('/api/analyze-categorization/', {
+            'project_id': str(contributor_project.id), 'write_back': True,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        stored = dict(Indicator.objects.values_list('id', 'ai_categorization'))
+        assert all(stored[ind.id] for ind in indicators)
+        assert stored[indicators[0].id] == 'ai_fully_manageable'
+        assert AuditLog.objects.filter(entity_id=str(contributor_project.id), action='UPDATE').exists()
+
+    def test_frequency_write_back(self, owner_client, contributor_project, indicators):
+        result = {'one_time': [], 'daily': [str(indicators[1].id)], 'weekly': [], 'monthly': [str(indicators[0].id)],
+                  'quarterly': [], 'annually': [str(indicators[2].id), 'not-a-uuid']}
+        with patch('api.ai_services.analyze_frequency_grouping', return_value=result):
+            response = owner_client.post('/api/analyze-frequency-grouping/', {
+                'project_id': str(contributor_project.id), 'write_back': True,
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        stored = dict(Indicator.objects.values_list('id', 'frequency'))
+        assert stored[indicators[0].id] == Frequency.MONTHLY
+        assert stored[indicators[2].id] == Frequency.ANNUALLY
+
+    def test_checklist_write_back_fills_missing_fields(self, owner_client, contributor_project, indicators):
+        Indicator.objects.filter(id=indicators[1].id).update(score=0)
+        enriched = [
+            {'id': str(indicators[0].id), 'description': 'Written quality policy', 'frequency': 'Annually', 'score': 50},
+            {'id': str(indicators[1].id), 'description': 'Daily log', 'frequency': 'Weekly', 'score': 30},
+            {'id': str(indicators[2].id), 'description': 'Replaced', 'score': 80},
+        ]
+        with patch('api.ai_services.analyze_checklist', return_value=enriched):
+            response = owner_client.post('/api/analyze-checklist/', {
+                'project_id': str(contributor_project.id), 'write_back': True,
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        # The third indicator already has a description and a score
+        assert response.data['updated'] == 2
+        for ind in indicators:
+            ind.refresh_from_db()
+        assert (indicators[0].description, indicators[0].frequency, indicators[0].score) == (
+            'Written quality policy', Frequency.ANNUALLY, 10
+        )
+        assert (indicators[1].description, indicators[1].frequency, indicators[1].score) == (
+            'Daily log', Frequency.DAILY, 30
+        )
+        assert (indicators[2].description, indicators[2].score) == ('Existing description', 10)
+
+    def test_checklist_write_back_skips_fallback(self, owner_client, contributor_project, indicators, monkeypatch):
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+        before = list(Indicator.objects.order_by('id').values('description', 'frequency', 'score', 'last_updated'))
+
+        response = owner_client.post('/api/analyze-checklist/', {
+            'project_id': str(contributor_project.id), 'write_back': True,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.data['updated'] == 0
+        assert list(Indicator.objects.order_by('id').values('description', 'frequency', 'score', 'last_updated')) == before
+
+    def test_write_back_requires_project(self, owner_client):
+        response = owner_client.post('/api/analyze-categorization/', {
+            'indicators': [{'id': '1'}], 'write_back': True,
+        }, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_member_cannot_write_back(self, api_client, reviewer_user, reviewer_token, contributor_project, indicators):
+        contributor_project.members.add(reviewer_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {reviewer_token["access"]}')
+
+        response = api_client.post('/api/analyze-categorization/', {
+            'project_id': str(contributor_project.id), 'write_back': True,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not Indicator.objects.filter(ai_categorization__isnull=False).exists()
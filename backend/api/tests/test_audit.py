@@ -0,0 +1,72 @@
+"""
+Tests for the buffered audit log writer.
+"""
+import pytest
+
+from api import audit
+from api.models import AuditAction, AuditLog
+
+
+def _log(**overrides):
+    fields = dict(
+        actor=None, action=AuditAction.UPDATE, entity_type='Project', entity_id='p1',
+        summary='Updated', metadata={'token': 'abc', 'count': 1},
+    )
+    fields.update(overrides)
+    return audit.log_audit(**fields)
+
+
+@pytest.fixture
+def writer(settings, monkeypatch):
+    settings.AUDIT_LOG_ASYNC = True
+    # Long interval: the tests flush explicitly
+    writer = audit.AuditWriter(batch_size=50, flush_interval=3600)
+    monkeypatch.setattr(audit, '_writer', writer)
+    yield writer
+    writer.stop(timeout=1)
+
+
+@pytest.mark.django_db
+class TestAuditWriter:
+    """Tests for audit.AuditWriter and log_audit in buffered mode"""
+
+    def test_entries_are_queued_after_commit_and_flushed_in_bulk(self, writer, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            first = _log(entity_id='p1')
+            _log(entity_id='p2')
+            assert writer.pending() == 0
+
+        assert writer.pending() == 2
+        assert not AuditLog.objects.exists()
+
+        assert audit.flush_audit_log() == 2
+
+        saved = AuditLog.objects.get(entity_id='p1')
+        assert saved.timestamp == first.timestamp
+        assert saved.metadata == {'token': '[REDACTED]', 'count': 1}
+        assert AuditLog.objects.count() == 2
+
+    def test_rolled_back_writes_are_not_logged(self, writer, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False):
+            _log()
+        assert writer.pending() == 0
+
+    def test_full_buffer_writes_inline(self, settings, monkeypatch):
+        settings.AUDIT_LOG_ASYNC = True
+        writer = audit.AuditWriter(batch_size=50, flush_interval=3600, max_queue=1)
+        monkeypatch.setattr(audit, '_writer', writer)
+        try:
+            writer.submit(AuditLog(action=AuditAction.CREATE, entity_type='Project', entity_id='a', summary='a'))
+            writer.submit(AuditLog(action=AuditAction.CREATE, entity_type='Project', entity_id='b', summary='b'))
+
+            assert writer.pending() == 1
+            assert list(AuditLog.objects.values_list('entity_id', flat=True)) == ['b']
+        finally:
+            writer.stop(timeout=1)
+        assert AuditLog.objects.count() == 2
+
+    def test_sync_mode_inserts_immediately(self):
+        entry = _log(before={'password': 'x'})
+
+        saved = AuditLog.objects.get(id=entry.id)
+        assert saved.before == {'password': '[REDACTED]'}
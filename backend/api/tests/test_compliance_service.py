@@ -0,0 +1,154 @@
+"""
+Tests for per-period compliance evaluation of frequency-based indicators.
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from api import compliance_service, period_service
+from api.models import (
+    Evidence, EvidencePeriod, EvidenceReviewState, EvidenceState, Frequency, FrequencyLog, Indicator,
+    IndicatorEvidenceType
+)
+
+TODAY = date(2026, 5, 15)
+
+
+def _frequency_indicator(project, frequency=Frequency.MONTHLY, name='Log'):
+    return Indicator.objects.create(
+        project=project, section='S', standard='STD', indicator=name,
+        evidence_type=IndicatorEvidenceType.FREQUENCY, frequency=frequency,
+    )
+
+
+def _accepted(indicator, day):
+    evidence = Evidence.objects.create(
+        indicator=indicator, type='note', content='log', review_state=EvidenceReviewState.ACCEPTED
+    )
+    uploaded = timezone.make_aware(datetime.combine(day, time(12)))
+    Evidence.objects.filter(id=evidence.id).update(date_uploaded=uploaded)
+    return evidence
+
+
+@pytest.mark.django_db
+class TestEvaluate:
+    """Tests for compliance_service.evaluate_project"""
+
+    def test_current_period_streak_and_missed(self, contributor_project):
+        ind = _frequency_indicator(contributor_project)
+        for day in [date(2026, 1, 10), date(2026, 3, 3), date(2026, 4, 20), date(2026, 5, 2)]:
+            _accepted(ind, day)
+
+        result = compliance_service.evaluate_project(contributor_project.id, today=TODAY, since=date(2026, 1, 1))[ind.id]
+
+        assert result.status == compliance_service.COMPLIANT
+        assert result.current_period == (date(2026, 5, 1), date(2026, 5, 31))
+        assert result.streak == 3
+        assert result.missed_periods == 1
+        assert result.evaluated_periods == 5
+        assert result.last_evidence_date == date(2026, 5, 2)
+
+    def test_old_evidence_does_not_count_for_current_period(self, contributor_project):
+        ind = _frequency_indicator(contributor_project)
+        _accepted(ind, date(2025, 5, 10))
+
+        result = compliance_service.evaluate_project(contributor_project.id, today=TODAY)[ind.id]
+
+        assert result.status == compliance_service.OVERDUE
+        assert result.streak == 0
+        assert result.missed_periods == 11
+
+    def test_due_when_previous_period_met(self, contributor_project):
+        ind = _frequency_indicator(contributor_project, Frequency.WEEKLY)
+        # TODAY is a Friday; the previous week ran Mon 4 - Sun 10 May
+        _accepted(ind, date(2026, 5, 6))
+
+        result = compliance_service.evaluate_project(contributor_project.id, today=TODAY, since=date(2026, 5, 4))[ind.id]
+
+        assert result.status == compliance_service.DUE
+        assert result.streak == 1
+        assert result.missed_periods == 0
+
+    def test_rejected_evidence_and_other_indicator_types_are_ignored(self, contributor_project):
+        ind = _frequency_indicator(contributor_project)
+        Evidence.objects.create(indicator=ind, type='note', content='x', review_state=EvidenceReviewState.REJECTED)
+        Indicator.objects.create(
+            project=contributor_project, section='S', standard='STD', indicator='Text',
+            frequency=Frequency.MONTHLY,
+        )
+        _frequency_indicator(contributor_project, Frequency.ONE_TIME, name='Once')
+
+        results = compliance_service.evaluate_project(contributor_project.id, today=TODAY)
+
+        assert list(results) == [ind.id]
+        assert results[ind.id].current_met is False
+
+    def test_sign_offs_and_expected_counts_match_materialized_periods(self, contributor_project):
+        ind = _frequency_indicator(contributor_project)
+        _accepted(ind, date(2026, 3, 10))
+        FrequencyLog.objects.create(
+            indicator=ind, period_start=date(2026, 4, 1), period_end=date(2026, 4, 30), is_compliant=True,
+            notes='Quick log',
+        )
+        _accepted(ind, date(2026, 5, 2))
+        period_service.materialize_periods(date(2026, 3, 1), TODAY, today=TODAY)
+        EvidencePeriod.objects.filter(indicator=ind, period_start=date(2026, 5, 1)).update(expected_evidence_count=2)
+        period_service.materialize_periods(date(2026, 3, 1), TODAY, today=TODAY)
+
+        result = compliance_service.evaluate_project(contributor_project.id, today=TODAY, since=date(2026, 3, 1))[ind.id]
+
+        materialized = dict(EvidencePeriod.objects.filter(indicator=ind).values_list('period_start', 'is_compliant'))
+        assert materialized == {date(2026, 3, 1): True, date(2026, 4, 1): True, date(2026, 5, 1): False}
+        assert (result.current_met, result.missed_periods, result.streak) == (False, 0, 2)
+
+    def test_query_count_does_not_grow_with_indicators(self, contributor_project):
+        for i in range(15):
+            ind = _frequency_indicator(contributor_project, name=f'Log {i}')
+            _accepted(ind, TODAY)
+
+        with CaptureQueriesContext(connection) as queries:
+            results = compliance_service.evaluate_project(contributor_project.id, today=TODAY)
+
+        assert len(results) == 15
+        assert len(queries) == 4
+
+
+@pytest.mark.django_db
+class TestEvidenceState:
+    """get_evidence_state for frequency-based indicators"""
+
+    def test_requires_evidence_in_current_period(self, contributor_project):
+        ind = _frequency_indicator(contributor_project)
+        _accepted(ind, timezone.localdate().replace(day=1) - timedelta(days=40))
+        assert ind.get_evidence_state() == EvidenceState.PARTIAL_EVIDENCE
+
+        _accepted(ind, timezone.localdate())
+        assert ind.get_evidence_state() == EvidenceState.ACCEPTED
+
+
+@pytest.mark.django_db
+class TestFrequencyComplianceEndpoint:
+    """Tests for /api/projects/{id}/frequency-compliance/"""
+
+    def test_returns_summary_and_results(self, api_client, contributor_token, contributor_project):
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+        done = _frequency_indicator(contributor_project, name='Done')
+        _accepted(done, timezone.localdate())
+        _frequency_indicator(contributor_project, name='Missing')
+
+        response = api_client.get(f'/api/projects/{contributor_project.id}/frequency-compliance/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['summary'][compliance_service.COMPLIANT] == 1
+        assert len(response.data['results']) == 2
+
+    def test_invalid_since(self, api_client, contributor_token, contributor_project):
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+
+        response = api_client.get(f'/api/projects/{contributor_project.id}/frequency-compliance/?since=soon')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
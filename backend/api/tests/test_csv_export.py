@@ -0,0 +1,88 @@
+"""
+Tests for the streaming CSV export.
+"""
+import csv
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.csv_export_service import HEADERS, split_description
+from api.csv_import_service import CSVImportService
+from api.models import Indicator, Project
+from api.tests.test_csv_import import _csv, _row
+
+SOURCE = (
+    'Section,Standard,Indicator,Description,Evidence Required,Frequency,Score\n'
+    '"Access, Assessment and Continuity of Care (AAC)",Lab access.,Signposted,,,Monthly,5\n'
+    'Access, Assessment and Continuity of Care (AAC),Labs are accessible. Hours are posted.,,,,\n'
+    'Lab,STD-1,"Multi\nline",Kept daily,"Signed logbook; ""Calibration"" records",one time,x\n'
+    'Lab,STD-2,No extras,,,,\n'
+)
+
+
+def _export(client, project):
+    response = client.get(f'/api/projects/{project.id}/export.csv')
+    return response, b''.join(response.streaming_content).decode('utf-8')
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+def test_split_description():
+    assert split_description('Evidence Required: Logbook') == ('', 'Logbook')
+    assert split_description('Kept daily\n\nEvidence Required: Logbook') == ('Kept daily', 'Logbook')
+    assert split_description('Kept daily') == ('Kept daily', '')
+    assert split_description(None) == ('', '')
+
+
+@pytest.mark.django_db
+class TestExportEndpoint:
+    """Tests for GET /api/projects/{id}/export.csv"""
+
+    def test_export_round_trips_through_import(self, owner_client, contributor_project):
+        upload = SimpleUploadedFile('source.csv', SOURCE.encode('utf-8'), content_type='text/csv')
+        imported = CSVImportService(contributor_project).import_csv(upload)
+        assert imported.indicators_created == 4
+
+        response, body = _export(owner_client, contributor_project)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert 'attachment;' in response['Content-Disposition']
+        assert body.startswith('\ufeff')
+        rows = list(csv.reader(StringIO(body[1:])))
+        assert rows[0] == HEADERS
+        assert len(rows) == 5
+
+        reimported = CSVImportService(contributor_project, dry_run=True).import_csv(
+            SimpleUploadedFile('export.csv', body.encode('utf-8'), content_type='text/csv')
+        )
+        assert reimported.errors == []
+        assert reimported.diff == []
+        assert reimported.indicators_unchanged == 4
+
+    def test_export_reads_rows_in_constant_queries(self, owner_client, contributor_project):
+        CSVImportService(contributor_project).import_csv(_csv([_row(i) for i in range(300)]))
+
+        with CaptureQueriesContext(connection) as queries:
+            _, body = _export(owner_client, contributor_project)
+
+        assert body.count('\n') == 301
+        # Only the indicators query touches the indicator table, and no related rows are prefetched
+        indicator_queries = [q for q in queries if 'api_indicator' in q['sql']]
+        assert len(indicator_queries) == 1
+
+    def test_export_requires_access(self, owner_client, admin_user):
+        other = Project.objects.create(name='Other', owner=admin_user)
+        Indicator.objects.create(project=other, section='S', standard='T', indicator='I')
+
+        response = owner_client.get(f'/api/projects/{other.id}/export.csv')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
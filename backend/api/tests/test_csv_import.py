@@ -0,0 +1,172 @@
+"""
+Tests for the CSV indicator import.
+"""
+import csv
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.csv_import_service import CSVImportService, iter_lines
+from api.models import ComplianceStatus, Evidence, Indicator, Project
+
+HEADER = 'Section,Standard,Indicator,Evidence Required,Responsible Person,Frequency,Assigned to,Compliance Evidence,Score\n'
+
+
+def _csv(rows, header=HEADER):
+    return SimpleUploadedFile('indicators.csv', ('\ufeff' + header + ''.join(rows)).encode('utf-8'), content_type='text/csv')
+
+
+def _row(i, score=5, frequency='Monthly'):
+    return f'Sec {i % 3},STD-{i},Indicator {i},Logbook,Nurse,{frequency},Ali,Kept in office,{score}\n'
+
+
+class TestIterLines:
+    """Tests for incremental decoding of uploaded chunks"""
+
+    def test_chunk_boundaries(self):
+        data = '\ufeffSection,Indicator\r\nLab,"Multi\nline é"\r\nLab,Last'.encode('utf-8')
+        chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+
+        rows = list(csv.reader(iter_lines(chunks)))
+
+        assert rows == [['Section', 'Indicator'], ['Lab', 'Multi\nline é'], ['Lab', 'Last']]
+
+
+@pytest.mark.django_db
+class TestCSVImportService:
+    """Tests for CSVImportService.import_csv"""
+
+    def test_creates_indicators(self, contributor_project):
+        result = CSVImportService(contributor_project).import_csv(_csv([_row(i) for i in range(3)]))
+
+        assert result.errors == []
+        assert result.indicators_created == 3
+        ind = Indicator.objects.get(project=contributor_project, standard='STD-1')
+        assert ind.description == 'Evidence Required: Logbook'
+        assert ind.score == 5
+        assert ind.indicator_key == Indicator.generate_indicator_key_static(
+            contributor_project.id, 'Sec 1', 'STD-1', 'Indicator 1'
+        )
+
+    def test_reimport_updates_in_place_and_keeps_status(self, contributor_project):
+        CSVImportService(contributor_project).import_csv(_csv([_row(0)]))
+        ind = Indicator.objects.get(project=contributor_project)
+        Indicator.objects.filter(id=ind.id).update(status=ComplianceStatus.COMPLIANT)
+
+        result = CSVImportService(contributor_project).import_csv(_csv([_row(0, score=8), _row(1)]))
+
+        assert (result.indicators_created, result.indicators_updated) == (1, 1)
+        ind.refresh_from_db()
+        assert (ind.score, ind.status) == (8, ComplianceStatus.COMPLIANT)
+        assert Indicator.objects.filter(project=contributor_project).count() == 2
+
+    def test_duplicate_and_incomplete_rows(self, contributor_project):
+        rows = [_row(0, score=1), _row(0, score=2), ',STD-X,Missing section,,,,,,\n']
+
+        result = CSVImportService(contributor_project).import_csv(_csv(rows))
+
+        assert (result.indicators_created, result.indicators_updated, result.rows_skipped) == (1, 1, 1)
+        assert Indicator.objects.get(project=contributor_project).score == 2
+
+    def test_reimport_skips_unchanged_rows(self, contributor_project):
+        rows = [_row(i) for i in range(3)]
+        CSVImportService(contributor_project).import_csv(_csv(rows))
+
+        with CaptureQueriesContext(connection) as queries:
+            result = CSVImportService(contributor_project).import_csv(_csv(rows[:2] + [_row(2, score=9)]))
+
+        assert (result.indicators_created, result.indicators_updated, result.indicators_unchanged) == (0, 1, 2)
+        writes = [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'UPDATE'))]
+        assert len(writes) == 1
+        assert Indicator.objects.get(project=contributor_project, standard='STD-2').score == 9
+
+    def test_dry_run_returns_diff_without_writing(self, contributor_project, monkeypatch):
+        CSVImportService(contributor_project).import_csv(_csv([_row(0), _row(1)]))
+        monkeypatch.setattr(CSVImportService, 'BATCH_SIZE', 2)
+        # Row 3 is created in the first batch and repeated unchanged in the second
+        rows = [_row(0), _row(3), _row(1, score=7), _row(3)]
+
+        result = CSVImportService(contributor_project, dry_run=True).import_csv(_csv(rows))
+
+        assert (result.indicators_created, result.indicators_updated, result.indicators_unchanged) == (1, 1, 2)
+        assert [(d['row'], d['action']) for d in result.diff] == [(3, 'create'), (4, 'update')]
+        assert result.diff[1]['changes'] == {'score': {'old': 5, 'new': 7}}
+        assert Indicator.objects.filter(project=contributor_project).count() == 2
+        assert Indicator.objects.get(project=contributor_project, standard='STD-1').score == 5
+
+    def test_progress_is_reported_per_batch(self, contributor_project, monkeypatch):
+        monkeypatch.setattr(CSVImportService, 'BATCH_SIZE', 2)
+        calls = []
+        upload = _csv([_row(i) for i in range(5)])
+
+        CSVImportService(contributor_project).import_csv(upload, progress=lambda rows, read: calls.append((rows, read)))
+
+        assert [rows for rows, _ in calls] == [2, 4, 5]
+        assert calls[-1][1] == upload.size
+        assert Indicator.objects.filter(project=contributor_project).count() == 5
+
+    def test_invalid_headers(self, contributor_project):
+        result = CSVImportService(contributor_project).import_csv(_csv([], header='Foo,Bar\n'))
+
+        assert result.errors[0]['row'] == 0
+        assert not Indicator.objects.exists()
+
+    def test_query_count_does_not_grow_with_rows(self, contributor_project):
+        with CaptureQueriesContext(connection) as queries:
+            result = CSVImportService(contributor_project).import_csv(_csv([_row(i) for i in range(200)]))
+
+        assert result.indicators_created == 200
+        assert len(queries) < 10
+
+
+@pytest.mark.django_db
+class TestImportPhcCsvCommand:
+    """Tests for the import_phc_csv management command"""
+
+    def test_streams_file_in_batches(self, tmp_path):
+        path = tmp_path / 'phc.csv'
+        path.write_text('\ufeff' + HEADER + ''.join(_row(i) for i in range(5)), encoding='utf-8')
+
+        out = StringIO()
+        call_command('import_phc_csv', str(path), '--project-name', 'PHC', '--batch-size', '2', '--no-progress', stdout=out)
+
+        assert 'Parsed 5 data rows' in out.getvalue()
+        assert Indicator.objects.filter(project=Project.objects.get(name='PHC')).count() == 5
+        assert Indicator.objects.get(standard='STD-0').description == 'Indicator 0\n\nEvidence Required: Logbook'
+
+    def test_limit_and_dry_run(self, tmp_path):
+        path = tmp_path / 'phc.csv'
+        path.write_text(HEADER + ''.join(_row(i) for i in range(5)), encoding='utf-8')
+
+        out = StringIO()
+        call_command('import_phc_csv', str(path), '--limit', '3', '--dry-run', '--no-progress', stdout=out)
+
+        assert 'Parsed 3 data rows' in out.getvalue()
+        assert not Project.objects.exists()
+
+    def test_directory_in_process_pool(self, tmp_path):
+        (tmp_path / 'a.csv').write_text(HEADER + ''.join(_row(i) for i in range(3)), encoding='utf-8')
+        (tmp_path / 'b.csv').write_text(HEADER + _row(3) + _row(4, score=1), encoding='utf-8')
+        (tmp_path / 'notes.csv').write_text('Foo,Bar\n', encoding='utf-8')
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_phc_csv', str(tmp_path), '--project-name', 'PHC', '--jobs', '2', '--batch-size', '2',
+            '--create-evidence-notes', '--no-progress', stdout=out, stderr=err,
+        )
+
+        project = Project.objects.get(name='PHC')
+        assert 'Parsed 5 data rows' in out.getvalue()
+        assert 'Skipping notes.csv' in err.getvalue()
+        assert Indicator.objects.get(project=project, standard='STD-4').score == 1
+        assert Evidence.objects.filter(indicator__project=project).count() == 5
+
+        # Re-running writes nothing new
+        out = StringIO()
+        call_command('import_phc_csv', str(tmp_path), '--project-name', 'PHC', '--jobs', '1',
+                     '--create-evidence-notes', '--no-progress', stdout=out, stderr=StringIO())
+        assert 'created=0 updated=0 unchanged=5 skipped=0 evidence_notes=0' in out.getvalue()
@@ -0,0 +1,89 @@
+"""
+Tests for the shared CSV parsing pipeline.
+"""
+import pytest
+
+from api.csv_import_service import CSVImportService
+from api.csv_parsing import DEFAULT_FIXUPS, PHC_FIXUPS, parse_file, parse_row
+from api.models import Frequency, Indicator
+from api.tests.test_csv_import import HEADER, _csv, _row
+
+
+def _raw(**overrides):
+    raw = {'Section': 'Lab', 'Standard': 'STD-1', 'Indicator': 'Logbook kept', 'Frequency': 'Monthly'}
+    raw.update(overrides)
+    return raw
+
+
+class TestParseRow:
+    """Tests for parse_row"""
+
+    def test_cleans_and_converts_fields(self):
+        fields = parse_row(_raw(**{
+            'Section': ' Lab ', 'Frequency': ' one   time', 'Score': '7.0',
+            'Evidence Required': 'Signed logbook; Calibration records', 'Assigned to': '',
+        }))
+
+        assert fields['section'] == 'Lab'
+        assert fields['frequency'] == Frequency.ONE_TIME
+        assert fields['score'] == 7
+        assert fields['assignee'] is None
+        assert fields['description'] == 'Evidence Required: Signed logbook; Calibration records'
+        assert [p['label'] for p in fields['form_schema']] == ['Signed logbook', 'Calibration records']
+
+    def test_frequency_aliases_and_bad_score(self):
+        fields = parse_row(_raw(Frequency='Fortnightly', Score='n/a'))
+
+        assert fields['frequency'] == 'Bi-weekly'
+        assert fields['score'] == 10
+        assert parse_row(_raw(Frequency='semi-annual'))['frequency'] == 'Semi-annually'
+        assert parse_row(_raw(Frequency='Yearly'))['frequency'] == Frequency.ANNUALLY
+
+    def test_unrecognised_frequency_is_kept(self):
+        assert parse_row(_raw(Frequency='As required'))['frequency'] == 'As required'
+
+    def test_missing_required_column(self):
+        assert parse_row(_raw(Standard=' ')) is None
+
+    def test_aac_column_shift_is_repaired(self):
+        raw = _raw(
+            Section='Access',
+            Standard=' Assessment and Continuity of Care (AAC)',
+            Indicator='Laboratory services are easily accessible. The location is signposted.',
+        )
+
+        fields = parse_row(raw, PHC_FIXUPS)
+
+        assert fields['section'] == 'Access, Assessment and Continuity of Care (AAC)'
+        assert fields['standard'] == 'Laboratory services are easily accessible.'
+        assert fields['indicator'] == 'The location is signposted.'
+        # API imports key rows as written
+        assert parse_row(raw)['section'] == 'Access'
+
+    def test_phc_description_defaults_to_indicator_text(self):
+        fields = parse_row(_raw(**{'Evidence Required': 'Logbook'}), PHC_FIXUPS)
+
+        assert fields['description'] == 'Logbook kept\n\nEvidence Required: Logbook'
+        assert parse_row(_raw(Description='Own text'), PHC_FIXUPS)['description'] == 'Own text'
+
+    def test_parse_file(self, tmp_path):
+        good = tmp_path / 'good.csv'
+        good.write_text(HEADER + _row(0) + ',,,,,,,,\n', encoding='utf-8')
+        bad = tmp_path / 'bad.csv'
+        bad.write_text('Foo,Bar\n1,2\n', encoding='utf-8')
+
+        error, records = parse_file(good)
+        assert error is None
+        assert [(row_num, fields is None) for row_num, fields in records] == [(2, False), (3, True)]
+        assert parse_file(bad)[0].startswith('Invalid CSV headers')
+
+
+@pytest.mark.django_db
+def test_service_uses_custom_fixups(contributor_project):
+    def upper_section(row):
+        row['section'] = row['section'].upper()
+        return row
+
+    CSVImportService(contributor_project, fixups=(*DEFAULT_FIXUPS, upper_section)).import_csv(_csv([_row(1)]))
+
+    assert Indicator.objects.get(project=contributor_project).section == 'SEC 1'
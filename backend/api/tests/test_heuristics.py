@@ -0,0 +1,123 @@
+"""
+Tests for the compiled keyword rules used to pre-filter AI categorization and frequency grouping.
+"""
+import csv
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.conf import settings
+
+from api import ai_metrics, ai_services, heuristics
+
+PHC_CSV = settings.BASE_DIR / 'Final PHC list.csv'
+
+
+@pytest.fixture
+def phc_indicators():
+    with open(PHC_CSV, encoding='utf-8-sig', newline='') as f:
+        return [
+            {'id': str(i), 'indicator': row['Indicator'], 'description': row['Evidence Required']}
+            for i, row in enumerate(csv.DictReader(f))
+        ]
+
+
+@pytest.fixture(autouse=True)
+def reset_ai_metrics():
+    ai_metrics.registry.reset()
+    yield
+    ai_metrics.registry.reset()
+
+
+class TestRules:
+    """Tests for rule matching and confidence"""
+
+    def test_strong_unambiguous_keyword_is_confident(self):
+        assert heuristics.categorize({'indicator': 'An SOP for sample storage exists'}) == ('ai_fully_manageable', 1.0)
+
+    def test_competing_keywords_lower_confidence(self):
+        label, confidence = heuristics.categorize({'indicator': 'Policy is displayed next to the daily log'})
+        assert label == 'ai_fully_manageable'
+        assert confidence < heuristics.confidence_threshold()
+
+    def test_keywords_match_whole_words(self):
+        # 'log' inside 'biology' must not count as a log sheet
+        assert heuristics.categorize({'indicator': 'Biology section staffed'}) == ('manual', 0.0)
+
+    def test_no_match_uses_default_with_zero_confidence(self):
+        assert heuristics.frequency_group({'indicator': 'Staff are qualified'}) == ('one_time', 0.0)
+
+    @pytest.mark.parametrize('frequency,label', [
+        ('Daily', 'daily'), ('One-time', 'one_time'), ('Annually', 'annually'), ('Quarterly', 'quarterly'),
+    ])
+    def test_frequency_field_is_authoritative(self, frequency, label):
+        indicator = {'indicator': 'Weekly review of the daily log', 'frequency': frequency}
+        assert heuristics.frequency_group(indicator) == (label, 1.0)
+
+    def test_frequency_from_text_is_tentative(self):
+        label, confidence = heuristics.frequency_group({'indicator': 'Fridge temperature is recorded every day'})
+        assert label == 'daily'
+        assert 0 < confidence < heuristics.confidence_threshold()
+
+    def test_once_a_year_is_annual(self):
+        assert heuristics.frequency_group({'indicator': 'Audit once a year'}).label == 'annually'
+
+    def test_prefilter_splits_by_threshold(self):
+        indicators = [
+            {'id': 'a', 'indicator': 'Quality policy'},
+            {'id': 'b', 'indicator': 'Hand washing'},
+        ]
+        groups, pending = heuristics.prefilter(
+            heuristics.categorize, indicators, ['ai_fully_manageable', 'ai_assisted', 'manual'], 0.8
+        )
+        assert groups == {'ai_fully_manageable': ['a'], 'ai_assisted': [], 'manual': []}
+        assert pending == [indicators[1]]
+
+    def test_benchmark_thousands_of_indicators(self, phc_indicators):
+        indicators = (phc_indicators * 50)[:5000]
+
+        start = time.perf_counter()
+        for indicator in indicators:
+            heuristics.categorize(indicator)
+            heuristics.frequency_group(indicator)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        print(f"classified {len(indicators)} indicators twice in {elapsed_ms:.1f} ms")
+        assert elapsed_ms < 1000
+
+
+class TestPrefilteredServices:
+    """Tests for ai_services sending only low-confidence indicators to the model"""
+
+    def test_categorization_sends_only_pending_indicators(self):
+        indicators = [
+            {'id': 'a', 'indicator': 'Written SOP for waste disposal'},
+            {'id': 'b', 'indicator': 'Hand hygiene observed'},
+        ]
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text=json.dumps({'manual': ['b']}))
+        with patch('api.ai_services.get_flash_model', return_value=model):
+            result = ai_services.analyze_categorization(indicators)
+
+        prompt = model.generate_content.call_args[0][0]
+        assert 'Hand hygiene' in prompt
+        assert 'waste disposal' not in prompt
+        assert result == {'ai_fully_manageable': ['a'], 'ai_assisted': [], 'manual': ['b']}
+        series = ai_metrics.registry.snapshot()['functions']['analyze_categorization'][ai_services.FLASH_MODEL]
+        assert series['prefiltered_items'] == 1
+
+    def test_frequency_grouping_skips_model_when_all_confident(self):
+        indicators = [{'id': 'a', 'indicator': 'x', 'frequency': 'Monthly'}]
+        with patch('api.ai_services.get_flash_model') as get_model:
+            result = ai_services.analyze_frequency_grouping(indicators)
+
+        get_model.assert_not_called()
+        assert result['monthly'] == ['a']
+
+    def test_fallback_classifies_every_indicator(self, phc_indicators, monkeypatch):
+        monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+        result = ai_services.analyze_categorization(phc_indicators)
+
+        grouped = [ind_id for ids in result.values() for ind_id in ids]
+        assert sorted(grouped) == sorted(ind['id'] for ind in phc_indicators)
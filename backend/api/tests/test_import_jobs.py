@@ -0,0 +1,163 @@
+"""
+Tests for background CSV import jobs.
+"""
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+
+from api import import_jobs
+from api.csv_import_service import CSVImportService
+from api.models import AuditLog, ImportJob, ImportJobStatus, Indicator, Project
+from api.tests.test_csv_import import _csv, _row
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.fixture
+def fail_second_batch(monkeypatch):
+    """Make the second batch write raise once"""
+    monkeypatch.setattr(CSVImportService, 'BATCH_SIZE', 2)
+    original = CSVImportService._write
+    calls = {'n': 0}
+
+    def flaky(self, indicators):
+        calls['n'] += 1
+        if calls['n'] == 2:
+            raise RuntimeError('database went away')
+        return original(self, indicators)
+
+    monkeypatch.setattr(CSVImportService, '_write', flaky)
+
+
+def _upload(client, project, rows, **extra):
+    return client.post(
+        f'/api/projects/{project.id}/import-indicators/', {'file': _csv(rows)}, format='multipart', **extra
+    )
+
+
+@pytest.mark.django_db
+class TestImportJobEndpoints:
+    """Tests for the import upload, progress and job endpoints"""
+
+    def test_audit_entry_keeps_uploader_request(self, owner_client, contributor_project):
+        _upload(owner_client, contributor_project, [_row(0)],
+                REMOTE_ADDR='10.1.2.3', HTTP_USER_AGENT='checklist-sync/1.0')
+
+        entry = AuditLog.objects.get(action='IMPORT', entity_id=str(contributor_project.id))
+        assert (entry.ip_address, entry.user_agent) == ('10.1.2.3', 'checklist-sync/1.0')
+
+    def test_upload_runs_job(self, owner_client, contributor_project, media_root):
+        response = _upload(owner_client, contributor_project, [_row(0), _row(1), ',,,,,,,,\n'])
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == ImportJobStatus.COMPLETED
+        assert response.data['percentComplete'] == 100
+        assert response.data['result']['indicators_created'] == 2
+        assert response.data['result']['errors'] == [{'row': 4, 'error': 'Missing Section, Standard or Indicator'}]
+        assert Indicator.objects.filter(project=contributor_project).count() == 2
+        assert AuditLog.objects.filter(action='IMPORT', entity_id=str(contributor_project.id)).exists()
+        # The stored upload is removed once imported
+        assert not any(path.is_file() for path in media_root.rglob('*.csv'))
+
+        progress = owner_client.get(f'/api/projects/{contributor_project.id}/import-indicators/progress/')
+        assert progress.data['id'] == response.data['id']
+
+    def test_dry_run_returns_diff(self, owner_client, contributor_project):
+        response = owner_client.post(
+            f'/api/projects/{contributor_project.id}/import-indicators/?dry_run=true',
+            {'file': _csv([_row(0)])}, format='multipart',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['indicators_created'] == 1
+        assert response.data['diff'][0]['action'] == 'create'
+        assert not ImportJob.objects.exists()
+        assert not Indicator.objects.filter(project=contributor_project).exists()
+
+    def test_failed_job_resumes_after_last_checkpoint(self, owner_client, contributor_project, fail_second_batch):
+        response = _upload(owner_client, contributor_project, [_row(i) for i in range(5)])
+
+        assert response.data['status'] == ImportJobStatus.FAILED
+        assert response.data['rowsProcessed'] == 2
+        assert 'database went away' in response.data['error']
+        assert response.data['result']['indicators_created'] == 2
+        assert Indicator.objects.filter(project=contributor_project).count() == 2
+
+        resumed = owner_client.post(f'/api/import-jobs/{response.data["id"]}/resume/')
+
+        assert resumed.status_code == status.HTTP_202_ACCEPTED
+        assert resumed.data['status'] == ImportJobStatus.COMPLETED
+        assert resumed.data['rowsProcessed'] == 5
+        assert resumed.data['result']['indicators_created'] == 5
+        assert resumed.data['result']['errors'] == []
+        assert Indicator.objects.filter(project=contributor_project).count() == 5
+
+    def test_invalid_headers_fail_and_completed_jobs_cannot_resume(self, owner_client, contributor_project):
+        failed = _upload(owner_client, contributor_project, [])
+        assert failed.status_code == status.HTTP_202_ACCEPTED
+
+        bad = owner_client.post(
+            f'/api/projects/{contributor_project.id}/import-indicators/',
+            {'file': _csv([], header='Foo,Bar\n')}, format='multipart',
+        )
+        assert bad.data['status'] == ImportJobStatus.FAILED
+        assert 'Invalid CSV headers' in bad.data['error']
+
+        response = owner_client.post(f'/api/import-jobs/{failed.data["id"]}/resume/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_jobs_are_scoped_to_accessible_projects(self, owner_client, contributor_project, admin_user):
+        other = Project.objects.create(name='Other', owner=admin_user)
+        job = ImportJob.objects.create(project=other, file_name='x.csv', file_path='imports/x.csv')
+
+        assert owner_client.get(f'/api/import-jobs/{job.id}/').status_code == status.HTTP_404_NOT_FOUND
+        assert owner_client.get('/api/import-jobs/').data == []
+
+
+@pytest.mark.django_db
+class TestResumeCommand:
+    """Tests for the resume_import_jobs command"""
+
+    def test_resumes_stalled_job(self, contributor_project, fail_second_batch):
+        job = import_jobs.create_job(contributor_project, _csv([_row(i) for i in range(5)]))
+        # Simulate a worker that died mid-import
+        ImportJob.objects.filter(id=job.id).update(
+            status=ImportJobStatus.RUNNING, updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        out = StringIO()
+        call_command('resume_import_jobs', '--stalled-minutes', '10', stdout=out)
+
+        job.refresh_from_db()
+        assert '1 stalled jobs' in out.getvalue()
+        assert job.status == ImportJobStatus.COMPLETED
+        assert Indicator.objects.filter(project=contributor_project).count() == 5
+
+    def test_resumes_job_lost_while_queued(self, contributor_project, monkeypatch):
+        # The pool was lost before the job started: nothing ever ran it
+        with monkeypatch.context() as m:
+            m.setattr(import_jobs, 'enqueue', lambda job_id: None)
+            job = import_jobs.create_job(contributor_project, _csv([_row(i) for i in range(3)]))
+        ImportJob.objects.filter(id=job.id).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        out = StringIO()
+        call_command('resume_import_jobs', '--stalled-minutes', '10', stdout=out)
+
+        job.refresh_from_db()
+        assert '1 stalled jobs' in out.getvalue()
+        assert job.status == ImportJobStatus.COMPLETED
+        assert Indicator.objects.filter(project=contributor_project).count() == 3
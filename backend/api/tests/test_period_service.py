@@ -0,0 +1,178 @@
+"""
+Tests for EvidencePeriod / FrequencyLog materialization.
+"""
+from datetime import date, datetime, timezone as dt_timezone
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import period_service
+from api.models import (
+    Evidence, EvidencePeriod, EvidenceReviewState, Frequency, FrequencyLog, Indicator
+)
+
+TODAY = date(2026, 3, 15)
+
+
+def _evidence(indicator, day, review_state=EvidenceReviewState.ACCEPTED):
+    evidence = Evidence.objects.create(indicator=indicator, type='note', content='log', review_state=review_state)
+    Evidence.objects.filter(id=evidence.id).update(
+        date_uploaded=datetime(day.year, day.month, day.day, 9, tzinfo=dt_timezone.utc)
+    )
+    return evidence
+
+
+@pytest.fixture
+def monthly(contributor_project):
+    return Indicator.objects.create(
+        project=contributor_project, section='QC', standard='QC-1', indicator='Monthly QC review',
+        frequency=Frequency.MONTHLY,
+    )
+
+
+def _materialize():
+    return period_service.materialize_periods(date(2026, 1, 1), TODAY, today=TODAY)
+
+
+@pytest.mark.django_db
+class TestMaterializePeriods:
+    """Tests for period_service.materialize_periods"""
+
+    def test_creates_periods_and_logs(self, monthly, contributor_project):
+        Indicator.objects.create(
+            project=contributor_project, section='QC', standard='QC-2', indicator='Setup', frequency=Frequency.ONE_TIME
+        )
+        _evidence(monthly, date(2026, 1, 10))
+        _evidence(monthly, date(2026, 1, 20), EvidenceReviewState.DRAFT)
+        _evidence(monthly, date(2026, 2, 3), EvidenceReviewState.REJECTED)
+        _evidence(monthly, date(2026, 3, 2))
+
+        result = _materialize()
+
+        assert result.indicators == 1
+        periods = {p.period_start: p for p in EvidencePeriod.objects.filter(indicator=monthly)}
+        assert sorted(periods) == [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)]
+        assert periods[date(2026, 1, 1)].actual_evidence_count == 2
+        assert periods[date(2026, 1, 1)].is_compliant
+        assert periods[date(2026, 2, 1)].actual_evidence_count == 0
+        assert not periods[date(2026, 2, 1)].is_compliant
+        assert sorted(FrequencyLog.objects.values_list('period_start', flat=True)) == [
+            date(2026, 1, 1), date(2026, 3, 1)
+        ]
+        monthly.refresh_from_db()
+        # March is already compliant, so April is the next open period
+        assert monthly.next_due_date == date(2026, 4, 30)
+
+    def test_rerun_is_idempotent_and_follows_evidence(self, monthly):
+        evidence = _evidence(monthly, date(2026, 3, 2))
+        _materialize()
+
+        again = _materialize()
+        assert (again.periods_created, again.periods_updated, again.frequency_logs_created) == (0, 0, 0)
+
+        Evidence.objects.filter(id=evidence.id).update(review_state=EvidenceReviewState.REJECTED)
+        after_reject = _materialize()
+
+        assert after_reject.periods_updated == 1
+        assert after_reject.frequency_logs_removed == 1
+        assert not FrequencyLog.objects.exists()
+        monthly.refresh_from_db()
+        assert monthly.next_due_date == date(2026, 3, 31)
+
+    def test_user_submitted_logs_are_kept(self, monthly):
+        FrequencyLog.objects.create(
+            indicator=monthly, period_start=date(2026, 2, 1), period_end=date(2026, 2, 28), notes='Signed off'
+        )
+        _materialize()
+        assert FrequencyLog.objects.filter(notes='Signed off').exists()
+
+    def test_expected_evidence_count_is_required(self, monthly):
+        _materialize()
+        EvidencePeriod.objects.filter(indicator=monthly, period_start=date(2026, 2, 1)).update(
+            expected_evidence_count=2
+        )
+        _evidence(monthly, date(2026, 2, 5))
+
+        _materialize()
+        assert not EvidencePeriod.objects.get(indicator=monthly, period_start=date(2026, 2, 1)).is_compliant
+
+        _evidence(monthly, date(2026, 2, 20))
+        _materialize()
+        assert EvidencePeriod.objects.get(indicator=monthly, period_start=date(2026, 2, 1)).is_compliant
+
+    def test_signed_off_periods_count_as_compliant(self, monthly, contributor_project):
+        FrequencyLog.objects.create(
+            indicator=monthly, period_start=date(2026, 3, 1), period_end=date(2026, 3, 31),
+            is_compliant=True, notes='Quick log',
+        )
+        version = contributor_project.version
+
+        result = _materialize()
+
+        assert EvidencePeriod.objects.get(indicator=monthly, period_start=date(2026, 3, 1)).is_compliant
+        assert result.frequency_logs_created == 0
+        monthly.refresh_from_db()
+        assert monthly.next_due_date == date(2026, 4, 30)
+        contributor_project.refresh_from_db()
+        assert contributor_project.version > version
+
+    def test_created_counts_only_inserted_rows(self, monthly):
+        _evidence(monthly, date(2026, 1, 10))
+        _materialize()
+        EvidencePeriod.objects.filter(indicator=monthly, period_start=date(2026, 2, 1)).delete()
+
+        result = _materialize()
+
+        assert result.periods_created == 1
+        assert result.frequency_logs_created == 0
+
+    def test_scheduler_aliases_are_materialized(self, contributor_project):
+        biweekly = Indicator.objects.create(
+            project=contributor_project, section='QC', standard='QC-3', indicator='Fridge check',
+            frequency='Bi-weekly',
+        )
+        _evidence(biweekly, date(2026, 3, 2))
+
+        result = _materialize()
+
+        assert result.indicators == 1
+        periods = EvidencePeriod.objects.filter(indicator=biweekly)
+        assert periods.count() > 1
+        assert periods.filter(is_compliant=True).count() == 1
+
+    def test_queries_do_not_grow_per_indicator(self, contributor_project):
+        for i in range(40):
+            ind = Indicator.objects.create(
+                project=contributor_project, section='QC', standard=f'W-{i}', indicator=f'Weekly {i}',
+                frequency=Frequency.WEEKLY,
+            )
+            _evidence(ind, date(2026, 3, 10))
+
+        with CaptureQueriesContext(connection) as queries:
+            result = _materialize()
+
+        assert result.periods_created == 40 * 11
+        assert len(queries) < 20
+
+
+@pytest.mark.django_db
+class TestMaterializeCommand:
+    """Tests for the materialize_periods management command"""
+
+    def test_command_reports_summary(self, monthly, capsys):
+        call_command('materialize_periods', '--since', '2026-01-01')
+        assert 'Materialization complete.' in capsys.readouterr().out
+        assert EvidencePeriod.objects.filter(indicator=monthly).exists()
+
+    def test_command_skips_when_locked(self, monthly, capsys):
+        cache.add('materialize_periods:lock', True, 60)
+        try:
+            call_command('materialize_periods')
+        finally:
+            cache.delete('materialize_periods:lock')
+        assert 'skipping' in capsys.readouterr().out
+        assert not EvidencePeriod.objects.exists()
+
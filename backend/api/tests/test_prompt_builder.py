@@ -0,0 +1,159 @@
+"""
+Tests for the AI prompt builder, including prompt size reduction on the PHC checklist.
+"""
+import csv
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.conf import settings
+
+from api import ai_services, prompt_builder
+from api.ai_metrics import estimate_tokens
+
+PHC_CSV = settings.BASE_DIR / 'Final PHC list.csv'
+
+
+@pytest.fixture(scope='module')
+def phc_indicators():
+    """PHC checklist rows shaped like the IndicatorSerializer payload the frontend posts"""
+    project_id = str(uuid.uuid4())
+    indicators = []
+    with open(PHC_CSV, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            evidence_required = (row.get('Evidence Required') or '').strip()
+            indicators.append({
+                'id': str(uuid.uuid4()),
+                'project': project_id,
+                'section': row['Section'],
+                'standard': row['Standard'],
+                'indicator': row['Indicator'],
+                'description': f"Evidence Required: {evidence_required}" if evidence_required else '',
+                'score': 10,
+                'responsiblePerson': row.get('Responsible Person') or None,
+                'frequency': row.get('Frequency') or None,
+                'assignee': row.get('Assigned to') or None,
+                'status': 'Not Started',
+                'notes': row.get('Compliance Evidence') or None,
+                'lastUpdated': '2026-01-15T10:30:00Z',
+                'formSchema': None,
+                'aiAnalysis': None,
+                'aiCategorization': None,
+                'isAiCompleted': False,
+                'isHumanVerified': False,
+                'evidence': [],
+                'evidenceType': 'text',
+                'evidenceState': 'no_evidence',
+            })
+    return indicators
+
+
+class TestProjection:
+    """Tests for field projection and encoding"""
+
+    def test_projects_only_task_fields(self):
+        task = prompt_builder.TASKS['analyze_categorization']
+        projected = prompt_builder.project(task, {
+            'id': 'abc', 'indicator': 'Fire drill', 'description': '', 'lastUpdated': 'x', 'evidence': [{}],
+        })
+        assert projected == {'id': 'abc', 'indicator': 'Fire drill'}
+
+    def test_reads_camel_case_fields(self):
+        task = prompt_builder.TASKS['generate_compliance_guide']
+        projected = prompt_builder.project(task, {'indicator': 'x', 'responsiblePerson': 'QM'})
+        assert projected['responsible_person'] == 'QM'
+
+    def test_table_encoding_escapes_separator(self):
+        encoded = prompt_builder.encode('analyze_tasks', [{'id': '1', 'indicator': 'A | B', 'status': 'Compliant'}])
+        lines = encoded.splitlines()
+        assert 'id|indicator|status|frequency' in lines[0]
+        assert lines[1] == '1|A / B|Compliant|'
+
+    def test_long_fields_are_truncated(self):
+        task = prompt_builder.TASKS['analyze_categorization']
+        projected = prompt_builder.project(task, {'id': '1', 'indicator': 'x', 'description': 'word ' * 500})
+        assert len(projected['description']) == task.max_field_chars['description']
+        assert projected['description'].endswith(prompt_builder.TRUNCATION_MARK)
+
+
+class TestBudget:
+    """Tests for token budgeting and deterministic splitting"""
+
+    def test_splits_within_budget(self, phc_indicators, monkeypatch):
+        task = prompt_builder.TASKS['analyze_categorization']
+        monkeypatch.setattr(task, 'token_budget', 1500)
+        template = 'Categorize:\n{indicators}\nReturn JSON.'
+
+        prompts = prompt_builder.build_prompts('analyze_categorization', phc_indicators, template)
+
+        assert len(prompts) > 1
+        assert all(estimate_tokens(p) <= task.token_budget for p in prompts)
+        encoded_ids = [line.split('|')[0] for p in prompts for line in p.splitlines()[2:-1]]
+        assert encoded_ids == [ind['id'] for ind in phc_indicators]
+
+    def test_splitting_is_deterministic(self, phc_indicators, monkeypatch):
+        monkeypatch.setattr(prompt_builder.TASKS['analyze_tasks'], 'token_budget', 1000)
+        first = prompt_builder.build_prompts('analyze_tasks', phc_indicators, '{indicators}')
+        second = prompt_builder.build_prompts('analyze_tasks', phc_indicators, '{indicators}')
+        assert first == second
+
+    def test_max_prompts_notes_omitted_rows(self, phc_indicators, monkeypatch):
+        monkeypatch.setattr(prompt_builder.TASKS['generate_report_summary'], 'token_budget', 800)
+        prompts = prompt_builder.build_prompts(
+            'generate_report_summary', phc_indicators, '{statistics}\n{indicators}', max_prompts=1, statistics='S'
+        )
+        assert len(prompts) == 1
+        assert 'more indicators omitted for length' in prompts[0]
+
+    def test_empty_input_yields_single_prompt(self):
+        prompts = prompt_builder.build_prompts('analyze_tasks', [], 'X {indicators}')
+        assert len(prompts) == 1
+
+
+class TestPromptSizeReduction:
+    """Measure prompt size against the previous `json.dumps(indicators, indent=2)` embedding"""
+
+    @pytest.mark.parametrize('task_name', [
+        'analyze_checklist', 'analyze_categorization', 'generate_report_summary',
+        'analyze_tasks', 'analyze_indicator_explanations', 'analyze_frequency_grouping',
+    ])
+    def test_phc_prompt_reduction(self, phc_indicators, task_name):
+        baseline_tokens = estimate_tokens(json.dumps(phc_indicators, indent=2))
+        builder_tokens = prompt_builder.estimate_prompt_tokens(
+            prompt_builder.build_prompts(task_name, phc_indicators, '{indicators}')
+        )
+        reduction = 1 - builder_tokens / baseline_tokens
+        print(f"{task_name}: {baseline_tokens} -> {builder_tokens} tokens ({reduction:.0%} smaller)")
+        assert reduction >= 0.6
+
+
+class TestBatchedAIServices:
+    """Tests for ai_services merging results across prompt batches"""
+
+    def test_categorization_merges_batches(self, phc_indicators, monkeypatch, settings):
+        monkeypatch.setattr(prompt_builder.TASKS['analyze_categorization'], 'token_budget', 2000)
+        # Send every indicator to the model rather than resolving some with keyword rules
+        settings.AI_HEURISTIC_CONFIDENCE = 1.1
+        model = MagicMock()
+        model.generate_content.side_effect = lambda prompt: MagicMock(
+            text=json.dumps({'manual': [line.split('|')[0] for line in prompt.splitlines() if line.count('|') == 2][1:]})
+        )
+        with patch('api.ai_services.get_flash_model', return_value=model):
+            result = ai_services.analyze_categorization(phc_indicators)
+
+        assert model.generate_content.call_count > 1
+        assert result['manual'] == [ind['id'] for ind in phc_indicators]
+
+    def test_checklist_merges_enrichment_by_position(self):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(
+            text='[{"id": "0", "description": "Keep a log", "frequency": "Daily", "score": 80}]'
+        )
+        with patch('api.ai_services.get_pro_model', return_value=model):
+            result = ai_services.analyze_checklist([{'indicator': 'Temperature log', 'section': 'QC'}])
+
+        assert result == [{
+            'indicator': 'Temperature log', 'section': 'QC',
+            'description': 'Keep a log', 'frequency': 'Daily', 'score': 80,
+        }]
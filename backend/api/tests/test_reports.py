@@ -0,0 +1,190 @@
+"""
+Tests for server-generated PDF reports.
+"""
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+
+from api import report_service
+from api.models import ComplianceStatus, Evidence, Indicator, Project, ProjectReport, ReportStatus
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.fixture
+def report_project(contributor_project):
+    lab = Indicator.objects.create(
+        project=contributor_project, section='Lab <Safety>', standard='STD-1', indicator='Logbook & records',
+        status=ComplianceStatus.COMPLIANT,
+    )
+    Indicator.objects.create(project=contributor_project, section='Admin', standard='STD-2', indicator='Policy')
+    Evidence.objects.create(indicator=lab, type='note', content='Checked daily', file_name='log.txt')
+    return contributor_project
+
+
+@pytest.fixture
+def count_builds(monkeypatch):
+    calls = []
+    original = report_service.build_pdf
+
+    def build(project, version, include_summary=False):
+        calls.append((version, include_summary))
+        return original(project, version, include_summary)
+
+    monkeypatch.setattr(report_service, 'build_pdf', build)
+    return calls
+
+
+def _download(client, project):
+    response = client.get(f'/api/projects/{project.id}/report/download/')
+    return response, b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestReports:
+    """Tests for the report endpoints and per-version caching"""
+
+    def test_version_bumps_on_writes(self, report_project):
+        version = Project.objects.get(id=report_project.id).version
+        Indicator.objects.filter(project=report_project).first().save()
+
+        assert Project.objects.get(id=report_project.id).version == version + 1
+
+    def test_report_is_built_once_per_version(self, owner_client, report_project, count_builds):
+        assert owner_client.get(f'/api/projects/{report_project.id}/report/').status_code == status.HTTP_404_NOT_FOUND
+
+        first = owner_client.post(f'/api/projects/{report_project.id}/report/')
+        again = owner_client.post(f'/api/projects/{report_project.id}/report/')
+
+        assert again.status_code == status.HTTP_200_OK
+        assert again.data['id'] == first.data['id']
+        assert again.data['status'] == ReportStatus.COMPLETED
+        assert again.data['downloadUrl'] == f'/api/projects/{report_project.id}/report/download/'
+        assert len(count_builds) == 1
+
+        response, body = _download(owner_client, report_project)
+        assert response['Content-Type'] == 'application/pdf'
+        assert body.startswith(b'%PDF')
+        assert len(count_builds) == 1
+
+    def test_change_invalidates_report(self, owner_client, report_project, count_builds, media_root):
+        first = owner_client.post(f'/api/projects/{report_project.id}/report/').data
+        Indicator.objects.filter(project=report_project, standard='STD-2').update(status=ComplianceStatus.IN_PROGRESS)
+        Evidence.objects.create(indicator=Indicator.objects.get(standard='STD-2'), type='note', content='Draft')
+
+        assert owner_client.get(f'/api/projects/{report_project.id}/report/download/').status_code == 404
+        second = owner_client.post(f'/api/projects/{report_project.id}/report/').data
+
+        assert second['id'] != first['id']
+        assert second['version'] > first['version']
+        assert len(count_builds) == 2
+        # The older report and its file are removed
+        assert [str(pk) for pk in ProjectReport.objects.values_list('id', flat=True)] == [second['id']]
+        assert len(list(media_root.rglob('*.pdf'))) == 1
+
+    def test_summary_report_and_member_access(self, api_client, report_project, count_builds):
+        member = User.objects.create_user(username='assessor', password='testpass123')
+        report_project.members.add(member)
+        api_client.force_authenticate(member)
+
+        response = api_client.post(f'/api/projects/{report_project.id}/report/', {'include_summary': True}, format='json')
+
+        assert response.data['status'] == ReportStatus.COMPLETED
+        assert response.data['includeSummary'] is True
+        assert response.data['downloadUrl'].endswith('?summary=true')
+        assert count_builds == [(response.data['version'], True)]
+        assert api_client.get(response.data['downloadUrl']).status_code == status.HTTP_200_OK
+
+    def test_failed_report_is_retried(self, owner_client, report_project, monkeypatch):
+        monkeypatch.setattr(report_service, 'build_pdf', lambda *args: 1 / 0)
+        failed = owner_client.post(f'/api/projects/{report_project.id}/report/')
+        assert failed.data['status'] == ReportStatus.FAILED
+        assert 'division by zero' in failed.data['error']
+
+        monkeypatch.undo()
+        retried = owner_client.post(f'/api/projects/{report_project.id}/report/')
+        assert retried.data['id'] == failed.data['id']
+        assert retried.data['status'] == ReportStatus.COMPLETED
+
+    def test_abandoned_running_report_is_retried(self, owner_client, report_project, settings):
+        settings.REPORTS_ASYNC = True
+        report = report_service.request_report(report_project)
+        ProjectReport.objects.filter(id=report.id).update(status=ReportStatus.RUNNING, started_at=timezone.now())
+        settings.REPORTS_ASYNC = False
+
+        running = owner_client.post(f'/api/projects/{report_project.id}/report/')
+        assert running.data['status'] == ReportStatus.RUNNING
+
+        ProjectReport.objects.filter(id=report.id).update(
+            started_at=timezone.now() - timedelta(seconds=settings.REPORT_STALE_SECONDS + 1)
+        )
+        retried = owner_client.post(f'/api/projects/{report_project.id}/report/')
+        assert retried.data['id'] == str(report.id)
+        assert retried.data['status'] == ReportStatus.COMPLETED
+
+    def test_completion_keeps_older_reports_still_running(self, report_project):
+        older = ProjectReport.objects.create(
+            project=report_project, version=0, status=ReportStatus.RUNNING, started_at=timezone.now()
+        )
+        newer = report_service.request_report(report_project)
+
+        assert newer.status == ReportStatus.COMPLETED
+        assert ProjectReport.objects.filter(id=older.id).exists()
+
+    def test_edit_during_generation_requeues_current_version(self, report_project, monkeypatch):
+        original = report_service.build_pdf
+        edits = []
+
+        def build_then_edit(project, version, include_summary=False):
+            pdf = original(project, version, include_summary)
+            if not edits:
+                edits.append(version)
+                Indicator.objects.filter(project=project, standard='STD-2').update(status=ComplianceStatus.COMPLIANT)
+                Project.bump_version(project.id)
+            return pdf
+
+        monkeypatch.setattr(report_service, 'build_pdf', build_then_edit)
+        report = report_service.request_report(report_project)
+
+        # The PDF built from the edited data is stored under the new version only
+        assert (report.version, report.status) == (edits[0] + 1, ReportStatus.COMPLETED)
+        assert list(ProjectReport.objects.values_list('version', flat=True)) == [report.version]
+
+    def test_stale_build_is_discarded(self, report_project, settings):
+        settings.REPORTS_ASYNC = True
+        report = report_service.request_report(report_project)
+        Project.bump_version(report_project.id)
+
+        report = report_service.generate_report(report.id)
+
+        assert (report.status, report.error, report.file_path) == (ReportStatus.FAILED, report_service.STALE_ERROR, '')
+        assert report_service.current_report(report_project).status == ReportStatus.QUEUED
+
+    def test_project_edits_invalidate_report(self, owner_client, report_project):
+        first = owner_client.post(f'/api/projects/{report_project.id}/report/').data
+        project = Project.objects.get(id=report_project.id)
+        project.version = 0
+        project.name = 'Renamed'
+        project.save()
+
+        assert owner_client.get(f'/api/projects/{report_project.id}/report/').status_code == status.HTTP_404_NOT_FOUND
+        assert Project.objects.get(id=report_project.id).version == first['version'] + 1
+
+    def test_other_users_cannot_request(self, api_client, report_project):
+        outsider = User.objects.create_user(username='outsider', password='testpass123')
+        api_client.force_authenticate(outsider)
+
+        assert api_client.post(f'/api/projects/{report_project.id}/report/').status_code == status.HTTP_404_NOT_FOUND
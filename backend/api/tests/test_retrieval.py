@@ -0,0 +1,168 @@
+"""
+Tests for the BM25 retrieval index used to pick assistant context.
+"""
+import csv
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.conf import settings
+from rest_framework import status
+
+from api import ai_services, retrieval
+from api.models import Evidence, Indicator
+
+PHC_CSV = settings.BASE_DIR / 'Final PHC list.csv'
+
+
+@pytest.fixture
+def phc_rows():
+    with open(PHC_CSV, encoding='utf-8-sig', newline='') as f:
+        return [
+            {'section': r['Section'], 'standard': r['Standard'], 'indicator': r['Indicator']}
+            for r in csv.DictReader(f)
+        ]
+
+
+@pytest.fixture(autouse=True)
+def clear_index_cache():
+    retrieval._project_indexes.clear()
+    yield
+    retrieval._project_indexes.clear()
+
+
+class TestBM25Index:
+    """Tests for the in-memory BM25 index"""
+
+    def test_ranks_matching_documents_first(self):
+        index = retrieval.BM25Index()
+        index.add('a', 'Fire extinguishers are inspected monthly')
+        index.add('b', 'Staff training records are maintained')
+        index.add('c', 'Fire exits are clearly marked')
+
+        ranked = [doc_id for doc_id, _ in index.search('fire extinguisher inspection', k=3)]
+
+        assert ranked[0] == 'a'
+        assert 'b' not in ranked
+
+    def test_incremental_update_and_remove(self):
+        index = retrieval.BM25Index()
+        index.add('a', 'biosafety cabinet certification')
+        index.add('a', 'waste disposal')
+        assert index.search('biosafety') == []
+        assert index.search('waste')[0][0] == 'a'
+
+        index.remove('a')
+        assert len(index) == 0
+        assert index.search('waste') == []
+
+    def test_query_of_only_stopwords_returns_nothing(self):
+        index = retrieval.BM25Index()
+        index.add('a', 'the laboratory')
+        assert index.search('what is the') == []
+
+    def test_search_is_fast_on_large_catalogue(self, phc_rows):
+        index = retrieval.BM25Index()
+        for i in range(5000):
+            row = phc_rows[i % len(phc_rows)]
+            index.add(i, retrieval.indicator_text(row))
+
+        start = time.perf_counter()
+        for _ in range(20):
+            index.search('quality control records for equipment calibration', k=10)
+        per_query_ms = (time.perf_counter() - start) / 20 * 1000
+
+        assert per_query_ms < 50
+
+
+class TestSelectRelevant:
+    """Tests for picking context from a client-posted list"""
+
+    def test_picks_relevant_rows_instead_of_first_rows(self, phc_rows):
+        selected = retrieval.select_relevant('How should sample transportation be recorded?', phc_rows, k=5)
+
+        assert len(selected) == 5
+        assert selected != phc_rows[:5]
+        assert any('transport' in row['indicator'].lower() for row in selected)
+
+    def test_falls_back_to_first_rows_without_matches(self, phc_rows):
+        assert retrieval.select_relevant('zzzz qqqq', phc_rows, k=3) == phc_rows[:3]
+
+    def test_assistant_prompt_uses_relevant_context(self, phc_rows):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text='answer')
+        with patch('api.ai_services.get_flash_model', return_value=model):
+            ai_services.ask_assistant('How should we handle sample transportation?', phc_rows)
+
+        prompt = model.generate_content.call_args[0][0]
+        assert 'transport' in prompt.lower()
+        assert phc_rows[0]['indicator'] not in prompt
+
+
+@pytest.mark.django_db
+class TestProjectIndex:
+    """Tests for the cached per-project index"""
+
+    def test_project_index_includes_evidence_notes(self, contributor_project):
+        target = Indicator.objects.create(
+            project=contributor_project, section='Safety', standard='S-1', indicator='Spill kit available'
+        )
+        Indicator.objects.create(project=contributor_project, section='QC', standard='Q-1', indicator='Daily QC run')
+        Evidence.objects.create(indicator=target, type='note', content='Mercury spill procedure posted')
+
+        assert retrieval.search_project(contributor_project.id, 'mercury procedure') == [target.id]
+
+    def test_cached_index_updates_incrementally(self, contributor_project):
+        Indicator.objects.create(project=contributor_project, section='QC', standard='Q-1', indicator='Daily QC run')
+        retrieval.get_project_index(contributor_project.id)
+
+        created = Indicator.objects.create(
+            project=contributor_project, section='Safety', standard='S-2', indicator='Eyewash station tested'
+        )
+        assert retrieval.search_project(contributor_project.id, 'eyewash') == [created.id]
+
+        created.delete()
+        assert retrieval.search_project(contributor_project.id, 'eyewash') == []
+
+    def test_ask_assistant_with_project_id(self, api_client, contributor_token, contributor_project):
+        target = Indicator.objects.create(
+            project=contributor_project, section='Safety', standard='S-3', indicator='Autoclave validation logs'
+        )
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+
+        with patch('api.ai_services.ask_assistant', return_value='ok') as mock_ask:
+            response = api_client.post(
+                '/api/ask-assistant/',
+                {'query': 'autoclave validation', 'project_id': str(contributor_project.id)},
+                format='json'
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        context = mock_ask.call_args[0][1]
+        assert [row['id'] for row in context] == [target.id]
+
+    def test_ask_assistant_without_hits_sends_first_rows(self, api_client, contributor_token, contributor_project):
+        for i in range(12):
+            Indicator.objects.create(
+                project=contributor_project, section='QC', standard=f'Q-{i:02d}', indicator='Daily QC run'
+            )
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+
+        with patch('api.ai_services.ask_assistant', return_value='ok') as mock_ask:
+            api_client.post(
+                '/api/ask-assistant/', {'query': 'zebra', 'project_id': str(contributor_project.id)}, format='json'
+            )
+
+        context = mock_ask.call_args[0][1]
+        assert [row['standard'] for row in context] == [f'Q-{i:02d}' for i in range(10)]
+
+    def test_ask_assistant_rejects_inaccessible_project(self, api_client, contributor_token, admin_user):
+        from api.models import Project
+        other = Project.objects.create(name='Other', owner=admin_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+
+        response = api_client.post(
+            '/api/ask-assistant/', {'query': 'anything', 'project_id': str(other.id)}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,84 @@
+"""
+Tests for the recurrence engine in scheduling_service.
+"""
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from api import scheduling_service
+from api.models import Frequency
+from api.scheduling_service import RULES, generate_periods, get_period_dates, get_rule
+
+
+class TestRecurrenceRules:
+    """Tests for compiled recurrence rules"""
+
+    @pytest.mark.parametrize('frequency,reference,expected', [
+        ('Daily', date(2026, 3, 4), (date(2026, 3, 4), date(2026, 3, 4))),
+        ('Weekly', date(2026, 3, 4), (date(2026, 3, 2), date(2026, 3, 8))),
+        ('Monthly', date(2024, 2, 15), (date(2024, 2, 1), date(2024, 2, 29))),
+        ('Monthly', date(2026, 12, 31), (date(2026, 12, 1), date(2026, 12, 31))),
+        ('Quarterly', date(2026, 8, 19), (date(2026, 7, 1), date(2026, 9, 30))),
+        ('semi-annual', date(2026, 6, 30), (date(2026, 1, 1), date(2026, 6, 30))),
+        ('semi-annual', date(2026, 7, 1), (date(2026, 7, 1), date(2026, 12, 31))),
+        ('Annually', date(2026, 5, 5), (date(2026, 1, 1), date(2026, 12, 31))),
+        ('One-time', date(2026, 5, 5), (date(2026, 5, 5), date(2026, 5, 5))),
+    ])
+    def test_period_dates(self, frequency, reference, expected):
+        assert get_period_dates(frequency, reference) == expected
+
+    def test_periods_tile_the_calendar(self):
+        for rule in list(RULES.values()) + [scheduling_service.BIWEEKLY, scheduling_service.SEMIANNUAL]:
+            periods = rule.periods_between(date(2023, 11, 20), date(2026, 2, 10))
+            assert periods[0][0] <= date(2023, 11, 20) <= periods[0][1]
+            assert periods[-1][0] <= date(2026, 2, 10) <= periods[-1][1]
+            for (_, prev_end), (next_start, _) in zip(periods, periods[1:]):
+                assert next_start == prev_end + timedelta(days=1)
+
+    def test_next_due_clips_to_month_end(self):
+        assert scheduling_service.calculate_next_due_date('Monthly', date(2026, 1, 31)) == date(2026, 2, 28)
+        assert scheduling_service.calculate_next_due_date('Annually', date(2024, 2, 29)) == date(2025, 2, 28)
+        assert scheduling_service.calculate_next_due_date('Weekly', date(2026, 12, 29)) == date(2027, 1, 5)
+
+    def test_out_of_range_dates(self):
+        assert scheduling_service.calculate_next_due_date('Daily', date.max) is None
+        assert scheduling_service.calculate_next_due_date('Monthly', date(9999, 12, 15)) is None
+        assert get_period_dates('Annually', date.max) == (date(9999, 1, 1), date.max)
+        assert get_period_dates('Weekly', date.max)[1] == date.max
+        assert get_period_dates('Daily', date.min) == (date.min, date.min)
+
+    def test_unknown_frequency(self):
+        assert get_rule('') is None
+        assert get_rule('sometimes') is None
+        assert scheduling_service.calculate_next_due_date('sometimes') is None
+
+    def test_period_indexes_match_single_date_lookup(self):
+        rule = RULES[Frequency.QUARTERLY]
+        dates = [date(2026, 1, 1) + timedelta(days=d) for d in range(0, 400, 7)]
+        indexes = rule.period_indexes(dates)
+        assert [rule.period_bounds(i) for i in indexes] == [rule.period_for(d) for d in dates]
+
+
+class TestGeneratePeriods:
+    """Tests for batched period generation"""
+
+    def test_groups_by_rule_and_skips_one_time(self):
+        periods = generate_periods(
+            [('a', 'Monthly'), ('b', 'Monthly'), ('c', 'One-time'), ('d', 'Weekly')],
+            date(2026, 1, 1), date(2026, 3, 31)
+        )
+        assert set(periods) == {'a', 'b', 'd'}
+        assert periods['a'] is periods['b']
+        assert len(periods['a']) == 3
+
+    def test_many_indicators_over_a_year(self):
+        frequencies = [(i, f) for i, f in enumerate(['Daily', 'Weekly', 'Monthly', 'Quarterly', 'Annually'] * 2000)]
+
+        start = time.perf_counter()
+        periods = generate_periods(frequencies, date(2025, 1, 1), date(2025, 12, 31))
+        elapsed = time.perf_counter() - start
+
+        assert len(periods[0]) == 365
+        assert len(periods[1]) == 53
+        assert elapsed < 0.5
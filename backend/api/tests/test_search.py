@@ -0,0 +1,87 @@
+"""
+Tests for full-text search over indicators and evidence.
+"""
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+
+from api.models import Evidence, Indicator, Project
+from api.search_service import search
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.fixture
+def searchable_project(contributor_project):
+    hygiene = Indicator.objects.create(
+        project=contributor_project, section='Infection Control', standard='IC-1',
+        indicator='Hand hygiene audit performed monthly', description='Observe hand washing compliance',
+    )
+    Indicator.objects.create(
+        project=contributor_project, section='Laboratory', standard='LAB-2',
+        indicator='Reagents are stored correctly', notes='Check the hygiene of the fridge',
+    )
+    Evidence.objects.create(indicator=hygiene, type='note', content='Hygiene audit completed in March')
+    return contributor_project
+
+
+@pytest.mark.django_db
+class TestSearch:
+    """Tests for GET /api/search/"""
+
+    def test_ranked_results_across_indicators_and_evidence(self, owner_client, searchable_project):
+        response = owner_client.get('/api/search/?q=hygiene')
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['results']
+        assert {r['type'] for r in results} == {'indicator', 'evidence'}
+        assert len(results) == 3
+        # A match in the indicator text outranks one in its notes
+        titles = [r['title'] for r in results if r['type'] == 'indicator']
+        assert titles == ['Hand hygiene audit performed monthly', 'Reagents are stored correctly']
+        evidence = next(r for r in results if r['type'] == 'evidence')
+        assert evidence['snippet'] == 'Hygiene audit completed in March'
+
+    def test_words_are_anded_prefixes(self, searchable_project):
+        assert [r['standard'] for r in search('hand audi', kinds=['indicator'])] == ['IC-1']
+        assert search('hand reagent') == []
+
+    def test_index_follows_writes(self, searchable_project):
+        indicator = Indicator.objects.get(standard='LAB-2')
+        indicator.indicator = 'Centrifuge calibration logged'
+        indicator.save()
+        Indicator.objects.filter(standard='IC-1').update(notes='Centrifuge area included')
+        Indicator.objects.bulk_create([
+            Indicator(project=searchable_project, section='Lab', standard='LAB-3', indicator='Centrifuge serviced'),
+        ])
+
+        assert {r['standard'] for r in search('centrifuge')} == {'IC-1', 'LAB-2', 'LAB-3'}
+        assert search('reagents') == []
+
+        Evidence.objects.all().delete()
+        Indicator.objects.filter(standard='IC-1').delete()
+        assert {r['standard'] for r in search('centrifuge')} == {'LAB-2', 'LAB-3'}
+        assert search('march') == []
+
+    def test_results_limited_to_accessible_projects(self, api_client, searchable_project, admin_user):
+        other = Project.objects.create(name='Other', owner=admin_user)
+        Indicator.objects.create(project=other, section='S', standard='X-1', indicator='Hygiene signage')
+        outsider = User.objects.create_user(username='outsider', password='testpass123')
+
+        api_client.force_authenticate(outsider)
+        assert api_client.get('/api/search/?q=hygiene').data['results'] == []
+
+        api_client.force_authenticate(admin_user)
+        assert api_client.get('/api/search/?q=hygiene').data['count'] == 4
+        scoped = api_client.get(f'/api/search/?q=hygiene&project={other.id}&type=indicator').data['results']
+        assert [r['standard'] for r in scoped] == ['X-1']
+
+    def test_invalid_parameters(self, owner_client, searchable_project):
+        assert owner_client.get('/api/search/').status_code == status.HTTP_400_BAD_REQUEST
+        assert owner_client.get('/api/search/?q=x&type=project').status_code == status.HTTP_400_BAD_REQUEST
+        assert owner_client.get('/api/search/?q=x&project=nope').status_code == status.HTTP_400_BAD_REQUEST
+        assert owner_client.get('/api/search/?q=the').data['results'] == []
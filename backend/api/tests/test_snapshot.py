@@ -0,0 +1,105 @@
+"""
+Tests for the streamed zip snapshot export.
+"""
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework import status
+
+from api.models import AuditAction, AuditLog, Evidence, Indicator
+from api.snapshot_service import iter_snapshot, storage_path
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.fixture
+def snapshot_project(contributor_project):
+    indicator = Indicator.objects.create(
+        project=contributor_project, section='Lab Safety', standard='STD-1', indicator='Logbook kept'
+    )
+    saved = default_storage.save('evidence/abc_logbook.pdf', ContentFile(b'%PDF-1.4 logbook'))
+    Evidence.objects.create(indicator=indicator, type='document', file_name='logbook.pdf', file_url=f'media/{saved}')
+    Evidence.objects.create(indicator=indicator, type='document', file_name='gone.pdf', file_url='media/evidence/gone.pdf')
+    Evidence.objects.create(
+        indicator=indicator, type='link', file_name='Drive doc', drive_web_view_link='https://drive.example/doc'
+    )
+    Evidence.objects.create(indicator=indicator, type='note', content='Checked daily')
+    return contributor_project
+
+
+def test_storage_path():
+    assert storage_path('media/evidence/a.pdf') == 'evidence/a.pdf'
+    assert storage_path('/media/evidence/a.pdf') == 'evidence/a.pdf'
+    assert storage_path('https://example.com/a.pdf') is None
+    assert storage_path('media/../secrets') is None
+    assert storage_path(None) is None
+
+
+@pytest.mark.django_db
+class TestSnapshotExport:
+    """Tests for GET /api/projects/{id}/snapshot.zip"""
+
+    def test_snapshot_contents_and_audit(self, owner_client, snapshot_project, contributor_user):
+        response = owner_client.get(f'/api/projects/{snapshot_project.id}/snapshot.zip')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/zip'
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        assert archive.testzip() is None
+        names = archive.namelist()
+        assert names[:2] == ['project.json', 'indicators.csv']
+        assert names[-1] == 'manifest.json'
+
+        project = json.loads(archive.read('project.json'))
+        assert project['name'] == snapshot_project.name
+        assert 'Logbook kept' in archive.read('indicators.csv').decode('utf-8-sig')
+
+        manifest = {entry['file_name']: entry for entry in json.loads(archive.read('manifest.json'))['evidence']}
+        stored = manifest['logbook.pdf']['path']
+        assert stored.startswith('evidence/lab-safety/') and stored.endswith('-logbook.pdf')
+        assert archive.read(stored) == b'%PDF-1.4 logbook'
+        assert manifest['gone.pdf'] == {**manifest['gone.pdf'], 'path': None, 'note': 'File missing from storage'}
+        assert manifest['Drive doc']['note'] == 'Linked file: https://drive.example/doc'
+        assert manifest[None]['note'] == 'No file'
+
+        audit = AuditLog.objects.get(action=AuditAction.EXPORT_SNAPSHOT)
+        assert audit.actor == contributor_user
+        assert audit.entity_id == str(snapshot_project.id)
+        assert audit.metadata == {'indicators': 1, 'evidence': 4}
+
+    def test_files_are_streamed_in_chunks(self, snapshot_project):
+        indicator = Indicator.objects.get(project=snapshot_project)
+        payload = os.urandom(300_000)
+        saved = default_storage.save('evidence/big.bin', ContentFile(payload))
+        Evidence.objects.create(indicator=indicator, type='document', file_name='big.bin', file_url=f'media/{saved}')
+
+        chunks = list(iter_snapshot(snapshot_project, chunk_size=16 * 1024))
+
+        assert max(len(chunk) for chunk in chunks) < 100_000
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        big = next(name for name in archive.namelist() if name.endswith('-big.bin'))
+        assert archive.read(big) == payload
+
+    def test_snapshot_requires_access(self, api_client, snapshot_project):
+        api_client.force_authenticate(User.objects.create_user(username='outsider', password='testpass123'))
+
+        response = api_client.get(f'/api/projects/{snapshot_project.id}/snapshot.zip')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not AuditLog.objects.filter(action=AuditAction.EXPORT_SNAPSHOT).exists()
@@ -0,0 +1,249 @@
+"""
+Tests for the project statistics, portfolio and compliance trend endpoints.
+"""
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from api import compliance_service
+from api.models import (
+    ComplianceSnapshot, ComplianceStatus, Evidence, EvidencePeriod, EvidenceReviewState, FrequencyLog, Indicator,
+    IndicatorEvidenceType, Project
+)
+from api.scheduling_service import get_period_dates
+from api.stats_service import compute_stats, take_snapshots
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.fixture
+def stats_project(contributor_project):
+    def indicator(section, status, score, evidence_type=IndicatorEvidenceType.TEXT, frequency=None):
+        return Indicator.objects.create(
+            project=contributor_project, section=section, standard=f'STD-{Indicator.objects.count()}',
+            indicator='Indicator', status=status, score=score, evidence_type=evidence_type, frequency=frequency,
+        )
+
+    text_ok = indicator('Lab', ComplianceStatus.COMPLIANT, 10)
+    Evidence.objects.create(indicator=text_ok, type='note', content='Done', review_state=EvidenceReviewState.ACCEPTED)
+    text_partial = indicator('Lab', ComplianceStatus.IN_PROGRESS, 5)
+    Evidence.objects.create(indicator=text_partial, type='link', review_state=EvidenceReviewState.ACCEPTED)
+    rejected = indicator('Lab', ComplianceStatus.NON_COMPLIANT, 5)
+    Evidence.objects.create(indicator=rejected, type='note', content='x', review_state=EvidenceReviewState.REJECTED)
+    Evidence.objects.create(indicator=rejected, type='note', content='y', review_state=EvidenceReviewState.ACCEPTED)
+    pending = indicator('Admin', ComplianceStatus.COMPLIANT, 20, IndicatorEvidenceType.FILE)
+    Evidence.objects.create(indicator=pending, type='document', file_url='media/a.pdf',
+                            review_state=EvidenceReviewState.UNDER_REVIEW)
+    file_ok = indicator('Admin', ComplianceStatus.NOT_APPLICABLE, 40, IndicatorEvidenceType.FILE)
+    Evidence.objects.create(indicator=file_ok, type='document', file_url='media/b.pdf', drive_file_id=None,
+                            review_state=EvidenceReviewState.ACCEPTED)
+    monthly = indicator('Admin', ComplianceStatus.NOT_STARTED, 10, IndicatorEvidenceType.FREQUENCY, 'Monthly')
+    old = Evidence.objects.create(indicator=monthly, type='note', content='Old', review_state=EvidenceReviewState.ACCEPTED)
+    Evidence.objects.filter(id=old.id).update(date_uploaded=timezone.now() - timedelta(days=70))
+    indicator('Admin', ComplianceStatus.NOT_STARTED, 10)
+    return contributor_project
+
+
+@pytest.mark.django_db
+class TestProjectStats:
+    """Tests for GET /api/projects/{id}/stats/"""
+
+    def test_stats_match_model_computations(self, owner_client, stats_project):
+        response = owner_client.get(f'/api/projects/{stats_project.id}/stats/')
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+        assert data['total_indicators'] == 7
+        assert data['status_counts'][ComplianceStatus.COMPLIANT] == 2
+        assert data['status_counts'][ComplianceStatus.NOT_APPLICABLE] == 1
+        # N/A scores are excluded from the weighted compliance
+        assert data['score'] == {
+            'score_total': 100, 'applicable_score': 60, 'compliant_score': 30, 'weighted_compliance': 50.0,
+        }
+        sections = {row['section']: row for row in data['sections']}
+        assert (sections['Lab']['total'], sections['Lab']['weighted_compliance']) == (3, 50.0)
+        assert sections['Admin']['compliant_score'] == 20
+
+        expected = Counter(ind.get_evidence_state() for ind in Indicator.objects.filter(project=stats_project))
+        assert {state: n for state, n in data['evidence_states'].items() if n} == dict(expected)
+
+        backlog = data['review_backlog']
+        assert (backlog['under_review'], backlog['accepted'], backlog['pending_total']) == (1, 5, 1)
+        assert backlog['oldest_pending'] is not None
+
+    def test_period_rule_agrees_across_endpoints(self, owner_client, contributor_project):
+        def monthly(name):
+            return Indicator.objects.create(
+                project=contributor_project, section='QC', standard=name, indicator=name,
+                evidence_type=IndicatorEvidenceType.FREQUENCY, frequency='Monthly',
+            )
+
+        start, end = get_period_dates('Monthly', timezone.localdate())
+        signed_only = monthly('signed')
+        FrequencyLog.objects.create(indicator=signed_only, period_start=start, period_end=end,
+                                    is_compliant=True, notes='Quick log')
+        half = monthly('half')
+        EvidencePeriod.objects.create(indicator=half, period_start=start, period_end=end, expected_evidence_count=2)
+        Evidence.objects.create(indicator=half, type='note', content='1 of 2', review_state=EvidenceReviewState.ACCEPTED)
+
+        periods = compliance_service.evaluate_project(contributor_project.id)
+        states = owner_client.get(f'/api/projects/{contributor_project.id}/stats/').data['evidence_states']
+
+        assert periods[signed_only.id].current_met and not periods[half.id].current_met
+        assert (signed_only.get_evidence_state(), half.get_evidence_state()) == ('accepted', 'partial_evidence')
+        assert {state: n for state, n in states.items() if n} == {'accepted': 1, 'partial_evidence': 1}
+
+        Evidence.objects.create(indicator=half, type='note', content='2 of 2', review_state=EvidenceReviewState.ACCEPTED)
+        states = owner_client.get(f'/api/projects/{contributor_project.id}/stats/').data['evidence_states']
+        assert compliance_service.evaluate_project(contributor_project.id)[half.id].current_met
+        assert half.get_evidence_state() == 'accepted'
+        assert states['accepted'] == 2
+
+    def test_stats_are_cached_until_a_write(self, owner_client, stats_project):
+        url = f'/api/projects/{stats_project.id}/stats/'
+        first = owner_client.get(url).data
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = owner_client.get(url).data
+        assert cached == first
+        assert not any('GROUP BY' in q['sql'] for q in queries)
+
+        indicator = Indicator.objects.filter(project=stats_project, status=ComplianceStatus.NOT_STARTED).first()
+        indicator.status = ComplianceStatus.COMPLIANT
+        indicator.save()
+
+        updated = owner_client.get(url).data
+        assert updated['version'] > first['version']
+        assert updated['status_counts'][ComplianceStatus.COMPLIANT] == 3
+
+    def test_empty_project(self, contributor_project):
+        stats = compute_stats(contributor_project.id)
+
+        assert stats['total_indicators'] == 0
+        assert stats['score']['weighted_compliance'] == 0.0
+        assert stats['review_backlog']['oldest_pending'] is None
+
+    def test_stats_require_access(self, api_client, stats_project):
+        api_client.force_authenticate(User.objects.create_user(username='outsider', password='testpass123'))
+
+        assert api_client.get(f'/api/projects/{stats_project.id}/stats/').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestPortfolio:
+    """Tests for GET /api/admin/portfolio/"""
+
+    @pytest.fixture
+    def admin_client(self, api_client, admin_token):
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_token["access"]}')
+        return api_client
+
+    def _project(self, name, owner, compliant, other, overdue=0, pending=0):
+        project = Project.objects.create(name=name, owner=owner)
+        past = timezone.localdate() - timedelta(days=3)
+        for i in range(compliant + other):
+            ind = Indicator.objects.create(
+                project=project, section='S', standard=f'{name}-{i}', indicator='I', score=10,
+                status=ComplianceStatus.COMPLIANT if i < compliant else ComplianceStatus.IN_PROGRESS,
+                next_due_date=past if i < overdue else None,
+            )
+            if i < pending:
+                Evidence.objects.create(indicator=ind, type='note', content='x',
+                                        review_state=EvidenceReviewState.UNDER_REVIEW)
+        return project
+
+    def test_rollups_sorted_worst_first(self, admin_client, admin_user):
+        self._project('Good Lab', admin_user, compliant=3, other=1)
+        self._project('Bad Lab', admin_user, compliant=1, other=3, overdue=2, pending=1)
+        Project.objects.create(name='Empty Lab', owner=admin_user)
+
+        response = admin_client.get('/api/admin/portfolio/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [p['name'] for p in response.data['projects']] == ['Empty Lab', 'Bad Lab', 'Good Lab']
+        bad = response.data['projects'][1]
+        assert (bad['weighted_compliance'], bad['overdue'], bad['pending_reviews'], bad['evidence_total']) == (25.0, 2, 1, 1)
+        summary = response.data['summary']
+        assert (summary['project_count'], summary['total'], summary['overdue']) == (3, 8, 2)
+        assert summary['weighted_compliance'] == 50.0
+
+        by_overdue = admin_client.get('/api/admin/portfolio/?ordering=-overdue').data['projects']
+        assert by_overdue[0]['name'] == 'Bad Lab'
+
+    def test_query_count_is_independent_of_project_count(self, admin_client, admin_user):
+        self._project('A', admin_user, compliant=1, other=1, pending=1)
+        with CaptureQueriesContext(connection) as few:
+            admin_client.get('/api/admin/portfolio/')
+        for name in 'BCDE':
+            self._project(name, admin_user, compliant=1, other=2, overdue=1, pending=2)
+        with CaptureQueriesContext(connection) as many:
+            admin_client.get('/api/admin/portfolio/')
+
+        assert len(many) == len(few)
+
+    def test_invalid_ordering_and_non_admin(self, admin_client, contributor_user):
+        assert admin_client.get('/api/admin/portfolio/?ordering=owner').status_code == status.HTTP_400_BAD_REQUEST
+
+        admin_client.force_authenticate(contributor_user)
+        assert admin_client.get('/api/admin/portfolio/').status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestComplianceTrend:
+    """Tests for snapshot_compliance and GET /api/projects/{id}/trend/"""
+
+    def test_snapshot_matches_stats_and_is_idempotent(self, stats_project):
+        call_command('snapshot_compliance', stdout=StringIO())
+        call_command('snapshot_compliance', stdout=StringIO())
+
+        snapshot = ComplianceSnapshot.objects.get(project=stats_project)
+        assert snapshot.date == timezone.localdate()
+        stats = compute_stats(stats_project.id)
+        assert snapshot.total_indicators == stats['total_indicators']
+        assert snapshot.status_counts == stats['status_counts']
+        assert snapshot.evidence_states == stats['evidence_states']
+        assert (snapshot.applicable_score, snapshot.compliant_score) == (60, 30)
+
+        Indicator.objects.filter(project=stats_project, status=ComplianceStatus.NOT_STARTED).update(
+            status=ComplianceStatus.COMPLIANT
+        )
+        call_command('snapshot_compliance', '--project', str(stats_project.id), stdout=StringIO())
+
+        snapshot = ComplianceSnapshot.objects.get(project=stats_project)
+        assert snapshot.status_counts[ComplianceStatus.COMPLIANT] == 4
+
+    def test_trend_reads_date_range(self, owner_client, stats_project):
+        today = timezone.localdate()
+        for days_ago in (100, 10, 1):
+            take_snapshots(today - timedelta(days=days_ago), project_ids=[stats_project.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = owner_client.get(f'/api/projects/{stats_project.id}/trend/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [p['date'] for p in response.data['points']] == [today - timedelta(days=10), today - timedelta(days=1)]
+        assert response.data['points'][0]['weighted_compliance'] == 50.0
+        assert sum('compliancesnapshot' in q['sql'] for q in queries) == 1
+
+        ranged = owner_client.get(
+            f'/api/projects/{stats_project.id}/trend/?from={today - timedelta(days=200)}&to={today - timedelta(days=50)}'
+        )
+        assert len(ranged.data['points']) == 1
+
+    def test_trend_rejects_bad_dates(self, owner_client, stats_project):
+        url = f'/api/projects/{stats_project.id}/trend/'
+
+        assert owner_client.get(f'{url}?from=yesterday').status_code == status.HTTP_400_BAD_REQUEST
+        assert owner_client.get(f'{url}?from=2026-02-01&to=2026-01-01').status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,95 @@
+"""
+Tests for the upcoming/overdue due-date endpoints.
+"""
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from api.models import Evidence, Indicator, Project
+
+
+def _indicator(project, days, name=None):
+    return Indicator.objects.create(
+        project=project, section='S', standard='STD', indicator=name or f'Due in {days}',
+        next_due_date=timezone.localdate() + timedelta(days=days),
+    )
+
+
+@pytest.fixture
+def owner_client(api_client, contributor_token):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {contributor_token["access"]}')
+    return api_client
+
+
+@pytest.mark.django_db
+class TestProjectUpcoming:
+    """Tests for /api/projects/{id}/upcoming/"""
+
+    def test_window_is_filtered_and_sorted(self, owner_client, contributor_project):
+        _indicator(contributor_project, 10)
+        _indicator(contributor_project, -3)
+        _indicator(contributor_project, 45)
+        Indicator.objects.create(project=contributor_project, section='S', standard='STD', indicator='No date')
+
+        response = owner_client.get(f'/api/projects/{contributor_project.id}/upcoming/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['daysUntilDue'] for row in response.data] == [-3, 10]
+        assert response.data[0]['isOverdue'] is True
+        assert 'evidenceState' not in response.data[0]
+
+    def test_configurable_window(self, owner_client, contributor_project):
+        _indicator(contributor_project, 45)
+
+        response = owner_client.get(f'/api/projects/{contributor_project.id}/upcoming/?days=60')
+        assert len(response.data) == 1
+
+        response = owner_client.get(f'/api/projects/{contributor_project.id}/upcoming/?days=abc')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_pagination_with_limit(self, owner_client, contributor_project):
+        for days in range(5):
+            _indicator(contributor_project, days)
+
+        response = owner_client.get(f'/api/projects/{contributor_project.id}/upcoming/?limit=2&offset=2')
+
+        assert response.data['count'] == 5
+        assert [row['daysUntilDue'] for row in response.data['results']] == [2, 3]
+
+    def test_query_count_does_not_grow_with_rows(self, owner_client, contributor_project):
+        for days in range(20):
+            ind = _indicator(contributor_project, days)
+            Evidence.objects.create(indicator=ind, type='note', content='log')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = owner_client.get(f'/api/projects/{contributor_project.id}/upcoming/')
+
+        assert len(response.data) == 20
+        assert len(response.data[0]['evidence']) == 1
+        assert len(queries) < 10
+
+
+@pytest.mark.django_db
+class TestMyUpcoming:
+    """Tests for the cross-project /api/upcoming/ endpoint"""
+
+    def test_spans_accessible_projects_only(self, owner_client, contributor_user, contributor_project, admin_user):
+        shared = Project.objects.create(name='Shared', owner=admin_user)
+        shared.members.add(contributor_user)
+        private = Project.objects.create(name='Private', owner=admin_user)
+        _indicator(contributor_project, 5, 'Own')
+        _indicator(shared, 1, 'Shared')
+        _indicator(private, 2, 'Private')
+
+        response = owner_client.get('/api/upcoming/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['indicator'] for row in response.data] == ['Shared', 'Own']
+        assert response.data[0]['projectName'] == 'Shared'
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.get('/api/upcoming/').status_code == status.HTTP_401_UNAUTHORIZED
@@ -8,9 +8,12 @@ router.register(r'projects', views.ProjectViewSet)
 router.register(r'indicators', views.IndicatorViewSet)
 router.register(r'evidence', views.EvidenceViewSet)
 router.register(r'audit-logs', views.AuditLogViewSet, basename='audit-log')
+router.register(r'import-jobs', views.ImportJobViewSet, basename='import-job')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('projects/<uuid:pk>/export.csv', views.ProjectViewSet.as_view({'get': 'export_csv'}), name='project-export-csv'),
+    path('projects/<uuid:pk>/snapshot.zip', views.ProjectViewSet.as_view({'get': 'export_snapshot'}), name='project-snapshot'),
     
     # Authentication endpoints
     path('auth/register/', views.register, name='register'),
@@ -31,6 +34,15 @@ urlpatterns = [
     path('compliance-guide/', views.compliance_guide, name='compliance-guide'),
     path('analyze-tasks/', views.analyze_tasks, name='analyze-tasks'),
     
+    # Search
+    path('search/', views.search, name='search'),
+    
+    # Admin endpoints
+    path('admin/portfolio/', views.portfolio, name='admin-portfolio'),
+    
+    # Scheduling endpoints
+    path('upcoming/', views.my_upcoming, name='my-upcoming'),
+    
     # Health check endpoints
     path('health/', views.health_check, name='health-check'),
     path('ready/', views.readiness_check, name='readiness-check'),
@@ -1,6 +1,8 @@
+import base64
 import uuid
 import mimetypes
 import logging
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 import os
@@ -14,6 +16,8 @@ from django.db import models
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenRefreshView
@@ -21,11 +25,13 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 logger = logging.getLogger(__name__)
 
-from .models import Project, Indicator, Evidence, ComplianceStatus, UserProfile, EvidenceReviewState
+from .models import (
+    Project, Indicator, Evidence, ComplianceStatus, UserProfile, EvidenceReviewState, AICategorization, Frequency
+)
 from django.utils import timezone as django_timezone
 from .serializers import (
     ProjectSerializer, ProjectCreateSerializer,
-    IndicatorSerializer, EvidenceSerializer,
+    IndicatorSerializer, EvidenceSerializer, UpcomingIndicatorSerializer,
     AnalyzeChecklistInputSerializer, AnalyzeCategorizationInputSerializer,
     AskAssistantInputSerializer, ReportSummaryInputSerializer,
     ConvertDocumentInputSerializer, ComplianceGuideInputSerializer,
@@ -33,8 +39,10 @@ from .serializers import (
     AnalyzeFrequencyGroupingInputSerializer,
     UserSerializer, UserRegistrationSerializer, LoginSerializer, ChangePasswordSerializer
 )
-from .permissions import IsProjectOwnerOrReadOnly, IsProjectMember, IsAdmin
-from . import ai_services
+from .permissions import (
+    IsProjectOwnerOrReadOnly, IsProjectMember, IsAdmin, get_accessible_projects, get_writable_projects
+)
+from . import ai_services, ai_metrics, ai_guard, prompt_builder
 
 
 # Authentication Views
@@ -112,16 +120,21 @@ class ProjectViewSet(viewsets.ModelViewSet):
         from .permissions import IsAdmin, IsProjectOwnerOrReadOnly
         if self.action in ['create', 'destroy']:
             permission_classes = [IsAdmin]
+        elif self.action == 'report':
+            # Generating a report changes no project data; members may request one
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = [IsAuthenticated, IsProjectOwnerOrReadOnly]
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
         """Filter projects to show only user's projects"""
-        queryset = Project.objects.prefetch_related(
-            'indicators',
-            'indicators__evidence'
-        ).all()
+        queryset = Project.objects.all()
+        if self.action not in ('export_csv', 'export_snapshot', 'report', 'report_download', 'stats', 'trend'):
+            queryset = queryset.prefetch_related(
+                'indicators',
+                'indicators__evidence'
+            )
         
         # Admin can see all projects
         if hasattr(self.request.user, 'profile') and self.request.user.profile.is_admin:
@@ -177,57 +190,214 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='import-indicators')
     def import_indicators(self, request, pk=None):
-        """Import indicators via CSV"""
+        """
+        Queue a background CSV import; poll the returned job for progress.
+
+        With ``dry_run=true`` (query or form field) the file is compared with
+        the stored indicators and the diff is returned without writing.
+        """
         project = self.get_object()
         file = request.FILES.get('file')
         
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
-        from .csv_import_service import CSVImportService
-        service = CSVImportService(project)
-        result = service.import_csv(file)
-        
-        # Audit Log
+        if _is_true(request.query_params.get('dry_run') or request.data.get('dry_run')):
+            from .csv_import_service import CSVImportService
+            result = CSVImportService(project, dry_run=True).import_csv(file, user=request.user)
+            response_status = status.HTTP_400_BAD_REQUEST if result.failed else status.HTTP_200_OK
+            return Response(result.to_dict(), status=response_status)
+
+        from . import import_jobs
+        from .serializers import ImportJobSerializer
+        job = import_jobs.create_job(project, file, user=request.user, request=request)
+        job.refresh_from_db()
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='import-indicators/progress')
+    def import_progress(self, request, pk=None):
+        """Status of the project's latest CSV import job"""
+        project = self.get_object()
+        from .models import ImportJob
+        from .serializers import ImportJobSerializer
+        job = ImportJob.objects.filter(project=project).order_by('-created_at').first()
+        if job is None:
+            return Response({'error': 'No import found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ImportJobSerializer(job).data)
+
+    def export_csv(self, request, pk=None):
+        """Stream the project's indicators as CSV in the import layout (routed as ``export.csv``)"""
+        project = self.get_object()
+        from django.http import StreamingHttpResponse
+        from django.utils.text import slugify
+        from .csv_export_service import stream_csv
+        response = StreamingHttpResponse(stream_csv(project), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{slugify(project.name) or "project"}-indicators.csv"'
+        return response
+
+    def export_snapshot(self, request, pk=None):
+        """Stream a zip of the project JSON, indicators CSV and evidence files (routed as ``snapshot.zip``)"""
+        project = self.get_object()
+        from django.http import StreamingHttpResponse
+        from django.utils.text import slugify
         from .audit import log_audit
         from .models import AuditAction
+        from .snapshot_service import iter_snapshot
         log_audit(
             actor=request.user,
-            action=AuditAction.IMPORT,
+            action=AuditAction.EXPORT_SNAPSHOT,
             entity_type='Project',
             entity_id=project.id,
-            summary=f"Imported indicators CSV. Created: {result.indicators_created}, Updated: {result.indicators_updated}",
-            metadata=result.to_dict(),
-            request=request
+            summary=f"Exported snapshot of project: {project.name}",
+            request=request,
+            metadata={
+                'indicators': Indicator.objects.filter(project=project).count(),
+                'evidence': Evidence.objects.filter(indicator__project=project).count(),
+            },
         )
-        
-        return Response(result.to_dict())
+        response = StreamingHttpResponse(iter_snapshot(project), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{slugify(project.name) or "project"}-snapshot.zip"'
+        return response
+
+    @action(detail=True, methods=['get', 'post'])
+    def report(self, request, pk=None):
+        """
+        PDF report for the project's current version.
+
+        POST requests one (``include_summary`` adds the AI summary text) and
+        returns 200 if it is already built, 202 while it is generated. GET
+        returns the status for ``?summary=``. A built report is reused until
+        the project changes.
+        """
+        project = self.get_object()
+        from . import report_service
+        from .models import ReportStatus
+        from .serializers import ProjectReportSerializer
+        if request.method == 'POST':
+            report = report_service.request_report(
+                project, include_summary=_is_true(request.data.get('include_summary')), user=request.user
+            )
+            response_status = status.HTTP_200_OK if report.status == ReportStatus.COMPLETED else status.HTTP_202_ACCEPTED
+            return Response(ProjectReportSerializer(report).data, status=response_status)
+
+        report = report_service.current_report(project, _is_true(request.query_params.get('summary')))
+        if report is None:
+            return Response({'error': 'No report for the current project version'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ProjectReportSerializer(report).data)
+
+    @action(detail=True, methods=['get'], url_path='report/download')
+    def report_download(self, request, pk=None):
+        """Download the built PDF report for the project's current version"""
+        project = self.get_object()
+        from django.utils.text import slugify
+        from . import report_service
+        from .models import ReportStatus
+        report = report_service.current_report(project, _is_true(request.query_params.get('summary')))
+        if report is None or report.status != ReportStatus.COMPLETED:
+            return Response({'error': 'Report not ready'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            default_storage.open(report.file_path, 'rb'),
+            as_attachment=True,
+            filename=f'{slugify(project.name) or "project"}-report.pdf',
+            content_type='application/pdf',
+        )
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """Status, section, score, evidence-state and review-backlog statistics (cached until the next write)"""
+        project = self.get_object()
+        from .stats_service import get_stats
+        return Response(get_stats(project))
+
+    @action(detail=True, methods=['get'])
+    def trend(self, request, pk=None):
+        """Daily compliance snapshots between ``?from=`` and ``?to=`` (default: the last 90 days)"""
+        project = self.get_object()
+        try:
+            end = date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else timezone.localdate()
+            start = (date.fromisoformat(request.query_params['from']) if request.query_params.get('from')
+                     else end - timedelta(days=90))
+        except ValueError:
+            return Response({'error': 'from and to must be dates (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({'error': 'from must not be after to'}, status=status.HTTP_400_BAD_REQUEST)
+
+        from .stats_service import compliance_trend
+        return Response({
+            'project_id': str(project.id),
+            'from': start,
+            'to': end,
+            'points': compliance_trend(project.id, start, end),
+        })
 
     @action(detail=True, methods=['get'])
     def upcoming(self, request, pk=None):
-        """Get upcoming indicators (due soon)"""
+        """Get upcoming indicators (overdue or due within ``?days=``, default 30)"""
         project = self.get_object()
-        indicators = project.indicators.filter(next_due_date__isnull=False)
-        
-        from . import scheduling_service
-        from datetime import date
-        
-        upcoming_list = []
-        today = date.today()
-        
-        for ind in indicators:
-            days_left = scheduling_service.days_until_due(ind.next_due_date, today)
-            # Include if overdue or due within 30 days
-            if days_left <= 30:
-                data = IndicatorSerializer(ind).data
-                data['days_until_due'] = days_left
-                data['is_overdue'] = days_left < 0
-                upcoming_list.append(data)
-                
-        # Sort by due date (days left)
-        upcoming_list.sort(key=lambda x: x['days_until_due'])
-        
-        return Response(upcoming_list)
+        return _upcoming_response(request, Indicator.objects.filter(project=project))
+
+    @action(detail=True, methods=['get'], url_path='frequency-compliance')
+    def frequency_compliance(self, request, pk=None):
+        """Per-period compliance of frequency-based indicators, evaluated since ``?since=`` (default one year)"""
+        project = self.get_object()
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = date.fromisoformat(since)
+            except ValueError:
+                return Response({'error': 'since must be a date (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        from . import compliance_service
+        results = compliance_service.evaluate_project(project.id, since=since or None)
+        summary = {
+            key: 0 for key in (compliance_service.COMPLIANT, compliance_service.DUE, compliance_service.OVERDUE)
+        }
+        for evaluation in results.values():
+            summary[evaluation.status] += 1
+        return Response({
+            'summary': summary,
+            'results': [evaluation.to_dict() for evaluation in results.values()],
+        })
+
+
+class UpcomingPagination(LimitOffsetPagination):
+    """Opt-in paging: responses stay a plain list unless ``?limit=`` is given"""
+    default_limit = None
+    max_limit = 500
+
+
+def _upcoming_response(request, queryset):
+    """Serialize the due window of an Indicator queryset, paginated when requested"""
+    try:
+        window_days = int(request.query_params.get('days', settings.UPCOMING_WINDOW_DAYS))
+    except ValueError:
+        return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 <= window_days <= settings.UPCOMING_MAX_WINDOW_DAYS:
+        return Response(
+            {'error': f'days must be between 0 and {settings.UPCOMING_MAX_WINDOW_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    from . import scheduling_service
+    today = django_timezone.localdate()
+    queryset = scheduling_service.due_within(queryset, window_days, today).select_related('project').prefetch_related(
+        models.Prefetch('evidence', queryset=Evidence.objects.select_related('reviewed_by'))
+    )
+
+    paginator = UpcomingPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    context = {'request': request, 'today': today}
+    if page is not None:
+        return paginator.get_paginated_response(UpcomingIndicatorSerializer(page, many=True, context=context).data)
+    return Response(UpcomingIndicatorSerializer(queryset, many=True, context=context).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_upcoming(request):
+    """Upcoming indicators across every project the user can access"""
+    projects = get_accessible_projects(request.user).values('id')
+    return _upcoming_response(request, Indicator.objects.filter(project__in=projects))
 
 
 class IndicatorViewSet(viewsets.ModelViewSet):
@@ -325,10 +495,20 @@ class IndicatorViewSet(viewsets.ModelViewSet):
         # Scheduling / Recurrence update
         if indicator.schedule_type == 'recurring' and indicator.frequency:
             from . import scheduling_service
-            next_date = scheduling_service.calculate_next_due_date(indicator.frequency)
-            if next_date:
-                indicator.next_due_date = next_date
-                # Also log frequency log logic here if needed (omitted for brevity but recommended)
+            # Record the current period as signed off; materialize_periods keeps the rest in sync
+            from .models import FrequencyLog
+            period_start, period_end = scheduling_service.get_period_dates(indicator.frequency)
+            FrequencyLog.objects.update_or_create(
+                indicator=indicator,
+                period_start=period_start,
+                period_end=period_end,
+                defaults={'submitted_by': request.user, 'is_compliant': True, 'notes': 'Quick log'}
+            )
+            # Due at the end of the following period, the date materialize_periods derives from the log
+            if scheduling_service.get_rule(indicator.frequency) is not None and period_end < date.max:
+                indicator.next_due_date = scheduling_service.get_period_dates(
+                    indicator.frequency, period_end + timedelta(days=1)
+                )[1]
         
         indicator.save()
         serializer = self.get_serializer(indicator)
@@ -557,6 +737,106 @@ class EvidenceViewSet(viewsets.ModelViewSet):
 
 # AI Service Endpoints
 
+_INDICATOR_FIELDS = {f.name for f in Indicator._meta.concrete_fields}
+
+# AI group labels mapped to the Indicator fields and values written back
+_CATEGORIZATION_VALUES = {value: value for value in AICategorization.values}
+_FREQUENCY_GROUP_VALUES = {
+    'one_time': Frequency.ONE_TIME, 'daily': Frequency.DAILY, 'weekly': Frequency.WEEKLY,
+    'monthly': Frequency.MONTHLY, 'quarterly': Frequency.QUARTERLY, 'annually': Frequency.ANNUALLY,
+}
+
+
+def _resolve_ai_indicators(request, data, task_name):
+    """
+    Return ``(project, indicators, error_response)`` for an AI endpoint.
+
+    Posted indicators are used as-is. With ``project_id`` the indicators are
+    loaded in one query restricted to the fields the task's prompt uses.
+    """
+    project_id = data.get('project_id')
+    if not project_id:
+        return None, data.get('indicators', []), None
+
+    projects = get_writable_projects(request.user) if data.get('write_back') else get_accessible_projects(request.user)
+    project = projects.filter(id=project_id).first()
+    if project is None:
+        if data.get('write_back') and get_accessible_projects(request.user).filter(id=project_id).exists():
+            return None, None, Response(
+                {'error': 'You do not have permission to modify this project'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return None, None, Response({'error': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    queryset = Indicator.objects.filter(project=project)
+    if data.get('indicator_ids'):
+        queryset = queryset.filter(id__in=data['indicator_ids'])
+    for field in ('section', 'status', 'frequency'):
+        if data.get(field):
+            queryset = queryset.filter(**{field: data[field]})
+
+    fields = ['id'] + [f for f in prompt_builder.TASKS[task_name].fields if f in _INDICATOR_FIELDS and f != 'id']
+    indicators = list(queryset.values(*fields))
+    for row in indicators:
+        row['id'] = str(row['id'])
+    return project, indicators, None
+
+
+def _write_back_groups(request, project, groups, field, values):
+    """Set ``field`` on each grouped indicator of ``project`` with one bulk_update"""
+    target = {}
+    for group, ids in groups.items():
+        if group in values:
+            for ind_id in ids:
+                target[str(ind_id)] = values[group]
+    indicators = [
+        ind for ind in Indicator.objects.filter(project=project, id__in=_valid_uuids(target)).only('id', field)
+        if getattr(ind, field) != target[str(ind.id)]
+    ]
+    for ind in indicators:
+        setattr(ind, field, target[str(ind.id)])
+    return _save_write_back(request, project, indicators, [field])
+
+
+def _is_true(value):
+    """Boolean query/form flag: 1, true or yes"""
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def _valid_uuids(ids):
+    valid = []
+    for value in ids:
+        try:
+            valid.append(uuid.UUID(str(value)))
+        except ValueError:
+            continue
+    return valid
+
+
+def _save_write_back(request, project, indicators, fields):
+    now = django_timezone.now()
+    for ind in indicators:
+        ind.last_updated = now
+    Indicator.objects.bulk_update(indicators, fields + ['last_updated'], batch_size=500)
+    if indicators:
+        from . import retrieval
+        from .audit import log_audit
+        from .models import AuditAction
+        # bulk_update skips post_save, so drop the cached assistant index
+        retrieval.invalidate_project(project.id)
+        Project.bump_version(project.id)
+        log_audit(
+            actor=request.user,
+            action=AuditAction.UPDATE,
+            entity_type='Project',
+            entity_id=project.id,
+            summary=f"Saved AI results ({', '.join(fields)}) on {len(indicators)} indicators",
+            metadata={'fields': fields, 'updated': len(indicators)},
+            request=request
+        )
+    return len(indicators)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def analyze_checklist(request):
@@ -568,9 +848,40 @@ def analyze_checklist(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    indicators = serializer.validated_data['indicators']
-    result = ai_services.analyze_checklist(indicators)
-    return Response({'indicators': result})
+    project, indicators, error = _resolve_ai_indicators(request, serializer.validated_data, 'analyze_checklist')
+    if error:
+        return error
+    write_back = serializer.validated_data['write_back']
+    # Default enrichment is only a placeholder, so it is never saved
+    result = ai_services.analyze_checklist(indicators, allow_fallback=not write_back)
+    if result is None:
+        return Response(
+            {'error': 'AI service unavailable; nothing was saved', 'updated': 0},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    response = {'indicators': result}
+    if write_back:
+        enriched = {str(item.get('id')): item for item in result}
+        to_update = []
+        for ind in Indicator.objects.filter(project=project, id__in=_valid_uuids(enriched)).only(
+            'id', 'description', 'frequency', 'score'
+        ):
+            item = enriched[str(ind.id)]
+            changed = False
+            # Enrichment only fills in what is missing, matching the prompt
+            if not ind.description and item.get('description'):
+                ind.description = item['description']
+                changed = True
+            if not ind.frequency and item.get('frequency') in Frequency.values:
+                ind.frequency = item['frequency']
+                changed = True
+            if not ind.score and isinstance(item.get('score'), int) and item['score']:
+                ind.score = item['score']
+                changed = True
+            if changed:
+                to_update.append(ind)
+        response['updated'] = _save_write_back(request, project, to_update, ['description', 'frequency', 'score'])
+    return Response(response)
 
 
 @api_view(['POST'])
@@ -584,8 +895,12 @@ def analyze_categorization(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    indicators = serializer.validated_data['indicators']
+    project, indicators, error = _resolve_ai_indicators(request, serializer.validated_data, 'analyze_categorization')
+    if error:
+        return error
     result = ai_services.analyze_categorization(indicators)
+    if serializer.validated_data['write_back']:
+        _write_back_groups(request, project, result, 'ai_categorization', _CATEGORIZATION_VALUES)
     return Response(result)
 
 
@@ -602,6 +917,25 @@ def ask_assistant(request):
     
     query = serializer.validated_data['query']
     indicators = serializer.validated_data.get('indicators', [])
+    
+    project_id = serializer.validated_data.get('project_id')
+    if project_id:
+        # Pick context server-side from the project's retrieval index
+        if not get_accessible_projects(request.user).filter(id=project_id).exists():
+            return Response({'error': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
+        from . import retrieval
+        fields = ('id', 'section', 'standard', 'indicator', 'description', 'status', 'frequency', 'notes')
+        ids = retrieval.search_project(project_id, query, ai_services.ASSISTANT_CONTEXT_INDICATORS)
+        if ids:
+            by_id = {row['id']: row for row in Indicator.objects.filter(id__in=ids).values(*fields)}
+            indicators = [by_id[i] for i in ids if i in by_id]
+        else:
+            # No term matched: send the first rows, as retrieval.select_relevant does for client lists
+            indicators = list(
+                Indicator.objects.filter(project_id=project_id).order_by('section', 'standard', 'indicator')
+                .values(*fields)[:ai_services.ASSISTANT_CONTEXT_INDICATORS]
+            )
+    
     result = ai_services.ask_assistant(query, indicators)
     return Response({'response': result})
 
@@ -617,7 +951,9 @@ def report_summary(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    indicators = serializer.validated_data['indicators']
+    _, indicators, error = _resolve_ai_indicators(request, serializer.validated_data, 'generate_report_summary')
+    if error:
+        return error
     result = ai_services.generate_report_summary(indicators)
     return Response({'summary': result})
 
@@ -649,7 +985,15 @@ def compliance_guide(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    indicator = serializer.validated_data['indicator']
+    indicator = serializer.validated_data.get('indicator')
+    indicator_id = serializer.validated_data.get('indicator_id')
+    if indicator_id:
+        fields = [f for f in prompt_builder.TASKS['generate_compliance_guide'].fields if f in _INDICATOR_FIELDS]
+        indicator = Indicator.objects.filter(
+            id=indicator_id, project__in=get_accessible_projects(request.user)
+        ).values(*fields).first()
+        if indicator is None:
+            return Response({'error': 'Indicator not found'}, status=status.HTTP_404_NOT_FOUND)
     result = ai_services.generate_compliance_guide(indicator)
     return Response({'guide': result})
 
@@ -665,7 +1009,9 @@ def analyze_tasks(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    indicators = serializer.validated_data['indicators']
+    _, indicators, error = _resolve_ai_indicators(request, serializer.validated_data, 'analyze_tasks')
+    if error:
+        return error
     result = ai_services.analyze_tasks(indicators)
     return Response(result)
 
@@ -681,7 +1027,11 @@ def analyze_indicator_explanations(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    indicators = serializer.validated_data['indicators']
+    _, indicators, error = _resolve_ai_indicators(
+        request, serializer.validated_data, 'analyze_indicator_explanations'
+    )
+    if error:
+        return error
     result = ai_services.analyze_indicator_explanations(indicators)
     return Response(result)
 
@@ -697,8 +1047,14 @@ def analyze_frequency_grouping(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    indicators = serializer.validated_data['indicators']
+    project, indicators, error = _resolve_ai_indicators(
+        request, serializer.validated_data, 'analyze_frequency_grouping'
+    )
+    if error:
+        return error
     result = ai_services.analyze_frequency_grouping(indicators)
+    if serializer.validated_data['write_back']:
+        _write_back_groups(request, project, result, 'frequency', _FREQUENCY_GROUP_VALUES)
     return Response(result)
 
 
@@ -782,6 +1138,53 @@ def liveness_check(request):
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """
+    Ranked full-text search over indicators and evidence of the user's projects.
+
+    ``?q=`` is required; ``?project=`` and ``?type=indicator|evidence``
+    narrow the results, ``?limit=`` (default 20, max 100) caps them.
+    """
+    from . import search_service
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    kind = request.query_params.get('type')
+    if kind and kind not in search_service.KINDS:
+        return Response({'error': 'type must be indicator or evidence'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    projects = get_accessible_projects(request.user)
+    project_id = request.query_params.get('project')
+    if project_id:
+        try:
+            project_id = uuid.UUID(project_id)
+        except ValueError:
+            return Response({'error': 'project must be a project ID'}, status=status.HTTP_400_BAD_REQUEST)
+        projects = projects.filter(id=project_id)
+    project_ids = list(projects.values_list('id', flat=True))
+
+    results = search_service.search(query, project_ids, kinds=[kind] if kind else search_service.KINDS, limit=limit)
+    return Response({'query': query, 'count': len(results), 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def portfolio(request):
+    """Compliance rollups for every project, least compliant first by default (``?ordering=``)"""
+    from .stats_service import portfolio_rollup
+    try:
+        data = portfolio_rollup(request.query_params.get('ordering', 'weighted_compliance'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def metrics(request):
@@ -796,7 +1199,9 @@ def metrics(request):
         },
         'cache': {
             'available': cache is not None,
-        }
+        },
+        'ai': ai_metrics.registry.snapshot(),
+        'ai_guard': ai_guard.snapshot(),
     }
     
     # Only allow admins to access metrics
@@ -883,14 +1288,113 @@ def serve_media(request, file_path):
         raise Http404("File not found")
 
 
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Background CSV import jobs of the projects the user can access"""
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer_class(self):
+        from .serializers import ImportJobSerializer
+        return ImportJobSerializer
+
+    def get_queryset(self):
+        from .models import ImportJob
+        return ImportJob.objects.filter(project__in=get_accessible_projects(self.request.user).values('id'))
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Resume a failed (or lost queued) import after its last committed batch"""
+        job = self.get_object()
+        if not get_writable_projects(request.user).filter(id=job.project_id).exists():
+            return Response({'error': 'Only the project owner can resume imports'}, status=status.HTTP_403_FORBIDDEN)
+        from . import import_jobs
+        if import_jobs.resume_job(job.id) is None:
+            return Response({'error': f'Only failed or queued jobs can be resumed (status: {job.status})'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class AuditLogPagination(BasePagination):
+    """
+    Keyset pagination on ``(timestamp, id)``, newest first.
+
+    The cursor is the position of the last row returned, so each page is an
+    index range scan regardless of how deep the client has paged.
+    """
+    page_size = 50
+    max_page_size = 500
+
+    def _decode(self, cursor):
+        try:
+            timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(timestamp), uuid.UUID(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise serializers.ValidationError({'cursor': 'Invalid cursor'})
+
+    def _encode(self, row):
+        return base64.urlsafe_b64encode(f'{row.timestamp.isoformat()}|{row.id}'.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            size = min(int(request.query_params.get('page_size', self.page_size)), self.max_page_size)
+        except ValueError:
+            raise serializers.ValidationError({'page_size': 'Must be an integer'})
+        size = max(size, 1)
+
+        queryset = queryset.order_by('-timestamp', '-id')
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            timestamp, pk = self._decode(cursor)
+            queryset = queryset.filter(
+                models.Q(timestamp__lt=timestamp) | models.Q(timestamp=timestamp, id__lt=pk)
+            )
+
+        rows = list(queryset[:size + 1])
+        self.next_cursor = self._encode(rows[size - 1]) if len(rows) > size else None
+        self.request = request
+        return rows[:size]
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(self.request.build_absolute_uri(), 'cursor', self.next_cursor)
+        return Response({'next': next_url, 'next_cursor': self.next_cursor, 'results': data})
+
+
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """ReadOnly ViewSet for Audit Logs"""
     from .models import AuditLog
     from .serializers import AuditLogSerializer
     
-    queryset = AuditLog.objects.all().order_by('-timestamp')
+    queryset = AuditLog.objects.select_related('actor').order_by('-timestamp', '-id')
     serializer_class = AuditLogSerializer
+    pagination_class = AuditLogPagination
     
     def get_permissions(self):
         from .permissions import IsAdmin
         return [IsAdmin()]
+
+    def list(self, request, *args, **kwargs):
+        """Audit entries filtered by actor, action, entity and time range (``since`` inclusive, ``until`` exclusive)"""
+        from .serializers import AuditLogFilterSerializer
+        filters = AuditLogFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response({'error': 'Invalid input', 'details': filters.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        params = filters.validated_data
+        if 'actor' in params:
+            queryset = queryset.filter(actor_id=params['actor'])
+        if 'action' in params:
+            queryset = queryset.filter(action=params['action'])
+        if 'entity_type' in params:
+            queryset = queryset.filter(entity_type=params['entity_type'])
+        if 'entity_id' in params:
+            queryset = queryset.filter(entity_id=params['entity_id'])
+        if 'since' in params:
+            queryset = queryset.filter(timestamp__gte=params['since'])
+        if 'until' in params:
+            queryset = queryset.filter(timestamp__lt=params['until'])
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
@@ -15,6 +15,8 @@ export default function AuditLogs() {
     const [logs, setLogs] = useState<AuditLogEntry[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         loadLogs();
@@ -25,7 +27,8 @@ export default function AuditLogs() {
         setError(null);
         try {
             const data = await api.getAuditLogs();
-            setLogs(data);
+            setLogs(data.results);
+            setNextCursor(data.next_cursor);
         } catch (err: any) {
             if (err.message && (err.message.includes('403') || err.message.includes('authorized'))) {
                 setError('Not authorized to view audit logs.');
@@ -37,6 +40,20 @@ export default function AuditLogs() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const data = await api.getAuditLogs(nextCursor);
+            setLogs((current) => [...current, ...data.results]);
+            setNextCursor(data.next_cursor);
+        } catch (err: any) {
+            setError(err instanceof Error ? err.message : 'Failed to load audit logs');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     if (loading) {
         return (
             <div className="flex h-64 items-center justify-center">
@@ -109,6 +126,17 @@ export default function AuditLogs() {
                         </tbody>
                     </table>
                 </div>
+                {nextCursor && (
+                    <div className="border-t border-slate-200 p-4 text-center">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="px-4 py-2 text-sm font-medium text-indigo-600 hover:text-indigo-800 disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
@@ -666,17 +666,89 @@ export const api = {
   },
 
   // Import Indicators (CSV)
-  async importIndicators(projectId: string, file: File): Promise<void> {
+  // The upload returns a background job; poll it until the import finishes (up to 10 minutes)
+  async importIndicators(projectId: string, file: File): Promise<any> {
+    const maxPolls = 600;
+    let job: any;
     try {
       const formData = new FormData();
       formData.append('file', file);
-      await apiRequest<void>(`/projects/${projectId}/import-indicators/`, {
+      job = await apiRequest<any>(`/projects/${projectId}/import-indicators/`, {
         method: 'POST',
         body: formData,
       });
+      for (let poll = 0; poll < maxPolls && (job.status === 'queued' || job.status === 'running'); poll++) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = await apiRequest<any>(`/import-jobs/${job.id}/`);
+      }
     } catch (error) {
       throw createNetworkError('Importing indicators', error);
     }
+    if (job.status === 'queued' || job.status === 'running') {
+      throw new Error(`Import is still ${job.status} after 10 minutes; check import job ${job.id} or resume it later`);
+    }
+    if (job.status === 'failed') {
+      throw new Error(`Import failed: ${job.error}`);
+    }
+    return job;
+  },
+
+  // Preview an import: counts and per-row diff, nothing is written
+  async previewImport(projectId: string, file: File): Promise<any> {
+    try {
+      const formData = new FormData();
+      formData.append('file', file);
+      return await apiRequest<any>(`/projects/${projectId}/import-indicators/?dry_run=true`, {
+        method: 'POST',
+        body: formData,
+      });
+    } catch (error) {
+      throw createNetworkError('Previewing import', error);
+    }
+  },
+
+  // Project statistics (aggregated and cached server-side)
+  async getProjectStats(projectId: string): Promise<any> {
+    try {
+      return await apiRequest<any>(`/projects/${projectId}/stats/`);
+    } catch (error) {
+      throw createNetworkError('Loading project statistics', error);
+    }
+  },
+
+  // Daily compliance snapshots for trend charts (default: last 90 days)
+  async getComplianceTrend(projectId: string, from?: string, to?: string): Promise<any> {
+    const params = new URLSearchParams();
+    if (from) params.set('from', from);
+    if (to) params.set('to', to);
+    const query = params.toString() ? `?${params.toString()}` : '';
+    try {
+      return await apiRequest<any>(`/projects/${projectId}/trend/${query}`);
+    } catch (error) {
+      throw createNetworkError('Loading compliance trend', error);
+    }
+  },
+
+  // Ranked full-text search over indicators and evidence of accessible projects
+  async search(query: string, options: { projectId?: string; type?: 'indicator' | 'evidence'; limit?: number } = {}): Promise<any> {
+    const params = new URLSearchParams({ q: query });
+    if (options.projectId) params.set('project', options.projectId);
+    if (options.type) params.set('type', options.type);
+    if (options.limit) params.set('limit', String(options.limit));
+    try {
+      return await apiRequest<any>(`/search/?${params.toString()}`);
+    } catch (error) {
+      throw createNetworkError('Searching', error);
+    }
+  },
+
+  // Admin: compliance rollups for all projects (least compliant first by default)
+  async getPortfolio(ordering: string = 'weighted_compliance'): Promise<any> {
+    try {
+      return await apiRequest<any>(`/admin/portfolio/?ordering=${encodeURIComponent(ordering)}`);
+    } catch (error) {
+      throw createNetworkError('Loading portfolio', error);
+    }
   },
 
   // Upcoming Tasks (Backend)
@@ -692,9 +764,10 @@ export const api = {
   },
 
   // Audit Logs (Admin)
-  async getAuditLogs(): Promise<any[]> {
+  async getAuditLogs(cursor?: string): Promise<{ results: any[]; next_cursor: string | null }> {
     try {
-      return await apiRequest<any[]>('/audit-logs/');
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      return await apiRequest<{ results: any[]; next_cursor: string | null }>(`/audit-logs/${query}`);
     } catch (error) {
       throw createNetworkError('Loading audit logs', error);
     }